@@ -0,0 +1,301 @@
+# A command-line script for sizing many busbars at once without the GUI.
+# Reads a bill of materials from a CSV or JSON Lines file, runs every row
+# through the calculateArea/calculateAmp functions in hysterYaleEquations.py,
+# and writes the results out as it goes so that files with any number of rows
+# can be sized in a fixed amount of memory.
+#
+# Each input row must contain "bends" and "folds", and either an "ampacity" (to
+# calculate a cross-sectional area) or an "area" (to calculate an ampacity).
+# The optional "units" column gives the cross-sectional area units (the units
+# of "area", or the units the calculated area is written in) and defaults to
+# m². The optional "length" and "lengthUnits" columns are checked the same way
+# the GUI checks them, and rows with a length are corrected for it with
+# hysterYaleThermal.py (--end-temperature sets the temperature of the ends of
+# the bars). All other columns are copied to the output unchanged.
+#
+# Example:
+# # python hysterYaleBatch.py bom.csv results.csv --workers 4
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from hysterYaleEquations import STATUS_OK
+from hysterYaleSizing import SizingError
+from hysterYaleSizing import sizeArea
+from hysterYaleSizing import sizeAmp
+from hysterYaleSizing import checkAreaInputs
+from hysterYaleSizing import checkAmpInputs
+from hysterYaleSizing import areaResult
+from hysterYaleSizing import ampResult
+
+OUTPUT_COLUMNS = ["result", "resultUnits", "status", "error"] #The columns added to each row.
+NO_INPUT = "Each row must have either an ampacity or an area." #The error for rows with neither.
+NOT_AN_OBJECT = "Each row must be a JSON object." #The error for JSON Lines rows that are not objects.
+INVALID_JSON = "Line {0} is not valid JSON ({1} at column {2})." #The error for JSON Lines lines that cannot be parsed.
+
+# Stands in for a line of a JSON Lines file that could not be parsed, so that
+# the line is reported in the output instead of stopping the whole run.
+# 'lineNumber' counts from 1 and 'message' is the error to report.
+class UnreadableLine:
+    def __init__(self, lineNumber, message):
+        self.lineNumber = lineNumber
+        self.message = message
+
+# Returns True if a column is missing or was left blank.
+def isBlank(value):
+    return value is None or str(value).strip() == ""
+
+# Returns a copy of a bill-of-materials row with the OUTPUT_COLUMNS added. A
+# row that is not a dictionary is copied to the "row" column, and for a line
+# that could not be read its number is put in the "line" column.
+def newOutput(row):
+    if (isinstance(row, dict)):
+        output = dict(row)
+    elif (isinstance(row, UnreadableLine)):
+        output = {"line": row.lineNumber}
+    else:
+        output = {"row": row}
+    output["result"] = ""
+    output["resultUnits"] = ""
+    output["status"] = "ok"
+    output["error"] = ""
+    return output
+
+# Returns the (units, length, lengthUnits) columns of a row, with the defaults
+# filled in for any that were left blank.
+def readOptions(row):
+    units = row.get("units")
+    if (isBlank(units)):
+        units = "m²"
+    length = row.get("length")
+    if (isBlank(length)):
+        length = None
+    lengthUnits = row.get("lengthUnits")
+    if (isBlank(lengthUnits)):
+        lengthUnits = "mm"
+    return units, length, lengthUnits
+
+# Sizes a single bill-of-materials row. 'row' is a dictionary of column names
+# to values and a copy of it is returned with the OUTPUT_COLUMNS filled in.
+# Lengths are corrected for with 'lengthModel' (see hysterYaleSizing.py).
+def sizeRow(row, lengthModel=None):
+    output = newOutput(row)
+    if (isinstance(row, UnreadableLine)):
+        output["status"] = "invalid input"
+        output["error"] = row.message
+        return output
+    if (not isinstance(row, dict)):
+        output["status"] = "invalid input"
+        output["error"] = NOT_AN_OBJECT
+        return output
+    units, length, lengthUnits = readOptions(row)
+    try:
+        if (not isBlank(row.get("ampacity"))):
+            result = sizeArea(row["ampacity"], length, row.get("bends"), row.get("folds"),
+                              lengthUnits=lengthUnits, outputUnits=units, lengthModel=lengthModel)
+        elif (not isBlank(row.get("area"))):
+            result = sizeAmp(row["area"], units, length, row.get("bends"), row.get("folds"),
+                             lengthUnits=lengthUnits, lengthModel=lengthModel)
+        else:
+            raise SizingError(NO_INPUT)
+    except SizingError as e:
+        output["status"] = e.status
+        output["error"] = e.message
+        return output
+
+    output["result"] = result.value
+    output["resultUnits"] = result.units
+    return output
+
+# Sizes the rows with a length in 'pending', a list of
+# (output, value, length, bends, folds, units) with the inputs already
+# checked, with one call to 'calculate' (calculateAreaForLengthBatch or
+# calculateAmpForLengthBatch). Each output is filled in with the SizingResult
+# from 'makeResult(calculated, units)' or the SizingError it raises.
+def sizeWithLength(pending, calculate, makeResult, lengthModel):
+    import numpy as np
+    from hysterYaleThermal import STATUS_RESULTS
+
+    if (not pending):
+        return
+    outputs, values, lengths, bends, folds, units = zip(*pending)
+    calculated, status = calculate(np.array(values, dtype=np.float64), np.array(lengths, dtype=np.float64),
+                                   np.array(bends, dtype=np.int64), np.array(folds, dtype=np.int64), lengthModel)
+    for output, value, code, rowUnits in zip(outputs, calculated.tolist(), status.tolist(), units):
+        try:
+            result = makeResult(value if code == STATUS_OK else STATUS_RESULTS.get(code, -99), rowUnits)
+        except SizingError as e:
+            output["status"] = e.status
+            output["error"] = e.message
+        else:
+            output["result"] = result.value
+            output["resultUnits"] = result.units
+
+# Sizes a list of rows. This is the unit of work sent to each worker process.
+# Rows without a length are sized one at a time with sizeRow, and the rows
+# with a length are checked here and then sized with one batch call for the
+# areas and one for the ampacities.
+def sizeChunk(rows, lengthModel=None):
+    outputs = []
+    areaRows = []
+    ampRows = []
+    for row in rows:
+        if (not isinstance(row, dict) or isBlank(row.get("length"))):
+            outputs.append(sizeRow(row, lengthModel))
+            continue
+        units, length, lengthUnits = readOptions(row)
+        output = newOutput(row)
+        outputs.append(output)
+        try:
+            if (not isBlank(row.get("ampacity"))):
+                amp, meters, bends, folds = checkAreaInputs(row["ampacity"], length, row.get("bends"),
+                                                            row.get("folds"), lengthUnits, units)
+                areaRows.append((output, amp, meters, bends, folds, units))
+            elif (not isBlank(row.get("area"))):
+                xArea, meters, bends, folds = checkAmpInputs(row["area"], units, length, row.get("bends"),
+                                                             row.get("folds"), lengthUnits)
+                ampRows.append((output, xArea, meters, bends, folds, units))
+            else:
+                raise SizingError(NO_INPUT)
+        except SizingError as e:
+            output["status"] = e.status
+            output["error"] = e.message
+
+    if (areaRows or ampRows):
+        # Imported here so the thermal model is only loaded when it is used.
+        from hysterYaleThermal import calculateAreaForLengthBatch
+        from hysterYaleThermal import calculateAmpForLengthBatch
+        sizeWithLength(areaRows, calculateAreaForLengthBatch, areaResult, lengthModel)
+        sizeWithLength(ampRows, calculateAmpForLengthBatch, lambda calculated, units: ampResult(calculated),
+                       lengthModel)
+    return outputs
+
+# Yields the rows of a CSV or JSON Lines file one at a time as dictionaries.
+# A JSON Lines line that is not valid JSON is yielded as an UnreadableLine.
+def readRows(inputFile, fileFormat):
+    if (fileFormat == "jsonl"):
+        for lineNumber, line in enumerate(inputFile, 1):
+            if (line.strip() == ""):
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield UnreadableLine(lineNumber, INVALID_JSON.format(lineNumber, e.msg, e.colno))
+    else:
+        yield from csv.DictReader(inputFile)
+
+# Writes sized rows to a CSV or JSON Lines file. The CSV header is taken from
+# the first row written, so the whole input never has to be read up front.
+class RowWriter:
+    def __init__(self, outputFile, fileFormat):
+        self.outputFile = outputFile
+        self.fileFormat = fileFormat
+        self.csvWriter = None
+
+    def writeRows(self, rows):
+        if (self.fileFormat == "jsonl"):
+            for row in rows:
+                self.outputFile.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return
+        for row in rows:
+            if (self.csvWriter is None):
+                fieldnames = [key for key in row if key not in OUTPUT_COLUMNS] + OUTPUT_COLUMNS
+                self.csvWriter = csv.DictWriter(self.outputFile, fieldnames=fieldnames,
+                                                extrasaction="ignore", lineterminator="\n")
+                self.csvWriter.writeheader()
+            self.csvWriter.writerow(row)
+
+# Splits an iterator of rows into lists of at most 'chunkSize' rows.
+def chunked(rows, chunkSize):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunkSize))
+        if (not chunk):
+            return
+        yield chunk
+
+# Sizes every row from 'rows' and hands the results to 'writeRows' one chunk at
+# a time, in the same order as the input. With more than one worker the chunks
+# are sized in a process pool, and only a few chunks per worker are ever in
+# flight so memory use does not grow with the size of the input.
+# Returns the number of rows sized.
+def sizeRows(rows, writeRows, chunkSize=4096, workers=1, lengthModel=None):
+    rowCount = 0
+    if (workers <= 1):
+        for chunk in chunked(rows, chunkSize):
+            writeRows(sizeChunk(chunk, lengthModel))
+            rowCount += len(chunk)
+        return rowCount
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunked(rows, chunkSize):
+            pending.append(pool.submit(sizeChunk, chunk, lengthModel))
+            if (len(pending) >= workers*2):
+                sizedRows = pending.popleft().result()
+                writeRows(sizedRows)
+                rowCount += len(sizedRows)
+        while pending:
+            sizedRows = pending.popleft().result()
+            writeRows(sizedRows)
+            rowCount += len(sizedRows)
+    return rowCount
+
+# Works out whether a file is CSV or JSON Lines from its name.
+def guessFormat(path):
+    if (path.lower().endswith((".jsonl", ".ndjson"))):
+        return "jsonl"
+    return "csv"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Size every busbar in a bill-of-materials file.")
+    parser.add_argument("input", help="CSV or JSON Lines file to read, or - for standard input")
+    parser.add_argument("output", help="CSV or JSON Lines file to write, or - for standard output")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="defaults to the input file extension")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="defaults to the output file extension")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (default 1)")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="rows sized per chunk (default 4096)")
+    parser.add_argument("--end-temperature", type=float, help="temperature of the ends of bars with a length in °C (default: the temperature limit)")
+    args = parser.parse_args(argv)
+
+    lengthModel = None
+    if (args.end_temperature is not None):
+        # Imported here so the thermal model is only loaded when it is used.
+        from hysterYaleThermal import ThermalModel
+        lengthModel = ThermalModel(endTemperature=args.end_temperature)
+
+    inputFormat = args.input_format or guessFormat(args.input)
+    outputFormat = args.output_format or guessFormat(args.output)
+    if (args.input == "-"):
+        inputFile = sys.stdin
+    else:
+        inputFile = open(args.input, mode='r', newline='', encoding='utf-8-sig')
+    if (args.output == "-"):
+        outputFile = sys.stdout
+    else:
+        outputFile = open(args.output, mode='w', newline='', encoding='utf-8')
+
+    startTime = time.perf_counter()
+    try:
+        writer = RowWriter(outputFile, outputFormat)
+        rowCount = sizeRows(readRows(inputFile, inputFormat), writer.writeRows,
+                            chunkSize=max(args.chunk_size, 1), workers=args.workers, lengthModel=lengthModel)
+    finally:
+        if (inputFile is not sys.stdin):
+            inputFile.close()
+        if (outputFile is not sys.stdout):
+            outputFile.close()
+    elapsed = time.perf_counter() - startTime
+
+    rate = rowCount/elapsed if elapsed > 0 else float("inf")
+    print("Sized {0} rows in {1:.3f} s ({2:,.0f} rows/s)".format(rowCount, elapsed, rate), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
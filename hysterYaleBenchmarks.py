@@ -0,0 +1,288 @@
+# A script for timing the parts of the busbar sizing program that run the most:
+# calculateArea, calculateAmp and convertUnits (one call at a time and as
+# large sweeps), and the GUI's outputArea/outputAmp callbacks from start to
+# finish. The GUI callbacks are run against stand-ins for the tkinter widgets,
+# so no display is needed.
+#
+# The lookups are timed against synthetic geometry tables with different
+# numbers of rows (10, 10,000 and 1,000,000 by default), written to a
+# temporary directory so the real CSV files are never touched. Single calls
+# are timed one by one and reported as latency percentiles; sweeps are
+# reported as a total time and a rate.
+#
+# The results are saved as JSON. Passing an earlier results file with
+# --compare prints how much each benchmark has changed and exits with an
+# error if any of them got slower by more than --tolerance.
+#
+# Example:
+# # python hysterYaleBenchmarks.py --output benchmarks.json
+# # python hysterYaleBenchmarks.py --output new.json --compare benchmarks.json
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import hysterYaleEquations
+from hysterYaleEquations import calculateArea
+from hysterYaleEquations import calculateAmp
+from hysterYaleEquations import convertUnits
+
+DEFAULT_SIZES = [10, 10000, 1000000] #The numbers of rows in the synthetic tables.
+PERCENTILES = [50, 90, 99] #The latency percentiles reported for single calls.
+LUT_RESOLUTION = 4096 #The points per curve in the lookup table benchmarks.
+
+# A stand-in for a tkinter Entry or StringVar that always holds 'value'.
+class FakeInput:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+# A stand-in for a tkinter Label that remembers the last text it was given.
+class FakeLabel:
+    def __init__(self):
+        self.text = ""
+
+    def config(self, text=""):
+        self.text = text
+
+# Writes a synthetic geometry table with 'rows' rows to 'directory' as
+# busbar-data-0folds-0bends.csv. Like the real data, the ampacity mostly rises
+# with the cross-sectional area but goes up and down along the way.
+def writeSyntheticTable(directory, rows, seed=0):
+    generator = random.Random(seed)
+    path = os.path.join(directory, hysterYaleEquations.geometryCsvPath(0, 0))
+    with open(path, mode='w', newline='') as csvFile:
+        csvFile.write("Cross-sectional area,90-degree ampacity\n")
+        for i in range(rows):
+            fraction = i / max(rows - 1, 1)
+            xArea = 5e-6 + 7.5e-5*fraction
+            ampacity = 50 + 150*fraction + 20*math.sin(40*fraction) + generator.uniform(-5, 5)
+            csvFile.write("{0!r},{1!r}\n".format(xArea, ampacity))
+    return path
+
+# Returns the given percentiles of a list of timings, in microseconds.
+def percentiles(timings, wanted=PERCENTILES):
+    timings = sorted(timings)
+    summary = {}
+    for percentile in wanted:
+        index = min(len(timings) - 1, int(round(percentile / 100 * (len(timings) - 1))))
+        summary["p{0}_us".format(percentile)] = timings[index] / 1000
+    summary["max_us"] = timings[-1] / 1000
+    summary["mean_us"] = sum(timings) / len(timings) / 1000
+    return summary
+
+# Calls 'function' once for each set of arguments in 'calls', timing each call
+# separately. Returns a result dictionary with latency percentiles.
+def timeCalls(name, rows, function, calls):
+    timings = []
+    clock = time.perf_counter_ns
+    for arguments in calls:
+        start = clock()
+        function(*arguments)
+        timings.append(clock() - start)
+    result = {"name": name, "rows": rows, "calls": len(calls)}
+    result.update(percentiles(timings))
+    return result
+
+# Times a single call of 'function' that handles 'count' values in one go.
+# Returns a result dictionary with the total time and the values per second.
+def timeSweep(name, rows, count, function, *arguments):
+    start = time.perf_counter()
+    function(*arguments)
+    elapsed = time.perf_counter() - start
+    return {"name": name, "rows": rows, "values": count, "total_s": elapsed,
+            "per_second": count / elapsed if elapsed > 0 else float("inf")}
+
+# Runs outputArea and outputAmp from the GUI script against stand-in widgets.
+# 'calls' is the number of times each callback is run.
+def timeGuiCallbacks(rows, calls, ampacities, xAreas):
+    import hysterYaleBusbarSizing as gui
+
+    errors = []
+    gui.displayError = errors.append
+    gui.xAreaLabel1 = FakeLabel()
+    gui.ampacityLabel2 = FakeLabel()
+    gui.lengthInput1 = FakeInput("100")
+    gui.lengthInput2 = FakeInput("100")
+    gui.lengthDefault1 = FakeInput("mm")
+    gui.lengthDefault2 = FakeInput("mm")
+    gui.bendsDefault1 = FakeInput("0")
+    gui.bendsDefault2 = FakeInput("0")
+    gui.foldsDefault1 = FakeInput("0")
+    gui.foldsDefault2 = FakeInput("0")
+    gui.xAreaDefault = FakeInput("mm²")
+    gui.maxAmpInput1 = FakeInput("")
+    gui.xAreaInput2 = FakeInput("")
+
+    def runOutputArea(amp):
+        gui.maxAmpInput1.set(amp)
+        gui.outputArea()
+
+    def runOutputAmp(xArea):
+        gui.xAreaInput2.set(xArea)
+        gui.outputAmp()
+
+    return [timeCalls("outputArea", rows, runOutputArea, [(str(amp),) for amp in ampacities[:calls]]),
+            timeCalls("outputAmp", rows, runOutputAmp, [(str(xArea*1e6),) for xArea in xAreas[:calls]])]
+
+# Runs every benchmark for a synthetic table with 'rows' rows. 'calls' is the
+# number of single calls timed and 'sweep' is the number of values in each
+# sweep.
+def benchmarkTableSize(rows, calls, sweep, seed=0):
+    results = []
+    generator = random.Random(seed)
+    originalDirectory = hysterYaleEquations.getDataDirectory()
+    with tempfile.TemporaryDirectory() as directory:
+        writeSyntheticTable(directory, rows, seed)
+        hysterYaleEquations.setDataDirectory(directory)
+        try:
+
+            # The first lookup reads (or compiles) the table and builds its index.
+            start = time.perf_counter()
+            hysterYaleEquations.getGeometryTable(0, 0)
+            results.append({"name": "load", "rows": rows, "total_s": time.perf_counter() - start})
+
+            ampacities = [generator.uniform(40, 230) for _ in range(max(calls, sweep))]
+            xAreas = [generator.uniform(4e-6, 9e-5) for _ in range(max(calls, sweep))]
+            results.append(timeCalls("calculateArea", rows, calculateArea,
+                                     [(amp, 0, 0) for amp in ampacities[:calls]]))
+            results.append(timeCalls("calculateAmp", rows, calculateAmp,
+                                     [(xArea, 0, 0) for xArea in xAreas[:calls]]))
+            results.append(timeSweep("calculateArea loop", rows, sweep,
+                                     lambda: [calculateArea(amp, 0, 0) for amp in ampacities[:sweep]]))
+            results.append(timeSweep("calculateAmp loop", rows, sweep,
+                                     lambda: [calculateAmp(xArea, 0, 0) for xArea in xAreas[:sweep]]))
+            results.extend(timeGuiCallbacks(rows, calls, ampacities, xAreas))
+
+            try:
+                import numpy as np
+            except ImportError:
+                np = None
+            if (np is not None):
+                batchSize = sweep*100
+                batchAmps = np.random.default_rng(seed).uniform(40, 230, batchSize)
+                batchAreas = np.random.default_rng(seed).uniform(4e-6, 9e-5, batchSize)
+                results.append(timeSweep("calculateAreaBatch", rows, batchSize,
+                                         hysterYaleEquations.calculateAreaBatch, batchAmps, 0, 0))
+                results.append(timeSweep("calculateAmpBatch", rows, batchSize,
+                                         hysterYaleEquations.calculateAmpBatch, batchAreas, 0, 0))
+
+                # The same lookups against the uniform lookup tables.
+                hysterYaleEquations.configureLookupTables(LUT_RESOLUTION)
+                try:
+                    start = time.perf_counter()
+                    hysterYaleEquations.getGeometryTable(0, 0).getLookupTable(LUT_RESOLUTION)
+                    results.append({"name": "lookup table build", "rows": rows, "total_s": time.perf_counter() - start})
+                    results.append(timeCalls("calculateArea LUT", rows, calculateArea,
+                                             [(amp, 0, 0) for amp in ampacities[:calls]]))
+                    results.append(timeCalls("calculateAmp LUT", rows, calculateAmp,
+                                             [(xArea, 0, 0) for xArea in xAreas[:calls]]))
+                    results.append(timeSweep("calculateAreaBatch LUT", rows, batchSize,
+                                             hysterYaleEquations.calculateAreaBatch, batchAmps, 0, 0))
+                    results.append(timeSweep("calculateAmpBatch LUT", rows, batchSize,
+                                             hysterYaleEquations.calculateAmpBatch, batchAreas, 0, 0))
+                finally:
+                    hysterYaleEquations.disableLookupTables()
+        finally:
+            hysterYaleEquations.setDataDirectory(originalDirectory)
+    return results
+
+# Times convertUnits, which does not depend on the geometry tables.
+def benchmarkUnits(calls, sweep, seed=0):
+    generator = random.Random(seed)
+    areaUnits = ["mm²", "cm²", "m²", "in²"]
+    conversions = [(generator.choice(areaUnits), generator.uniform(1, 100), generator.choice(areaUnits))
+                   for _ in range(max(calls, sweep))]
+    return [timeCalls("convertUnits", None, convertUnits, conversions[:calls]),
+            timeSweep("convertUnits loop", None, sweep,
+                      lambda: [convertUnits(*conversion) for conversion in conversions[:sweep]])]
+
+# Runs every benchmark. Returns the dictionary that is saved as JSON.
+def runBenchmarks(sizes=DEFAULT_SIZES, calls=10000, sweep=10000, seed=0):
+    results = benchmarkUnits(calls, sweep, seed)
+    for rows in sizes:
+        results.extend(benchmarkTableSize(rows, calls, sweep, seed))
+    try:
+        from hysterYaleSizing import measureColdImport
+        results.append({"name": "cold import", "rows": None, "total_s": measureColdImport() / 1000})
+    except Exception as e:
+        print("Could not measure the cold import time: {0}".format(e), file=sys.stderr)
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+
+# The number used to compare one benchmark between two runs (lower is better).
+def benchmarkScore(result):
+    for key in ("p50_us", "total_s"):
+        if (key in result):
+            return result[key]
+    return None
+
+# Compares two sets of results. Prints the change in every benchmark that
+# appears in both and returns the names of those that got slower by more than
+# 'tolerance' (0.25 means 25% slower).
+def compareResults(previous, current, tolerance=0.25):
+    previousScores = {(result["name"], result["rows"]): benchmarkScore(result) for result in previous["results"]}
+    regressions = []
+    for result in current["results"]:
+        key = (result["name"], result["rows"])
+        before = previousScores.get(key)
+        after = benchmarkScore(result)
+        if (not before or after is None):
+            continue
+        ratio = after / before
+        print("{0:<22} {1:>9} {2:>8.2f}x".format(result["name"], str(result["rows"]), ratio))
+        if (ratio > 1 + tolerance):
+            regressions.append("{0} ({1} rows)".format(*key))
+    return regressions
+
+# Prints the results as a table.
+def printResults(report):
+    for result in report["results"]:
+        if ("p50_us" in result):
+            print("{0:<22} {1:>9} p50 {2:9.2f} us  p90 {3:9.2f} us  p99 {4:9.2f} us".format(
+                result["name"], str(result["rows"]), result["p50_us"], result["p90_us"], result["p99_us"]))
+        elif ("per_second" in result):
+            print("{0:<22} {1:>9} {2:9.3f} s  {3:,.0f} values/s".format(
+                result["name"], str(result["rows"]), result["total_s"], result["per_second"]))
+        else:
+            print("{0:<22} {1:>9} {2:9.3f} s".format(result["name"], str(result["rows"]), result["total_s"]))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the busbar sizing hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="rows in each synthetic table")
+    parser.add_argument("--calls", type=int, default=10000, help="single calls timed per benchmark")
+    parser.add_argument("--sweep", type=int, default=10000, help="values per loop sweep (batch sweeps use 100x)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic data")
+    parser.add_argument("--output", help="file to save the results to as JSON")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown when comparing (default 0.25)")
+    args = parser.parse_args(argv)
+
+    report = runBenchmarks(args.sizes, args.calls, args.sweep, args.seed)
+    printResults(report)
+    if (args.output):
+        with open(args.output, mode='w') as outputFile:
+            json.dump(report, outputFile, indent=2)
+
+    if (args.compare):
+        with open(args.compare, mode='r') as previousFile:
+            previous = json.load(previousFile)
+        regressions = compareResults(previous, report, args.tolerance)
+        if (regressions):
+            print("Slower than before: " + ", ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
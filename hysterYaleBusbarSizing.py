@@ -7,52 +7,142 @@
 # experimentally-validated data to output the either the amount of current that
 # can be run through a busbar or the cross-sectional area it can have while
 # still keeping the surface temperature of the bar under 90°C.
-
-import tkinter as tk
-import tkinter.font as tkFont
-from tkinter import ttk
-from tkinter import Toplevel
-from hysterYaleEquations import calculateArea
-from hysterYaleEquations import calculateAmp
-from hysterYaleEquations import convertUnits
-
-# The defined options for the different option menus
-X_AREA_UNITS = ["mm²","cm²","m²", "in²"] #The options that can be selected for cross-sectional area units.
-LENGTH_UNITS = ["mm","cm","m", "in"] #The options that can be selected.
-BEND_OPTIONS = [0, 1] #The options for the number of 90° bends in the bar.
-FOLD_OPTIONS = [0, 1, 2, 3, 4] #The options for the number of 180° folds in the bar.
-
-# Create the main window for the program.
-mainWindow= tk.Tk()
-mainWindow.title("Hyster-Yale software")
-
-# Create a stylesheet that can be used to make the tabs look nice.
-style_ref = ttk.Style()
-guiFont = tkFont.Font(family="Helvetica", size=10)
-style_ref.theme_create("guiTheme", parent="alt", settings={
-        "TNotebook": {"configure": {"tabmargins": [2, 5, 2, 0], "background": "#0a154a" } },
-        "TNotebook.Tab": {
-            "configure": {"padding": [5, 1], "background": "#4355ab", "foreground": "white" },
-            "map":       {"background": [("selected", "#0a154a")],
-                          "expand": [("selected", [1, 1, 1, 0])] } } } )
-
-style_ref.theme_use("guiTheme")
-
-# Load in all the images here so that Python's garbage collection doesn't remove
-# them if we put them inside the other windows.
-errorIconFile = tk.PhotoImage(file="error_icon.png", width=50, height=50)
-logo = tk.PhotoImage(file="logo.png", width=400, height=98)
-faviconFile = tk.PhotoImage(file="ico.png")
-
-# Set the icon for the program.
-mainWindow.iconphoto(True, faviconFile)
+#
+# The checks on the user's inputs and the error messages live in
+# hysterYaleSizing.py. Both tabs also take the temperature the ends of the bar
+# are held at, which the length correction in hysterYaleThermal.py needs; it
+# starts at END_TEMPERATURE, where the length makes no difference. tkinter and the images are only loaded once the GUI is
+# launched by main(), so other scripts can import this one without a display.
+#
+# Each tab has a "Live update" box. When it is ticked the result is worked out
+# again whenever an input changes, without clicking the button. The inputs are
+# only read once the user has stopped typing for LIVE_DELAY_MS, the lookup runs
+# on a background thread, and the result is handed back to the GUI with after(),
+# so the window keeps responding even if a table takes a while to load.
+
+import os
+import queue
+import threading
+from functools import partial
+
+from hysterYaleEquations import resourcePath
+from hysterYaleSizing import SizingError
+from hysterYaleSizing import sizeArea
+from hysterYaleSizing import sizeAmp
+from hysterYaleSizing import rankGeometries
+from hysterYaleSizing import X_AREA_UNITS
+from hysterYaleSizing import LENGTH_UNITS
+from hysterYaleSizing import BEND_OPTIONS
+from hysterYaleSizing import FOLD_OPTIONS
+from hysterYaleSizing import STARTUP_CHECK_VARIABLE
+from hysterYaleThermal import END_TEMPERATURE
+
+LIVE_DELAY_MS = 300 #How long the inputs must stay unchanged before a live update.
+LIVE_POLL_MS = 20 #How often the GUI checks whether a live update has finished.
+
+# Works out one tab's result on a background thread whenever its inputs change
+# while live updating is turned on.
+# # 'window' is the Tk window used to schedule calls with after().
+# # 'makeRequest' is called on the GUI thread and returns a function that takes
+# # # no arguments and works out the result for the inputs as they are now, or
+# # # None if there is nothing to work out yet.
+# # 'showResult' is called on the GUI thread with each SizingResult, and
+# # # 'showProblem' with the error message (or None if there was no request).
+# Only the newest change is worked out: changes made while a lookup is running
+# replace any that are still waiting, and results for older inputs are dropped.
+class LiveCalculator:
+    def __init__(self, window, makeRequest, showResult, showProblem):
+        self.window = window
+        self.makeRequest = makeRequest
+        self.showResult = showResult
+        self.showProblem = showProblem
+        self.enabled = False
+        self.generation = 0 #The number of the newest request.
+        self.finished = 0 #The number of the newest request with a result.
+        self.waiting = None #The after() id of the pending debounced update.
+        self.polling = None #The after() id of the next check for results.
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.worker = None
+
+    # Turns live updating on or off. Turning it on works out the result
+    # straight away.
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+        if (enabled):
+            self.changed()
+        elif (self.waiting is not None):
+            self.window.after_cancel(self.waiting)
+            self.waiting = None
+
+    # Called whenever one of the tab's inputs changes. Restarts the wait so
+    # nothing is worked out until the user stops typing.
+    def changed(self, *args):
+        if (not self.enabled):
+            return
+        if (self.waiting is not None):
+            self.window.after_cancel(self.waiting)
+        self.waiting = self.window.after(LIVE_DELAY_MS, self.submit)
+
+    # Reads the inputs and hands them to the background thread.
+    def submit(self):
+        self.waiting = None
+        request = self.makeRequest()
+        self.generation += 1
+        if (request is None):
+            self.finished = self.generation
+            self.showProblem(None)
+            return
+        if (self.worker is None):
+            self.worker = threading.Thread(target=self.work, daemon=True)
+            self.worker.start()
+        self.requests.put((self.generation, request))
+        if (self.polling is None):
+            self.polling = self.window.after(LIVE_POLL_MS, self.poll)
+
+    # Runs on the background thread. Always skips to the newest request.
+    def work(self):
+        while True:
+            generation, request = self.requests.get()
+            try:
+                while True:
+                    generation, request = self.requests.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.results.put((generation, request(), None))
+            except SizingError as e:
+                self.results.put((generation, None, e.message))
+            except Exception as e:
+                self.results.put((generation, None, str(e)))
+
+    # Runs on the GUI thread. Shows the newest result, and keeps checking
+    # until the newest request has finished.
+    def poll(self):
+        self.polling = None
+        try:
+            while True:
+                generation, result, message = self.results.get_nowait()
+                if (generation > self.finished):
+                    self.finished = generation
+                if (generation == self.generation):
+                    if (message is None):
+                        self.showResult(result)
+                    else:
+                        self.showProblem(message)
+        except queue.Empty:
+            pass
+        if (self.finished < self.generation):
+            self.polling = self.window.after(LIVE_POLL_MS, self.poll)
 
 # The function to be called to display an error to the user. The parameter
 # "error" is the text that will be displayed to the user.
 #
 # Creates and positions a new window that displays the error.
 def displayError (error):
-    errorWindow = Toplevel(master=mainWindow, bg='#0a154a')
+    import tkinter as tk
+
+    errorWindow = tk.Toplevel(master=mainWindow, bg='#0a154a')
     errorWindow.title("Busbar calculation error!")
     errorWindow.rowconfigure(0, weight=1, minsize=20)
     errorWindow.columnconfigure(0, weight=1, minsize=20)
@@ -62,226 +152,345 @@ def displayError (error):
     errorIcon.grid(row=0, column=0, sticky="w", padx=(30,0))
     errorText.grid(row=0, column=1, sticky="e", padx=(0,30), pady=40)
 
+# Returns a function that calls sizeArea() with the inputs on the first tab as
+# they are now.
+def areaRequest ():
+    return partial(sizeArea, maxAmpInput1.get(), lengthInput1.get(), bendsDefault1.get(),
+                   foldsDefault1.get(), lengthUnits=lengthDefault1.get(),
+                   endTemperature=endTemperatureInput1.get())
+
+def showArea (result):
+    xAreaLabel1.config(text = "Cross-sectional area: {:.3e} m²".format(result.value))
+
 # The function for outputting the cross-sectional area when the user inputs a
-# maximum ampacity. Calls the calculateArea() function to do all the hard work.
+# maximum ampacity. Calls the sizeArea() function to do all the hard work.
 def outputArea ():
     xAreaLabel1.config(text = "Error calculating X-sec. area")
-    amp = maxAmpInput1.get()
-    length = lengthInput1.get()
-    bends = bendsDefault1.get()
-    folds = foldsDefault1.get()
-    lengthUnits = lengthDefault1.get()
     try:
-        length = float(length)
-        amp = float(amp)
-
-        calculatedArea = calculateArea(float(amp), int(bends), int(folds))
-        if (calculatedArea == -1):
-            displayError("The inputted ampacity is above the currents tested experimentally.")
-        elif (calculatedArea == -2):
-            displayError("The inputted ampacity is below the currents tested experimentally.")
-        elif (calculatedArea == -3):
-            displayError("No busbars with the combination of bends and folds inputted were tested experimentally.")
-        elif (calculatedArea < 0):
-            displayError("There was an unknown error when trying to calculate the cross-sectional area.")
-        else:
-            xAreaLabel1.config(text = "Cross-sectional area: {:.3e} m²".format(calculatedArea))
-
-    except ValueError:
-        displayError("Must input a valid number for ampacity and length.")
+        result = areaRequest()()
+    except SizingError as e:
+        displayError(e.message)
+    else:
+        showArea(result)
+
+# The function for finding the busbar geometries that can carry the inputted
+# maximum ampacity with the smallest cross-sectional area. Calls the
+# rankGeometries() function to check every tested geometry, selects the best
+# one in the dropdowns, and opens a window listing all of them in order.
+def outputSmallestGeometry ():
+    import tkinter as tk
+
+    xAreaLabel1.config(text = "Error finding smallest geometry")
+    try:
+        ranked = rankGeometries(maxAmpInput1.get(), length=lengthInput1.get(), lengthUnits=lengthDefault1.get(),
+                                endTemperature=endTemperatureInput1.get())
+    except SizingError as e:
+        displayError(e.message)
+        return
+
+    bestResult, bestFolds, bestBends = ranked[0]
+    bendsDefault1.set(bestBends)
+    foldsDefault1.set(bestFolds)
+    xAreaLabel1.config(text = "Cross-sectional area: {:.3e} m²".format(bestResult.value))
+
+    rankWindow = tk.Toplevel(master=mainWindow, bg='#0a154a', padx=30, pady=20)
+    rankWindow.title("Smallest busbar geometries")
+    lines = ["{0}. {1} folds, {2} bends: {3:.3e} m²".format(rank + 1, folds, bends, result.value)
+             for rank, (result, folds, bends) in enumerate(ranked)]
+    rankText = tk.Label(master=rankWindow, text="\n".join(lines), justify="left", font=("Helvetica", 9), bg='#0a154a', fg="white")
+    rankText.grid(row=0, column=0, sticky="w")
+
+# Returns a function that calls sizeAmp() with the inputs on the second tab as
+# they are now.
+def ampRequest ():
+    return partial(sizeAmp, xAreaInput2.get(), xAreaDefault.get(), lengthInput2.get(), bendsDefault2.get(),
+                   foldsDefault2.get(), lengthUnits=lengthDefault2.get(),
+                   endTemperature=endTemperatureInput2.get())
+
+def showAmp (result):
+    ampacityLabel2.config(text = "Ampacity: {:.3f} A".format(result.value))
 
 # The function for outputting a maximum electrical current ampacity when the
-# user inputs a busbar's cross-sectional area. Calls the calculateAmp() function
+# user inputs a busbar's cross-sectional area. Calls the sizeAmp() function
 # to do all the hard work.
 def outputAmp ():
     ampacityLabel2.config(text = "Error calculating ampacity")
-    xAreaRaw = xAreaInput2.get()
-    xAreaUnits = xAreaDefault.get()
-    bends = bendsDefault2.get()
-    folds = foldsDefault2.get()
-    length = lengthInput2.get()
     try:
-        # Attempt to convert the inputs to float to ensure the user inputted numbers
-        length = float(length)
-        xAreaUnconverted = float(xAreaRaw)
-        xArea = convertUnits(xAreaUnits, xAreaUnconverted, "m²")
-
-        calculatedAmp = calculateAmp(xArea, int(bends), int(folds))
-        if (calculatedAmp == -1):
-            displayError("The inputted cross-sectional area is above the busbar sizes tested experimentally.")
-        elif (calculatedAmp == -2):
-            displayError("The inputted cross-sectional area is below the busbar sizes tested experimentally.")
-        elif (calculatedAmp == -3):
-            displayError("No busbars with the combination of bends and folds inputted were tested experimentally.")
-        elif (calculatedAmp < 0):
-            displayError("There was an unknown error when trying to calculate the ampacity.")
-        else:
-            ampacityLabel2.config(text = "Ampacity: {:.3f} A".format(calculatedAmp))
-
-    except ValueError:
-        displayError("Must input a valid number for cross-sectional area and length.")
-
-# Configure the parameters for all the rows and columns
-mainWindow.columnconfigure(0, weight=1, minsize=75)
-mainWindow.columnconfigure(1, weight=1, minsize=75)
-mainWindow.columnconfigure(2, weight=1, minsize=75)
-mainWindow.columnconfigure(3, weight=1, minsize=75)
-mainWindow.rowconfigure(0, weight=1, minsize=50)
-mainWindow.rowconfigure(1, weight=1, minsize=50)
-mainWindow.rowconfigure(2, weight=1, minsize=50)
-mainWindow.rowconfigure(3, weight=1, minsize=50)
-
-# Create the default values for the dropdowns
-xAreaDefault = tk.StringVar(mainWindow)
-xAreaDefault.set(X_AREA_UNITS[0])
-lengthDefault1 = tk.StringVar(mainWindow)
-lengthDefault1.set(LENGTH_UNITS[0])
-lengthDefault2 = tk.StringVar(mainWindow)
-lengthDefault2.set(LENGTH_UNITS[0])
-bendsDefault1 = tk.StringVar(mainWindow)
-bendsDefault1.set(BEND_OPTIONS[0])
-foldsDefault1 = tk.StringVar(mainWindow)
-foldsDefault1.set(FOLD_OPTIONS[0])
-bendsDefault2 = tk.StringVar(mainWindow)
-bendsDefault2.set(BEND_OPTIONS[0])
-foldsDefault2 = tk.StringVar(mainWindow)
-foldsDefault2.set(FOLD_OPTIONS[0])
-
-# Create the tab frames and tab controls
-outerTabs = ttk.Notebook(master=mainWindow)
-outerFrame1 = tk.Frame(master=outerTabs, padx=50, pady=25, bg='#0a154a')
-outerFrame2 = tk.Frame(master=outerTabs, padx=50, pady=25, bg='#0a154a')
-
-# Add the frames as tabs
-outerTabs.add(outerFrame1, text='Calculate cross-sectional area')
-outerTabs.add(outerFrame2, text='Calculate max ampacity')
-outerTabs.pack(expand=1, fill="both")
-
-#################################### All content below this line is for Tab 1 #################################################
-# Create the objects that will go inside the outermost frame
-logoLabel1 = tk.Label(master=outerFrame1, image=logo)
-inputOutputFrame1 = tk.Frame(master=outerFrame1, bg='#0a154a')
-
-# Create the objects that will go in the frame holding both inputs and outputs
-inputsFrame1 = tk.Frame(master=inputOutputFrame1, width=20, height=80, borderwidth=1, relief=tk.RIDGE, pady=5, padx=72, bg='white')
-outputFrame1 = tk.Frame(master=inputOutputFrame1, width=20, height=20, borderwidth=1, pady=10, bg='#0a154a')
-
-# Create the objects that will go inside the frame holding the output and
-# calculate button
-calculateButton1 = tk.Button(master=outputFrame1, width=20, height=1, text='Calculate C-S Area', pady=2, command=outputArea, bg='#f4bb01',fg='#000000', font=("Helvetica", 9))
-xAreaLabel1 = tk.Label(master=outputFrame1, text="Cross-sectional area:", font=("Helvetica", 9), bg='#0a154a', fg="white")
-
-# Create all the objects that will go inside the input controls frame
-lengthInput1 = tk.Entry(master=inputsFrame1, bg="#fcfcfc")
-lengthLabel1 = tk.Label(master=inputsFrame1, text="Length:", font=guiFont, bg='white')
-bendsLabel1 = tk.Label(master=inputsFrame1, text="Number of 90° bends:", font=guiFont, bg='white')
-bendsSelect1 = tk.OptionMenu(inputsFrame1, bendsDefault1, *BEND_OPTIONS)
-bendsSelect1.config(bg='white')
-bendsSelect1["borderwidth"]=0
-bendsSelect1["highlightthickness"]=0
-bendsSelect1["menu"].config(bg="white")
-foldsLabel1 = tk.Label(master=inputsFrame1, text="Number of 180° folds:", font=guiFont, bg='white')
-foldsSelect1 = tk.OptionMenu(inputsFrame1, foldsDefault1, *FOLD_OPTIONS)
-foldsSelect1.config(bg='white')
-foldsSelect1["borderwidth"]=0
-foldsSelect1["highlightthickness"]=0
-foldsSelect1["menu"].config(bg="white")
-lengthUnitSelect1 = tk.OptionMenu(inputsFrame1, lengthDefault1, *LENGTH_UNITS)
-lengthUnitSelect1.config(bg='white')
-lengthUnitSelect1["borderwidth"]=0
-lengthUnitSelect1["highlightthickness"]=0
-lengthUnitSelect1["menu"].config(bg="white")
-maxAmpInput1 = tk.Entry(master=inputsFrame1, bg="#fcfcfc")
-maxAmpLabel1 = tk.Label(master=inputsFrame1, text="Max ampacity:", font=guiFont, bg='white')
-
-# Position the objects that will go inside the outermost frame (the window)
-logoLabel1.grid(row=0, column=0, pady=5)
-inputOutputFrame1.grid(row=1, column=0, sticky="w")
-
-# Position the objects that will go in the frame holding both inputs and outputs
-inputsFrame1.grid(row=0, column=0, sticky="w")
-outputFrame1.grid(row=1, column=0, sticky="e")
-
-# Position the objects that will go in the frame holding the output and button
-calculateButton1.grid(row=0, column=0, sticky="w")
-xAreaLabel1.grid(row=0, column=1, sticky="e", padx=60)
-
-# Position all the objects that will go inside the input controls frame
-lengthLabel1.grid(row=1, column=0, sticky="e")
-lengthInput1.grid(row=1, column=1, pady=3, sticky="ew")
-lengthUnitSelect1.grid(row=1, column=2, pady=3, sticky="w")
-bendsLabel1.grid(row=2, column=0, sticky="e")
-bendsSelect1.grid(row=2, column=1, pady=3, sticky="ew")
-foldsLabel1.grid(row=3, column=0, sticky="e")
-foldsSelect1.grid(row=3, column=1, pady=3, sticky="ew")
-maxAmpLabel1.grid(row=4, column=0, sticky="e")
-maxAmpInput1.grid(row=4, column=1, pady=3, sticky="ew")
-
-#################################### All content below this line is for Tab 2 #################################################
-# Create the objects that will go inside the outermost frame
-logoLabel2 = tk.Label(master=outerFrame2, image=logo)
-inputOutputFrame2 = tk.Frame(master=outerFrame2, bg='#0a154a')
-
-# Create the objects that will go in the frame holding both inputs and outputs
-inputsFrame2 = tk.Frame(master=inputOutputFrame2, width=20, height=80, borderwidth=1, relief=tk.RIDGE, pady=5, padx=72, bg="white")
-outputFrame2 = tk.Frame(master=inputOutputFrame2, width=20, height=20, borderwidth=1, pady=10, bg='#0a154a')
-
-# Create the objects that will go inside the frame holding the output and
-# calculate button
-calculateButton2 = tk.Button(master=outputFrame2, width=20, height=1, text='Calculate ampacity', pady=2, command=outputAmp, bg='#f4bb01',fg='#000000', font=guiFont)
-ampacityLabel2 = tk.Label(master=outputFrame2, text="Ampacity:", font=guiFont, bg='#0a154a', fg="white")
-
-# Create all the objects that will go inside the input controls frame
-xAreaInput2 = tk.Entry(master=inputsFrame2, bg="#fcfcfc")
-xAreaLabel2 = tk.Label(master=inputsFrame2, text="Cross-sec Area:", font=guiFont, bg="white")
-lengthInput2 = tk.Entry(master=inputsFrame2, bg="#fcfcfc")
-lengthLabel2 = tk.Label(master=inputsFrame2, text="Length:", font=guiFont, bg="white")
-bendsSelect2 = tk.OptionMenu(inputsFrame2, bendsDefault2, *BEND_OPTIONS)
-bendsSelect2.config(bg='white')
-bendsSelect2["borderwidth"]=0
-bendsSelect2["highlightthickness"]=0
-bendsSelect2["menu"].config(bg="white")
-bendsLabel2 = tk.Label(master=inputsFrame2, text="Number of 90° bends:", font=guiFont, bg="white")
-foldsLabel2 = tk.Label(master=inputsFrame2, text="Number of 180° folds:", font=guiFont, bg="white")
-xAreaUnitSelect2 = tk.OptionMenu(inputsFrame2, xAreaDefault, *X_AREA_UNITS)
-foldsSelect2 = tk.OptionMenu(inputsFrame2, foldsDefault2, *FOLD_OPTIONS)
-foldsSelect2.config(bg='white')
-foldsSelect2["borderwidth"]=0
-foldsSelect2["highlightthickness"]=0
-foldsSelect2["menu"].config(bg="white")
-xAreaUnitSelect2["highlightthickness"]=0
-xAreaUnitSelect2["borderwidth"]=0
-xAreaUnitSelect2["menu"].config(bg="white")
-xAreaUnitSelect2.config(bg='white')
-lengthUnitSelect2 = tk.OptionMenu(inputsFrame2, lengthDefault2, *LENGTH_UNITS)
-lengthUnitSelect2.config(bg='white')
-lengthUnitSelect2["borderwidth"]=0
-lengthUnitSelect2["highlightthickness"]=0
-lengthUnitSelect2["menu"].config(bg="white")
-
-# Position the objects that will go inside the outermost frame (the window)
-logoLabel2.grid(row=0, column=0, pady=5)
-inputOutputFrame2.grid(row=1, column=0, sticky="w")
-
-# Position the objects that will go in the frame holding both inputs and outputs
-inputsFrame2.grid(row=0, column=0, sticky="w")
-outputFrame2.grid(row=1, column=0, sticky="e")
-
-# Position the objects that will go in the frame holding the output and button
-calculateButton2.grid(row=0, column=0, sticky="w")
-ampacityLabel2.grid(row=0, column=1, sticky="e", padx=60)
-
-# Position all the objects that will go inside the input controls frame
-xAreaLabel2.grid(row=1, column=0, sticky="e")
-xAreaInput2.grid(row=1, column=1, pady=3, sticky="ew")
-xAreaUnitSelect2.grid(row=1, column=2, pady=3, sticky="w")
-lengthLabel2.grid(row=2, column=0, sticky="e")
-lengthInput2.grid(row=2, column=1, pady=3, sticky="ew")
-lengthUnitSelect2.grid(row=2, column=2, pady=3, sticky="w")
-bendsLabel2.grid(row=3, column=0, sticky="e")
-bendsSelect2.grid(row=3, column=1, pady=3, sticky="ew")
-foldsLabel2.grid(row=4, column=0, sticky="e")
-foldsSelect2.grid(row=4, column=1, pady=3, sticky="ew")
-
-# Run the GUI
-mainWindow.mainloop()
+        result = ampRequest()()
+    except SizingError as e:
+        displayError(e.message)
+    else:
+        showAmp(result)
+
+# The live versions of areaRequest() and ampRequest(). Nothing is worked out
+# until a value has been typed in, and problems are shown in the result label
+# instead of opening an error window on every keystroke.
+def liveAreaRequest ():
+    return areaRequest() if maxAmpInput1.get().strip() else None
+
+def liveAreaProblem (message):
+    xAreaLabel1.config(text = message or "Cross-sectional area:")
+
+def liveAmpRequest ():
+    return ampRequest() if xAreaInput2.get().strip() else None
+
+def liveAmpProblem (message):
+    ampacityLabel2.config(text = message or "Ampacity:")
+
+# Sizes one bar the way the first tab does, with a length, so the first table
+# and the length correction are both loaded, and then closes the window. Used
+# when the start of the program is being timed.
+def finishStartupCheck ():
+    try:
+        sizeArea("100", "100", 0, 0)
+    except SizingError:
+        pass
+    mainWindow.destroy()
+
+# Builds the main window and all of its widgets and then runs the GUI. The
+# widgets that outputArea, outputAmp and displayError use are kept as globals.
+# Every input is watched so the live updates know when something changes.
+def main():
+    global mainWindow, errorIconFile
+    global xAreaLabel1, maxAmpInput1, lengthInput1, bendsDefault1, foldsDefault1, lengthDefault1, endTemperatureInput1
+    global ampacityLabel2, xAreaInput2, xAreaDefault, lengthInput2, bendsDefault2, foldsDefault2, lengthDefault2, endTemperatureInput2
+
+    import tkinter as tk
+    import tkinter.font as tkFont
+    from tkinter import ttk
+
+    # Create the main window for the program.
+    mainWindow= tk.Tk()
+    mainWindow.title("Hyster-Yale software")
+
+    # Create a stylesheet that can be used to make the tabs look nice.
+    style_ref = ttk.Style()
+    guiFont = tkFont.Font(family="Helvetica", size=10)
+    style_ref.theme_create("guiTheme", parent="alt", settings={
+            "TNotebook": {"configure": {"tabmargins": [2, 5, 2, 0], "background": "#0a154a" } },
+            "TNotebook.Tab": {
+                "configure": {"padding": [5, 1], "background": "#4355ab", "foreground": "white" },
+                "map":       {"background": [("selected", "#0a154a")],
+                              "expand": [("selected", [1, 1, 1, 0])] } } } )
+
+    style_ref.theme_use("guiTheme")
+
+    # Load in all the images here so that Python's garbage collection doesn't remove
+    # them if we put them inside the other windows.
+    errorIconFile = tk.PhotoImage(file=resourcePath("error_icon.png"), width=50, height=50)
+    logo = tk.PhotoImage(file=resourcePath("logo.png"), width=400, height=98)
+    faviconFile = tk.PhotoImage(file=resourcePath("ico.png"))
+
+    # Set the icon for the program.
+    mainWindow.iconphoto(True, faviconFile)
+
+    # Configure the parameters for all the rows and columns
+    mainWindow.columnconfigure(0, weight=1, minsize=75)
+    mainWindow.columnconfigure(1, weight=1, minsize=75)
+    mainWindow.columnconfigure(2, weight=1, minsize=75)
+    mainWindow.columnconfigure(3, weight=1, minsize=75)
+    mainWindow.rowconfigure(0, weight=1, minsize=50)
+    mainWindow.rowconfigure(1, weight=1, minsize=50)
+    mainWindow.rowconfigure(2, weight=1, minsize=50)
+    mainWindow.rowconfigure(3, weight=1, minsize=50)
+
+    # Create the default values for the dropdowns
+    xAreaDefault = tk.StringVar(mainWindow)
+    xAreaDefault.set(X_AREA_UNITS[0])
+    lengthDefault1 = tk.StringVar(mainWindow)
+    lengthDefault1.set(LENGTH_UNITS[0])
+    lengthDefault2 = tk.StringVar(mainWindow)
+    lengthDefault2.set(LENGTH_UNITS[0])
+    bendsDefault1 = tk.StringVar(mainWindow)
+    bendsDefault1.set(BEND_OPTIONS[0])
+    foldsDefault1 = tk.StringVar(mainWindow)
+    foldsDefault1.set(FOLD_OPTIONS[0])
+    bendsDefault2 = tk.StringVar(mainWindow)
+    bendsDefault2.set(BEND_OPTIONS[0])
+    foldsDefault2 = tk.StringVar(mainWindow)
+    foldsDefault2.set(FOLD_OPTIONS[0])
+
+    # Create the live updaters and the variables behind their check boxes
+    liveArea = LiveCalculator(mainWindow, liveAreaRequest, showArea, liveAreaProblem)
+    liveAmp = LiveCalculator(mainWindow, liveAmpRequest, showAmp, liveAmpProblem)
+    liveDefault1 = tk.BooleanVar(mainWindow, value=False)
+    liveDefault1.trace_add("write", lambda *args: liveArea.setEnabled(liveDefault1.get()))
+    liveDefault2 = tk.BooleanVar(mainWindow, value=False)
+    liveDefault2.trace_add("write", lambda *args: liveAmp.setEnabled(liveDefault2.get()))
+    for variable in (lengthDefault1, bendsDefault1, foldsDefault1):
+        variable.trace_add("write", liveArea.changed)
+    for variable in (xAreaDefault, lengthDefault2, bendsDefault2, foldsDefault2):
+        variable.trace_add("write", liveAmp.changed)
+
+    # Create the tab frames and tab controls
+    outerTabs = ttk.Notebook(master=mainWindow)
+    outerFrame1 = tk.Frame(master=outerTabs, padx=50, pady=25, bg='#0a154a')
+    outerFrame2 = tk.Frame(master=outerTabs, padx=50, pady=25, bg='#0a154a')
+
+    # Add the frames as tabs
+    outerTabs.add(outerFrame1, text='Calculate cross-sectional area')
+    outerTabs.add(outerFrame2, text='Calculate max ampacity')
+    outerTabs.pack(expand=1, fill="both")
+
+    #################################### All content below this line is for Tab 1 #################################################
+    # Create the objects that will go inside the outermost frame
+    logoLabel1 = tk.Label(master=outerFrame1, image=logo)
+    inputOutputFrame1 = tk.Frame(master=outerFrame1, bg='#0a154a')
+
+    # Create the objects that will go in the frame holding both inputs and outputs
+    inputsFrame1 = tk.Frame(master=inputOutputFrame1, width=20, height=80, borderwidth=1, relief=tk.RIDGE, pady=5, padx=72, bg='white')
+    outputFrame1 = tk.Frame(master=inputOutputFrame1, width=20, height=20, borderwidth=1, pady=10, bg='#0a154a')
+
+    # Create the objects that will go inside the frame holding the output and
+    # calculate button
+    calculateButton1 = tk.Button(master=outputFrame1, width=20, height=1, text='Calculate C-S Area', pady=2, command=outputArea, bg='#f4bb01',fg='#000000', font=("Helvetica", 9))
+    xAreaLabel1 = tk.Label(master=outputFrame1, text="Cross-sectional area:", font=("Helvetica", 9), bg='#0a154a', fg="white")
+    smallestButton1 = tk.Button(master=outputFrame1, width=20, height=1, text='Find smallest geometry', pady=2, command=outputSmallestGeometry, bg='#f4bb01',fg='#000000', font=("Helvetica", 9))
+    liveCheck1 = tk.Checkbutton(master=outputFrame1, text="Live update", variable=liveDefault1, font=("Helvetica", 9), bg='#0a154a', fg="white", selectcolor='#0a154a', activebackground='#0a154a', activeforeground="white")
+
+    # Create all the objects that will go inside the input controls frame
+    lengthText1 = tk.StringVar(mainWindow)
+    lengthText1.trace_add("write", liveArea.changed)
+    lengthInput1 = tk.Entry(master=inputsFrame1, bg="#fcfcfc", textvariable=lengthText1)
+    lengthLabel1 = tk.Label(master=inputsFrame1, text="Length:", font=guiFont, bg='white')
+    endTemperatureText1 = tk.StringVar(mainWindow, value=str(END_TEMPERATURE))
+    endTemperatureText1.trace_add("write", liveArea.changed)
+    endTemperatureInput1 = tk.Entry(master=inputsFrame1, bg="#fcfcfc", textvariable=endTemperatureText1)
+    endTemperatureLabel1 = tk.Label(master=inputsFrame1, text="End temperature (°C):", font=guiFont, bg='white')
+    bendsLabel1 = tk.Label(master=inputsFrame1, text="Number of 90° bends:", font=guiFont, bg='white')
+    bendsSelect1 = tk.OptionMenu(inputsFrame1, bendsDefault1, *BEND_OPTIONS)
+    bendsSelect1.config(bg='white')
+    bendsSelect1["borderwidth"]=0
+    bendsSelect1["highlightthickness"]=0
+    bendsSelect1["menu"].config(bg="white")
+    foldsLabel1 = tk.Label(master=inputsFrame1, text="Number of 180° folds:", font=guiFont, bg='white')
+    foldsSelect1 = tk.OptionMenu(inputsFrame1, foldsDefault1, *FOLD_OPTIONS)
+    foldsSelect1.config(bg='white')
+    foldsSelect1["borderwidth"]=0
+    foldsSelect1["highlightthickness"]=0
+    foldsSelect1["menu"].config(bg="white")
+    lengthUnitSelect1 = tk.OptionMenu(inputsFrame1, lengthDefault1, *LENGTH_UNITS)
+    lengthUnitSelect1.config(bg='white')
+    lengthUnitSelect1["borderwidth"]=0
+    lengthUnitSelect1["highlightthickness"]=0
+    lengthUnitSelect1["menu"].config(bg="white")
+    maxAmpText1 = tk.StringVar(mainWindow)
+    maxAmpText1.trace_add("write", liveArea.changed)
+    maxAmpInput1 = tk.Entry(master=inputsFrame1, bg="#fcfcfc", textvariable=maxAmpText1)
+    maxAmpLabel1 = tk.Label(master=inputsFrame1, text="Max ampacity:", font=guiFont, bg='white')
+
+    # Position the objects that will go inside the outermost frame (the window)
+    logoLabel1.grid(row=0, column=0, pady=5)
+    inputOutputFrame1.grid(row=1, column=0, sticky="w")
+
+    # Position the objects that will go in the frame holding both inputs and outputs
+    inputsFrame1.grid(row=0, column=0, sticky="w")
+    outputFrame1.grid(row=1, column=0, sticky="e")
+
+    # Position the objects that will go in the frame holding the output and button
+    calculateButton1.grid(row=0, column=0, sticky="w")
+    smallestButton1.grid(row=1, column=0, sticky="w", pady=(5,0))
+    liveCheck1.grid(row=1, column=1, sticky="e", padx=60, pady=(5,0))
+    xAreaLabel1.grid(row=0, column=1, sticky="e", padx=60)
+
+    # Position all the objects that will go inside the input controls frame
+    lengthLabel1.grid(row=1, column=0, sticky="e")
+    lengthInput1.grid(row=1, column=1, pady=3, sticky="ew")
+    lengthUnitSelect1.grid(row=1, column=2, pady=3, sticky="w")
+    endTemperatureLabel1.grid(row=2, column=0, sticky="e")
+    endTemperatureInput1.grid(row=2, column=1, pady=3, sticky="ew")
+    bendsLabel1.grid(row=3, column=0, sticky="e")
+    bendsSelect1.grid(row=3, column=1, pady=3, sticky="ew")
+    foldsLabel1.grid(row=4, column=0, sticky="e")
+    foldsSelect1.grid(row=4, column=1, pady=3, sticky="ew")
+    maxAmpLabel1.grid(row=5, column=0, sticky="e")
+    maxAmpInput1.grid(row=5, column=1, pady=3, sticky="ew")
+
+    #################################### All content below this line is for Tab 2 #################################################
+    # Create the objects that will go inside the outermost frame
+    logoLabel2 = tk.Label(master=outerFrame2, image=logo)
+    inputOutputFrame2 = tk.Frame(master=outerFrame2, bg='#0a154a')
+
+    # Create the objects that will go in the frame holding both inputs and outputs
+    inputsFrame2 = tk.Frame(master=inputOutputFrame2, width=20, height=80, borderwidth=1, relief=tk.RIDGE, pady=5, padx=72, bg="white")
+    outputFrame2 = tk.Frame(master=inputOutputFrame2, width=20, height=20, borderwidth=1, pady=10, bg='#0a154a')
+
+    # Create the objects that will go inside the frame holding the output and
+    # calculate button
+    calculateButton2 = tk.Button(master=outputFrame2, width=20, height=1, text='Calculate ampacity', pady=2, command=outputAmp, bg='#f4bb01',fg='#000000', font=guiFont)
+    ampacityLabel2 = tk.Label(master=outputFrame2, text="Ampacity:", font=guiFont, bg='#0a154a', fg="white")
+    liveCheck2 = tk.Checkbutton(master=outputFrame2, text="Live update", variable=liveDefault2, font=guiFont, bg='#0a154a', fg="white", selectcolor='#0a154a', activebackground='#0a154a', activeforeground="white")
+
+    # Create all the objects that will go inside the input controls frame
+    xAreaText2 = tk.StringVar(mainWindow)
+    xAreaText2.trace_add("write", liveAmp.changed)
+    xAreaInput2 = tk.Entry(master=inputsFrame2, bg="#fcfcfc", textvariable=xAreaText2)
+    xAreaLabel2 = tk.Label(master=inputsFrame2, text="Cross-sec Area:", font=guiFont, bg="white")
+    lengthText2 = tk.StringVar(mainWindow)
+    lengthText2.trace_add("write", liveAmp.changed)
+    lengthInput2 = tk.Entry(master=inputsFrame2, bg="#fcfcfc", textvariable=lengthText2)
+    lengthLabel2 = tk.Label(master=inputsFrame2, text="Length:", font=guiFont, bg="white")
+    endTemperatureText2 = tk.StringVar(mainWindow, value=str(END_TEMPERATURE))
+    endTemperatureText2.trace_add("write", liveAmp.changed)
+    endTemperatureInput2 = tk.Entry(master=inputsFrame2, bg="#fcfcfc", textvariable=endTemperatureText2)
+    endTemperatureLabel2 = tk.Label(master=inputsFrame2, text="End temperature (°C):", font=guiFont, bg="white")
+    bendsSelect2 = tk.OptionMenu(inputsFrame2, bendsDefault2, *BEND_OPTIONS)
+    bendsSelect2.config(bg='white')
+    bendsSelect2["borderwidth"]=0
+    bendsSelect2["highlightthickness"]=0
+    bendsSelect2["menu"].config(bg="white")
+    bendsLabel2 = tk.Label(master=inputsFrame2, text="Number of 90° bends:", font=guiFont, bg="white")
+    foldsLabel2 = tk.Label(master=inputsFrame2, text="Number of 180° folds:", font=guiFont, bg="white")
+    xAreaUnitSelect2 = tk.OptionMenu(inputsFrame2, xAreaDefault, *X_AREA_UNITS)
+    foldsSelect2 = tk.OptionMenu(inputsFrame2, foldsDefault2, *FOLD_OPTIONS)
+    foldsSelect2.config(bg='white')
+    foldsSelect2["borderwidth"]=0
+    foldsSelect2["highlightthickness"]=0
+    foldsSelect2["menu"].config(bg="white")
+    xAreaUnitSelect2["highlightthickness"]=0
+    xAreaUnitSelect2["borderwidth"]=0
+    xAreaUnitSelect2["menu"].config(bg="white")
+    xAreaUnitSelect2.config(bg='white')
+    lengthUnitSelect2 = tk.OptionMenu(inputsFrame2, lengthDefault2, *LENGTH_UNITS)
+    lengthUnitSelect2.config(bg='white')
+    lengthUnitSelect2["borderwidth"]=0
+    lengthUnitSelect2["highlightthickness"]=0
+    lengthUnitSelect2["menu"].config(bg="white")
+
+    # Position the objects that will go inside the outermost frame (the window)
+    logoLabel2.grid(row=0, column=0, pady=5)
+    inputOutputFrame2.grid(row=1, column=0, sticky="w")
+
+    # Position the objects that will go in the frame holding both inputs and outputs
+    inputsFrame2.grid(row=0, column=0, sticky="w")
+    outputFrame2.grid(row=1, column=0, sticky="e")
+
+    # Position the objects that will go in the frame holding the output and button
+    calculateButton2.grid(row=0, column=0, sticky="w")
+    ampacityLabel2.grid(row=0, column=1, sticky="e", padx=60)
+    liveCheck2.grid(row=1, column=1, sticky="e", padx=60, pady=(5,0))
+
+    # Position all the objects that will go inside the input controls frame
+    xAreaLabel2.grid(row=1, column=0, sticky="e")
+    xAreaInput2.grid(row=1, column=1, pady=3, sticky="ew")
+    xAreaUnitSelect2.grid(row=1, column=2, pady=3, sticky="w")
+    lengthLabel2.grid(row=2, column=0, sticky="e")
+    lengthInput2.grid(row=2, column=1, pady=3, sticky="ew")
+    lengthUnitSelect2.grid(row=2, column=2, pady=3, sticky="w")
+    endTemperatureLabel2.grid(row=3, column=0, sticky="e")
+    endTemperatureInput2.grid(row=3, column=1, pady=3, sticky="ew")
+    bendsLabel2.grid(row=4, column=0, sticky="e")
+    bendsSelect2.grid(row=4, column=1, pady=3, sticky="ew")
+    foldsLabel2.grid(row=5, column=0, sticky="e")
+    foldsSelect2.grid(row=5, column=1, pady=3, sticky="ew")
+
+    # When the start of the program is being timed (see measureColdStart in
+    # hysterYaleSizing.py), close as soon as the window is up.
+    if (os.environ.get(STARTUP_CHECK_VARIABLE)):
+        mainWindow.after_idle(finishStartupCheck)
+
+    # Run the GUI
+    mainWindow.mainloop()
+
+if __name__ == "__main__":
+    main()
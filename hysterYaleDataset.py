@@ -0,0 +1,242 @@
+# A script for packing all of the busbar-data-*folds-*bends.csv files into one
+# binary file that can be memory-mapped, so the experimental data does not have
+# to be parsed from text every time the program starts. The CSV files are still
+# the files that should be edited. The compiled file records the modification
+# time and size of every CSV it was built from, and is rebuilt automatically
+# the next time it is loaded if any CSV has changed, been added or been removed.
+#
+# Layout of the compiled file (all numbers little-endian):
+# # Header: 4-byte magic "HYBD", uint16 version, uint16 unused, uint32 number
+# # # of geometries, 4 bytes of padding.
+# # Index: one entry per geometry of int32 folds, int32 bends, int64 number of
+# # # rows, int64 offset of the data, int64 CSV modification time (ns) and
+# # # int64 CSV size.
+# # Data: for each geometry, a float64 column of cross-sectional areas (m²)
+# # # sorted in ascending order followed by a float64 column of the matching
+# # # 90-degree ampacities.
+#
+# The dataset is kept in the program's data folder (see getDataDirectory() in
+# hysterYaleEquations.py) next to the CSV files, whatever the current working
+# directory is. A packaged executable reads its bundled copy with one read the
+# first time a table is needed (see readBundledTables()).
+#
+# Running this script directly compiles the dataset in the data folder, or in
+# the folder given on the command line.
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from hysterYaleEquations import GeometryTable
+from hysterYaleEquations import clearGeometryTables
+from hysterYaleEquations import geometryCsvPath
+from hysterYaleEquations import getDataDirectory
+from hysterYaleEquations import readGeometryCsv
+
+DATASET_FILE = "busbar-data.bin" #The name of the compiled dataset.
+DATASET_MAGIC = b"HYBD"
+DATASET_VERSION = 1
+HEADER_FORMAT = struct.Struct("<4sHHI4x")
+INDEX_FORMAT = struct.Struct("<iiqqqq")
+
+# The data for one geometry in the compiled dataset. 'areas' and 'amps' are
+# float64 memoryviews straight into the memory-mapped file, and 'signature' is
+# the (modification time, size) of the CSV the data was compiled from.
+class CompiledTable:
+    def __init__(self, areas, amps, signature):
+        self.areas = areas
+        self.amps = amps
+        self.signature = signature
+
+# A compiled dataset that has been memory-mapped. 'tables' is a dictionary of
+# the form {(folds, bends): CompiledTable, ...}. If 'buffer' is given the
+# dataset is read from it (for example a copy in shared memory) instead of
+# from the file at 'path'.
+class CompiledDataset:
+    def __init__(self, path, buffer=None):
+        self.path = path
+        if (buffer is None):
+            with open(path, mode='rb') as datasetFile:
+                buffer = mmap.mmap(datasetFile.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = buffer
+        self.tables = {}
+
+        magic, version, _, geometryCount = HEADER_FORMAT.unpack_from(self.buffer, 0)
+        if (magic != DATASET_MAGIC or version != DATASET_VERSION):
+            raise ValueError("{0} is not a compiled busbar dataset.".format(path))
+        view = memoryview(self.buffer)
+        for i in range(geometryCount):
+            folds, bends, rowCount, offset, mtime, size = INDEX_FORMAT.unpack_from(
+                self.buffer, HEADER_FORMAT.size + i*INDEX_FORMAT.size)
+            columns = view[offset:offset + 16*rowCount].cast('d')
+            areas = columns[:rowCount]
+            amps = columns[rowCount:]
+            if (sys.byteorder != "little"):
+                # The file is little-endian, so copy and swap on other machines.
+                areas = array('d', areas)
+                areas.byteswap()
+                amps = array('d', amps)
+                amps.byteswap()
+            self.tables[(folds, bends)] = CompiledTable(areas, amps, (mtime, size))
+
+    # Returns a GeometryTable for every geometry, in a dictionary of the form
+    # {(folds, bends): GeometryTable, ...}. The tables use the dataset's
+    # memory rather than copies of it.
+    def geometryTables(self):
+        return {geometry: GeometryTable(columns.areas, columns.amps, columns.signature)
+                for geometry, columns in self.tables.items()}
+
+    # Unmaps the file so it can be replaced or deleted, which Windows does not
+    # allow while it is mapped. If a table built from the dataset is still in
+    # use somewhere, the file stays mapped until that table is gone.
+    def close(self):
+        self.tables = {}
+        if (isinstance(self.buffer, mmap.mmap)):
+            try:
+                self.buffer.close()
+            except BufferError:
+                pass
+
+    # Returns True if the CSV files in 'directory' no longer match the ones the
+    # dataset was compiled from.
+    def isStale(self, directory=None):
+        csvSignatures = findGeometryCsvs(directory)
+        if (set(csvSignatures) != set(self.tables)):
+            return True
+        for geometry, (csvPath, signature) in csvSignatures.items():
+            if (self.tables[geometry].signature != signature):
+                return True
+        return False
+
+# Returns the (folds, bends) of a geometry CSV file name, or None if the name is
+# not of the form busbar-data-{folds}folds-{bends}bends.csv.
+def parseGeometryCsvName(fileName):
+    if (not fileName.startswith("busbar-data-") or not fileName.endswith("bends.csv")):
+        return None
+    try:
+        foldsText, bendsText = fileName[len("busbar-data-"):-len("bends.csv")].split("folds-")
+        geometry = (int(foldsText), int(bendsText))
+    except ValueError:
+        return None
+    if (geometryCsvPath(*geometry) != fileName):
+        return None
+    return geometry
+
+# Finds every geometry CSV in 'directory' (the data folder by default).
+# Returns a dictionary of the form
+# {(folds, bends): (path, (modification time, size)), ...}.
+def findGeometryCsvs(directory=None):
+    if (directory is None):
+        directory = getDataDirectory()
+    csvSignatures = {}
+    for fileName in os.listdir(directory):
+        geometry = parseGeometryCsvName(fileName)
+        if (geometry is None):
+            continue
+        csvPath = os.path.join(directory, fileName)
+        fileStats = os.stat(csvPath)
+        csvSignatures[geometry] = (csvPath, (fileStats.st_mtime_ns, fileStats.st_size))
+    return csvSignatures
+
+# Packs every geometry CSV in 'directory' into the compiled dataset file at
+# 'outputPath' (DATASET_FILE in 'directory' by default). The file is written
+# under a temporary name first and then moved into place, so a half-written
+# dataset is never loaded. If the dataset being replaced is the one that is
+# loaded, it is closed first (along with the tables built from it). Returns
+# the path of the compiled dataset.
+def compileDataset(directory=None, outputPath=None):
+    if (directory is None):
+        directory = getDataDirectory()
+    if (outputPath is None):
+        outputPath = os.path.join(directory, DATASET_FILE)
+    csvSignatures = findGeometryCsvs(directory)
+
+    geometries = sorted(csvSignatures)
+    tables = [GeometryTable.fromRows(readGeometryCsv(csvSignatures[geometry][0]))
+              for geometry in geometries]
+    offset = HEADER_FORMAT.size + INDEX_FORMAT.size*len(geometries)
+    header = [HEADER_FORMAT.pack(DATASET_MAGIC, DATASET_VERSION, 0, len(geometries))]
+    columns = []
+    for geometry, table in zip(geometries, tables):
+        mtime, size = csvSignatures[geometry][1]
+        header.append(INDEX_FORMAT.pack(geometry[0], geometry[1], len(table), offset, mtime, size))
+        column = array('d', table.areas) + array('d', table.amps)
+        if (sys.byteorder != "little"):
+            column.byteswap()
+        columns.append(column.tobytes())
+        offset += 16*len(table)
+
+    if (_dataset is not None and os.path.abspath(_dataset.path) == os.path.abspath(outputPath)):
+        clearGeometryTables()
+        closeDataset()
+    temporaryPath = outputPath + ".tmp"
+    try:
+        with open(temporaryPath, mode='wb') as datasetFile:
+            datasetFile.write(b"".join(header))
+            for column in columns:
+                datasetFile.write(column)
+        os.replace(temporaryPath, outputPath)
+    except OSError:
+        # Don't leave the half-written or unused file behind.
+        if (os.path.exists(temporaryPath)):
+            os.remove(temporaryPath)
+        raise
+    return outputPath
+
+# The compiled dataset that has been loaded so far, if any.
+_dataset = None
+
+# Closes the compiled dataset that has been loaded, if any (see
+# CompiledDataset.close()). Tables built from it must not be used afterwards.
+def closeDataset():
+    global _dataset
+    dataset = _dataset
+    _dataset = None
+    if (dataset is not None):
+        dataset.close()
+
+# Returns the CompiledDataset for 'directory', compiling it first if it is
+# missing or out of date with the CSV files. Raises OSError if the dataset
+# cannot be written or read.
+def getDataset(directory=None):
+    global _dataset
+    if (directory is None):
+        directory = getDataDirectory()
+    if (_dataset is not None and os.path.dirname(_dataset.path) == os.path.abspath(directory)
+            and not _dataset.isStale(directory)):
+        return _dataset
+
+    datasetPath = os.path.abspath(os.path.join(directory, DATASET_FILE))
+    dataset = None
+    try:
+        dataset = CompiledDataset(datasetPath)
+    except (FileNotFoundError, ValueError, struct.error):
+        pass
+    if (dataset is None or dataset.isStale(directory)):
+        if (dataset is not None):
+            dataset.close()
+        compileDataset(directory, datasetPath)
+        dataset = CompiledDataset(datasetPath)
+    _dataset = dataset
+    return dataset
+
+# Reads the compiled dataset in 'directory' (the data folder by default) with
+# a single read and returns its geometryTables(). The CSV files are not looked
+# at, so this is only for data that cannot change, like the copy bundled into
+# a packaged executable. Raises OSError or ValueError if it cannot be read.
+def readBundledTables(directory=None):
+    if (directory is None):
+        directory = getDataDirectory()
+    datasetPath = os.path.join(directory, DATASET_FILE)
+    with open(datasetPath, mode='rb') as datasetFile:
+        contents = datasetFile.read()
+    try:
+        return CompiledDataset(datasetPath, contents).geometryTables()
+    except struct.error:
+        raise ValueError("{0} is not a compiled busbar dataset.".format(datasetPath))
+
+if __name__ == "__main__":
+    path = compileDataset(sys.argv[1] if len(sys.argv) > 1 else None)
+    print("Compiled {0} geometries into {1}".format(len(CompiledDataset(path).tables), path))
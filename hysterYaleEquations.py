@@ -15,233 +15,989 @@
 # # Any higher negative number (such as -99) indicates a general error occured
 # # # that was unaccounted for.
 
-import csv
+import bisect
+import itertools
+import os
+import sys
+from array import array
 from collections import OrderedDict
 
+# Geometry tables that have already been read from disk, keyed by the name of
+# the CSV file they were read from.
+_geometryTables = {}
+
+# The Instrumentation object (see hysterYaleInstrumentation.py) that records
+# how long each lookup takes and what it returned, or None when nothing is
+# being recorded. The lookups only check this once per call when it is None.
+_instrumentation = None
+
+# Starts sending timings and results to 'instrumentation', or stops recording
+# if it is None.
+def setInstrumentation(instrumentation):
+    global _instrumentation
+    _instrumentation = instrumentation
+
+# Returns the Instrumentation object that is recording, or None.
+def getInstrumentation():
+    return _instrumentation
+
+# The ResultCache that calculateArea and calculateAmp keep their answers in, or
+# None if answers are not being cached (see configureResultCache()).
+_resultCache = None
+
+# The number of points each curve is resampled onto when lookups use uniform
+# lookup tables, or None when they use the exact tables (see
+# configureLookupTables()).
+_lookupResolution = None
+STEP_TOLERANCE = 1e-9 #The smallest jump in a resampled curve, relative to its largest value, that is treated as a step.
+
+# The geometry tables given to useGeometryTables(), keyed by (folds, bends), or
+# None when the tables are read from the CSV files.
+_fixedTables = None
+
+# The folder the program's files (the geometry tables and the images) are in,
+# so they are found whatever the current working directory is. When the
+# program has been packaged with PyInstaller this is the folder the files were
+# bundled into, and otherwise it is the folder this script is in.
+RESOURCE_DIRECTORY = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+PACKAGED = bool(getattr(sys, "frozen", False)) #True when running as a packaged executable.
+
+# The folder the geometry tables are read from. It is RESOURCE_DIRECTORY unless
+# the BUSBAR_DATA_DIRECTORY environment variable or setDataDirectory() says
+# otherwise.
+_dataDirectory = os.environ.get("BUSBAR_DATA_DIRECTORY") or RESOURCE_DIRECTORY
+
+# True until the first lookup in a packaged executable, which reads every table
+# out of the bundled dataset at once (see _loadBundledTables()).
+_useBundledTables = PACKAGED and not os.environ.get("BUSBAR_DATA_DIRECTORY")
+
+# Returns the full path of one of the program's files, such as an image.
+def resourcePath(fileName):
+    return os.path.join(RESOURCE_DIRECTORY, fileName)
+
+# Returns the folder the geometry tables are read from.
+def getDataDirectory():
+    return _dataDirectory
+
+# Reads the geometry tables from 'directory' from now on. Every table read so
+# far, and any tables given to useGeometryTables(), are forgotten, and the
+# compiled dataset that was loaded is closed so the old folder can be deleted.
+def setDataDirectory(directory):
+    global _dataDirectory, _useBundledTables
+    # Imported here because hysterYaleDataset.py imports this script.
+    import hysterYaleDataset
+
+    _dataDirectory = os.path.abspath(directory)
+    _useBundledTables = False
+    useGeometryTables(None)
+    clearGeometryTables()
+    hysterYaleDataset.closeDataset()
+
+# Returns the name of the CSV file that holds the experimental data for busbars
+# with the given number of folds and bends.
+def geometryCsvPath(folds, bends):
+    return "busbar-data-{0}folds-{1}bends.csv".format(folds, bends)
+
+# Reads the (cross-sectional area, ampacity) pairs out of one of the CSV files,
+# skipping the header row.
+def readGeometryCsv(csvPath):
+    # csv is imported here so that importing this script stays fast.
+    import csv
+
+    rows = []
+    with open(csvPath, mode='r') as csvFile:
+        csvReader = csv.reader(csvFile, delimiter=',')
+        rowCount = 0
+        for row in csvReader:
+            if rowCount > 0:
+                rows.append((float(row[0]), float(row[1])))
+            rowCount += 1
+    return rows
+
+# An index over the straight-line segments joining neighbouring tested bars on
+# a geometry's curve of ampacity against cross-sectional area. The curves are not
+# monotonic (the ampacity can rise and then fall as the bar gets bigger), so
+# one ampacity can be reached by several different cross-sectional areas. The
+# index finds every segment that crosses a given ampacity in O(log n + k) time,
+# where k is the number of crossings.
+#
+# The segments are stored in a centered interval tree, which is only built the
+# first time every crossing is asked for. Each node holds a center ampacity,
+# the segments whose range of ampacities contains the center (sorted once by
+# their lowest ampacity and once by their highest), and the nodes for the
+# segments entirely below and entirely above the center.
+#
+# The smallest crossing, which is all calculateArea needs, is found without
+# the tree. Because the curve is continuous, the first i+1 bars reach every
+# ampacity between the lowest and highest of them, so the first segment to
+# cross an ampacity ends at the first bar where it falls inside that running
+# range. 'prefixMax' (the running highest ampacity) and 'negatedPrefixMin'
+# (the running lowest ampacity, negated) both only ever go up, so that bar is
+# found with two binary searches.
+class SegmentIndex:
+    def __init__(self, areas, amps):
+        self.areas = areas
+        self.amps = amps
+        self.prefixMax = array('d', itertools.accumulate(amps, max))
+        self.negatedPrefixMin = array('d', [-amp for amp in itertools.accumulate(amps, min)])
+        self._root = None
+
+    def _buildNode(self, segments):
+        if (not segments):
+            return None
+        endpoints = sorted([self.lows[i] for i in segments] + [self.highs[i] for i in segments])
+        center = endpoints[len(endpoints)//2]
+        below = [i for i in segments if self.highs[i] < center]
+        above = [i for i in segments if self.lows[i] > center]
+        here = [i for i in segments if self.lows[i] <= center <= self.highs[i]]
+        byLow = sorted(here, key=lambda i: self.lows[i])
+        byHigh = sorted(here, key=lambda i: self.highs[i], reverse=True)
+        return (center,
+                [self.lows[i] for i in byLow], byLow,
+                [self.highs[i] for i in byHigh], byHigh,
+                self._buildNode(below), self._buildNode(above))
+
+    # Builds the interval tree if it has not been built yet and returns its root.
+    def _getRoot(self):
+        if (self._root is None and len(self.amps) > 1):
+            amps = self.amps
+            self.lows = [min(amps[i], amps[i+1]) for i in range(len(amps) - 1)]
+            self.highs = [max(amps[i], amps[i+1]) for i in range(len(amps) - 1)]
+            self._root = self._buildNode(list(range(len(amps) - 1)))
+        return self._root
+
+    # Returns the indexes of every segment whose range of ampacities contains
+    # 'inputAmp'. Segment i joins bar i and bar i+1.
+    def findSegments(self, inputAmp):
+        segments = []
+        node = self._getRoot()
+        while node is not None:
+            center, lowKeys, byLow, highKeys, byHigh, below, above = node
+            if (inputAmp < center):
+                for i in range(len(byLow)):
+                    if (lowKeys[i] > inputAmp):
+                        break
+                    segments.append(byLow[i])
+                node = below
+            elif (inputAmp > center):
+                for i in range(len(byHigh)):
+                    if (highKeys[i] < inputAmp):
+                        break
+                    segments.append(byHigh[i])
+                node = above
+            else:
+                segments.extend(byLow)
+                node = None
+        return segments
+
+    # Returns every cross-sectional area at which the curve has an ampacity of
+    # 'inputAmp', in ascending order. Where a segment is flat at exactly
+    # 'inputAmp' only its smaller end is returned.
+    def crossings(self, inputAmp):
+        areas = self.areas
+        amps = self.amps
+        found = set()
+        if (len(amps) == 1 and amps[0] == inputAmp):
+            found.add(areas[0])
+        for i in self.findSegments(inputAmp):
+            if (amps[i+1] == amps[i]):
+                found.add(areas[i])
+            else:
+                # Use the Linear Interpolation Equation along the segment.
+                part1 = (areas[i+1] - areas[i])/(amps[i+1] - amps[i])
+                found.add((part1*(inputAmp - amps[i])) + areas[i])
+        return sorted(found)
+
+    # Returns the smallest cross-sectional area at which the curve has an
+    # ampacity of 'inputAmp', which must be between the lowest and highest
+    # tested ampacities.
+    def minimumCrossing(self, inputAmp):
+        location = max(bisect.bisect_left(self.prefixMax, inputAmp),
+                       bisect.bisect_left(self.negatedPrefixMin, -inputAmp))
+        if (location == 0):
+            return self.areas[0]
+        areas = self.areas
+        amps = self.amps
+        # Use the Linear Interpolation Equation along the segment.
+        part1 = (areas[location] - areas[location-1])/(amps[location] - amps[location-1])
+        return (part1*(inputAmp - amps[location-1])) + areas[location-1]
+
+    # The batch version of minimumCrossing() for a NumPy array of ampacities,
+    # all between the lowest and highest tested ampacities. Uses two
+    # searchsorted calls for the whole array.
+    def minimumCrossingBatch(self, inputAmps):
+        import numpy as np
+
+        areas = np.frombuffer(self.areas, dtype=np.float64)
+        amps = np.frombuffer(self.amps, dtype=np.float64)
+        location = np.maximum(
+            np.searchsorted(np.frombuffer(self.prefixMax, dtype=np.float64), inputAmps, side='left'),
+            np.searchsorted(np.frombuffer(self.negatedPrefixMin, dtype=np.float64), -inputAmps, side='left'))
+        location = np.minimum(location, len(amps) - 1)
+        previous = np.maximum(location - 1, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            part1 = (areas[location] - areas[previous])/(amps[location] - amps[previous])
+            results = (part1*(inputAmps - amps[previous])) + areas[previous]
+        results[location == 0] = areas[0]
+        return results
+
+# The experimental data for a single busbar geometry. The data is only read and
+# sorted once, and is kept as columns of floats so that calculateAmp can find
+# the closest tested busbars with a binary search.
+# # 'areas' and 'amps' hold every tested bar sorted by cross-sectional area.
+# # # They can be any sequence of floats, such as an array or a memoryview
+# # # into the compiled dataset (see hysterYaleDataset.py).
+# # 'segments' is a SegmentIndex over the curve, used by calculateArea to find
+# # # the cross-sectional areas that carry a given ampacity.
+# # 'minAmp' and 'maxAmp' are the lowest and highest ampacities tested.
+# 'signature' is the (modification time, size) of the file the data came from
+# and is used to tell when the table has to be read again.
+class GeometryTable:
+    def __init__(self, areas, amps, signature=None):
+        if (len(areas) == 0):
+            raise ValueError("The geometry table does not contain any data.")
+        self.areas = areas
+        self.amps = amps
+        self.segments = SegmentIndex(areas, amps)
+        self.minAmp = min(amps)
+        self.maxAmp = max(amps)
+        self.signature = signature
+        self._lookupTables = {}
+
+    # Builds a table from (cross-sectional area, ampacity) pairs in any order.
+    @classmethod
+    def fromRows(cls, rows, signature=None):
+        # Put all of the cross-sectional area values and ampacity values
+        # into a dictionary of form {xArea:ampacity, xArea:ampacity, ...}
+        xAreaAmpDict = {}
+        for xArea, ampacity in rows:
+            xAreaAmpDict[xArea] = ampacity
+
+        byArea = sorted(xAreaAmpDict.items())
+        return cls(array('d', [val[0] for val in byArea]),
+                   array('d', [val[1] for val in byArea]), signature)
+
+    def __len__(self):
+        return len(self.areas)
+
+    # Returns the UniformLookupTable with 'resolution' points for this table,
+    # building it the first time it is asked for.
+    def getLookupTable(self, resolution):
+        lookupTable = self._lookupTables.get(resolution)
+        if (lookupTable is None):
+            lookupTable = self._lookupTables[resolution] = UniformLookupTable(self, resolution)
+        return lookupTable
+
+# One of a geometry's curves resampled onto 'resolution' evenly spaced points
+# between 'start' and 'stop', so the two points either side of any input are
+# found by arithmetic instead of a search. 'exact' works out the exact value
+# for one input between 'start' and 'stop', and 'exactBatch' does the same for
+# a NumPy array of inputs.
+#
+# Between two neighbouring points the resampled curve is a straight line, so it
+# only differs from the exact curve where the exact curve bends or jumps
+# between them, which is at one of its 'breakpoints'. A jump cannot be
+# followed by a straight line however many points are used, so the cells
+# (the gaps between two neighbouring points) with a jump in them are recorded
+# in 'stepCells', and inputs that land in one of them use 'exact' instead.
+# 'maxError' is the largest difference between the two, checked at every
+# breakpoint and just either side of it.
+class ResampledCurve:
+    def __init__(self, exact, exactBatch, start, stop, resolution, breakpoints):
+        import numpy as np
+
+        self.exact = exact
+        self.exactBatch = exactBatch
+        self.start = start
+        self.stop = stop
+        self.last = resolution - 2
+        self.scale = (resolution - 1)/(stop - start) if (stop > start) else 0.0
+        self.valueArray = exactBatch(np.linspace(start, stop, resolution))
+        # Python floats are quicker to index one at a time than a NumPy array.
+        self.values = self.valueArray.tolist()
+
+        # A breakpoint is a step if the curve just below it and just above it
+        # differ by more than the curve's slope could account for. Marking a
+        # cell that has no step only costs an exact search.
+        breakpoints = np.asarray(breakpoints, dtype=np.float64)
+        inside = breakpoints[(breakpoints > start) & (breakpoints < stop)]
+        below = np.nextafter(inside, -np.inf)
+        above = np.nextafter(inside, np.inf)
+        jumps = np.abs(exactBatch(above) - exactBatch(below))
+        scale = np.max(np.abs(self.valueArray)) if len(self.valueArray) > 0 else 0.0
+        steps = np.flatnonzero(jumps > STEP_TOLERANCE*scale)
+        self.isStepCell = np.zeros(max(resolution - 1, 1), dtype=bool)
+        self.isStepCell[self._cells(below[steps])] = True
+        self.isStepCell[self._cells(above[steps])] = True
+        self.stepCells = set(np.flatnonzero(self.isStepCell).tolist())
+
+        checks = np.concatenate([below, breakpoints, above])
+        checks = checks[(checks >= start) & (checks <= stop)]
+        if (len(checks) > 0):
+            self.maxError = float(np.max(np.abs(self.valueBatch(checks) - exactBatch(checks))))
+        else:
+            self.maxError = 0.0
+
+    # Returns the index of the cell each of a NumPy array of inputs is in.
+    def _cells(self, inputValues):
+        import numpy as np
+
+        return np.minimum(((inputValues - self.start)*self.scale).astype(np.intp), self.last)
+
+    # Returns the resampled curve's value at 'inputValue', which must be
+    # between 'start' and 'stop'.
+    def value(self, inputValue):
+        position = (inputValue - self.start)*self.scale
+        index = int(position)
+        if (index > self.last):
+            index = self.last
+        if (index in self.stepCells):
+            return self.exact(inputValue)
+        lower = self.values[index]
+        return lower + (self.values[index+1] - lower)*(position - index)
+
+    # The batch version of value() for a NumPy array of inputs.
+    def valueBatch(self, inputValues):
+        import numpy as np
+
+        position = (inputValues - self.start)*self.scale
+        index = np.minimum(position.astype(np.intp), self.last)
+        lower = self.valueArray[index]
+        results = lower + (self.valueArray[index+1] - lower)*(position - index)
+        exact = self.isStepCell[index]
+        if (np.any(exact)):
+            results[exact] = self.exactBatch(inputValues[exact])
+        return results
+
+# Both of a geometry's curves resampled onto uniform grids (see
+# ResampledCurve): 'areaCurve' gives the smallest cross-sectional area for an
+# ampacity between the lowest and highest tested, like calculateArea, and
+# 'ampCurve' gives the ampacity for a cross-sectional area, like calculateAmp.
+# The smallest area jumps to a bigger bar wherever the ampacity rises past a
+# smaller bar's best, and those cells are searched exactly.
+# 'maxAreaError' (m²) and 'maxAmpError' (A) are the largest differences from
+# the exact results.
+class UniformLookupTable:
+    def __init__(self, table, resolution):
+        import numpy as np
+
+        areas = np.frombuffer(table.areas, dtype=np.float64)
+        amps = np.frombuffer(table.amps, dtype=np.float64)
+        self.resolution = resolution
+        self.areaCurve = ResampledCurve(table.segments.minimumCrossing, table.segments.minimumCrossingBatch,
+                                        table.minAmp, table.maxAmp, resolution, amps)
+
+        # interpolate() treats the largest tested area as out of range, but
+        # the grid needs a value there to interpolate towards. The columns are
+        # used rather than the table, so the table does not refer to itself
+        # and is freed (unmapping the dataset) as soon as it is dropped.
+        tableAreas = table.areas
+        tableAmps = table.amps
+
+        def exactAmp(inputArea):
+            if (inputArea >= tableAreas[-1]):
+                return tableAmps[-1]
+            return interpolate(tableAreas, tableAmps, inputArea)
+
+        def exactAmps(inputAreas):
+            results = interpolateBatch(tableAreas, tableAmps, inputAreas)[0]
+            results[inputAreas >= areas[-1]] = amps[-1]
+            return results
+        self.ampCurve = ResampledCurve(exactAmp, exactAmps, areas[0], areas[-1], resolution, areas)
+        self.maxAreaError = self.areaCurve.maxError
+        self.maxAmpError = self.ampCurve.maxError
+
+# Returns the GeometryTable for the given number of folds and bends. The CSV is
+# only read again if its modification time or size has changed since the last
+# time it was read. Raises FileNotFoundError if the geometry was not tested.
+def getGeometryTable(folds, bends):
+    if (_useBundledTables):
+        _loadBundledTables()
+    if (_fixedTables is not None):
+        table = _fixedTables.get((int(folds), int(bends)))
+        if (table is None):
+            raise FileNotFoundError("No table for {0} folds and {1} bends.".format(folds, bends))
+        return table
+    csvPath = os.path.join(_dataDirectory, geometryCsvPath(folds, bends))
+    fileStats = os.stat(csvPath)
+    signature = (fileStats.st_mtime_ns, fileStats.st_size)
+    table = _geometryTables.get(csvPath)
+    if (table is None or table.signature != signature):
+        if (table is not None and _resultCache is not None):
+            # The answers worked out from the old table are now out of date.
+            _resultCache.forgetTable(table)
+        # Let go of the old table so the dataset it came from can be closed if
+        # it has to be compiled again.
+        table = None
+        if (_instrumentation is not None):
+            table = _instrumentation.measureLoad(loadGeometryTable, folds, bends, signature)
+        else:
+            table = loadGeometryTable(folds, bends, signature)
+        _geometryTables[csvPath] = table
+    return table
+
+# Builds the GeometryTable for a geometry. The columns are taken straight from
+# the compiled dataset when it is up to date, and otherwise the CSV is read.
+def loadGeometryTable(folds, bends, signature=None):
+    # Imported here because hysterYaleDataset.py imports this script.
+    import hysterYaleDataset
+
+    try:
+        columns = hysterYaleDataset.getDataset(_dataDirectory).tables.get((int(folds), int(bends)))
+    except (OSError, ValueError) as e:
+        # The compiled dataset could not be written or read, so fall back to
+        # the CSV files, which are always the source of truth.
+        print(e)
+        columns = None
+    if (columns is not None and columns.signature == signature):
+        return GeometryTable(columns.areas, columns.amps, signature)
+    return GeometryTable.fromRows(readGeometryCsv(os.path.join(_dataDirectory, geometryCsvPath(folds, bends))),
+                                  signature)
+
+# The data bundled into a packaged executable cannot change while it runs, so
+# instead of checking the CSV files on every lookup, the whole compiled dataset
+# is read in one go the first time a table is needed and every lookup after
+# that uses it. If it cannot be read, the tables are read from the CSV files
+# as usual.
+def _loadBundledTables():
+    global _useBundledTables
+    # Imported here because hysterYaleDataset.py imports this script.
+    import hysterYaleDataset
+
+    _useBundledTables = False
+    try:
+        useGeometryTables(hysterYaleDataset.readBundledTables(_dataDirectory))
+    except (OSError, ValueError) as e:
+        print(e)
+
+# Makes every lookup use 'tables' (a dictionary of the form
+# {(folds, bends): GeometryTable, ...}) instead of the CSV files, which are then
+# never looked at. This is for processes that are handed tables that were
+# already loaded somewhere else. Call again with None to go back to the CSV
+# files.
+def useGeometryTables(tables):
+    global _fixedTables
+    _fixedTables = tables
+    if (_resultCache is not None):
+        _resultCache.clear()
+
+# Forget every geometry table that has been read so far, and every answer
+# that was cached from them.
+def clearGeometryTables():
+    _geometryTables.clear()
+    if (_resultCache is not None):
+        _resultCache.clear()
+
+# A bounded cache of the answers given by calculateArea and calculateAmp, for
+# programs that ask for the same few values over and over. Once 'maxSize'
+# answers are held, the one that was used longest ago is thrown away.
+#
+# Answers are cached against the GeometryTable they were worked out from, so
+# when a geometry's CSV file changes and its table is read again, the old
+# answers are never returned (getGeometryTable throws them away).
+#
+# If 'ampQuantum' is given, each ampacity is rounded to the nearest multiple
+# of it (e.g. 0.01 A) before the area is worked out, so nearby inputs share
+# one answer. 'areaQuantum' does the same for cross-sectional areas in m².
+class ResultCache:
+    def __init__(self, maxSize=1024, ampQuantum=None, areaQuantum=None):
+        # threading is imported here so that importing this script stays fast.
+        import threading
+
+        if (maxSize < 1):
+            raise ValueError("The result cache must hold at least one answer.")
+        self.maxSize = maxSize
+        self.ampQuantum = ampQuantum
+        self.areaQuantum = areaQuantum
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # Returns the answer of calculate(table, inputValue), from the cache if it
+    # has been worked out before. 'inputValue' must already be a float.
+    def calculate(self, calculate, quantum, table, inputValue):
+        if (quantum):
+            try:
+                inputValue = round(inputValue / quantum) * quantum
+            except (ValueError, OverflowError):
+                # Infinity and NaN are left as they are.
+                pass
+        if (inputValue != inputValue):
+            # NaN never equals itself, so it could never be found again.
+            return calculate(table, inputValue)
+        key = (calculate, table, inputValue)
+        with self.lock:
+            result = self.entries.get(key)
+            if (result is not None):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = calculate(table, inputValue)
+        with self.lock:
+            self.entries[key] = result
+            if (len(self.entries) > self.maxSize):
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    # Throws away every answer worked out from 'table'.
+    def forgetTable(self, table):
+        with self.lock:
+            keys = [key for key in self.entries if key[1] is table]
+            for key in keys:
+                del self.entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+
+    # Returns the cache's statistics as a dictionary.
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self.entries), "maxSize": self.maxSize,
+                    "hits": self.hits, "misses": self.misses,
+                    "hitRate": self.hits / lookups if lookups else None,
+                    "evictions": self.evictions, "invalidations": self.invalidations,
+                    "ampQuantum": self.ampQuantum, "areaQuantum": self.areaQuantum}
+
+# Starts caching the answers of calculateArea and calculateAmp, replacing any
+# cache that was already there (see ResultCache for the arguments). Returns
+# the new ResultCache.
+def configureResultCache(maxSize=1024, ampQuantum=None, areaQuantum=None):
+    global _resultCache
+    _resultCache = ResultCache(maxSize, ampQuantum, areaQuantum)
+    return _resultCache
+
+# Stops caching answers and throws away the ones that were cached.
+def disableResultCache():
+    global _resultCache
+    _resultCache = None
+
+# Returns the statistics of the result cache (see ResultCache.stats()), or
+# None if answers are not being cached.
+def getResultCacheStats():
+    resultCache = _resultCache
+    return None if resultCache is None else resultCache.stats()
+
+# Makes calculateArea, calculateAmp and their batch versions use a
+# UniformLookupTable with 'resolution' points per curve for each geometry,
+# which takes the same time to search no matter how many bars were tested.
+# Each geometry's lookup table is built the first time it is used, and again
+# after its CSV file changes. Needs NumPy.
+def configureLookupTables(resolution=4096):
+    global _lookupResolution
+    resolution = int(resolution)
+    if (resolution < 2):
+        raise ValueError("The lookup tables need at least two points.")
+    _lookupResolution = resolution
+    if (_resultCache is not None):
+        _resultCache.clear()
+
+# Goes back to searching the exact tables.
+def disableLookupTables():
+    global _lookupResolution
+    _lookupResolution = None
+    if (_resultCache is not None):
+        _resultCache.clear()
+
+# Returns the largest error of the lookup tables for every geometry that has
+# been loaded, as a dictionary of the form {(folds, bends): (largest area
+# error in m², largest ampacity error in A), ...}. Returns an empty dictionary
+# if lookup tables are not being used.
+def getLookupTableErrors():
+    # Imported here because hysterYaleDataset.py imports this script.
+    from hysterYaleDataset import parseGeometryCsvName
+
+    errors = {}
+    resolution = _lookupResolution
+    if (resolution is None):
+        return errors
+    # The tables in use are either the fixed ones or the ones read from CSV.
+    fixedTables = _fixedTables
+    if (fixedTables is not None):
+        tables = list(fixedTables.items())
+    else:
+        tables = [(parseGeometryCsvName(os.path.basename(csvPath)), table)
+                  for csvPath, table in list(_geometryTables.items())]
+    for geometry, table in tables:
+        lookupTable = table.getLookupTable(resolution)
+        errors[geometry] = (lookupTable.maxAreaError, lookupTable.maxAmpError)
+    return errors
+
+# Uses the Linear Interpolation Formula to find the value that goes with
+# 'inputValue', where 'keys' is sorted in ascending order and 'values' holds the
+# matching values. The two neighbours are found with a binary search, and a
+# value equal to one of the keys is interpolated from the key and the one above.
+# Returns -1 if 'inputValue' is above all of the keys, and -2 if it is below.
+def interpolate(keys, values, inputValue):
+    location = bisect.bisect_right(keys, inputValue)
+    if (location == len(keys)):
+        return -1
+    elif (location == 0):
+        return -2
+
+    previousKey = keys[location-1]
+    nextKey = keys[location]
+    part1 = (values[location] - values[location-1])/(nextKey - previousKey)
+    return (part1*(inputValue - previousKey)) + values[location-1]
+
 # The function for calculating the cross-sectional area of a busbar that will
 # stay under 90°C given a maximum amount of electrical amps running through it.
-# Looks at the CSV that contains the experimental data for the specific busbar
-# geometry and then uses the Linear Interpolation Formula to interpolate what
-# the area would be based on the two real busbars tested with the closest
-# electrical ampacities above and below the inputted value.
+# Looks at the experimental data for the specific busbar geometry and then uses
+# the Linear Interpolation Formula to interpolate what the area would be along
+# each segment of the tested curve that crosses the inputted ampacity. Because
+# the ampacity does not always rise with the cross-sectional area, more than
+# one area can carry the same current; the smallest one is returned.
 def calculateArea(inputAmp, bends, folds):
+    if (_instrumentation is not None):
+        return _instrumentation.measure("calculateArea", areaFromTable, inputAmp, bends, folds)
+    try:
+        # Each geometry has a different set of data, so find the correct table
+        try:
+            table = getGeometryTable(folds, bends)
+        except FileNotFoundError:
+            return -3
+        return areaFromTable(table, inputAmp)
+    except Exception as e:
+        print(e)
+        return -99
+
+# The part of calculateArea that happens once the geometry's table has been
+# found. Returns -1 or -2 if the ampacity is out of range.
+def areaFromTable(table, inputAmp):
+    resultCache = _resultCache
+    if (resultCache is not None):
+        return resultCache.calculate(_findArea, resultCache.ampQuantum, table, float(inputAmp))
+    return _findArea(table, float(inputAmp))
+
+def _findArea(table, inputAmp):
+    if (inputAmp > table.maxAmp):
+        # Returning a -1 indicates this amapacity is above all the values in the csv file
+        return -1
+    elif (inputAmp < table.minAmp):
+        # Returning a -2 indicates this amapacity is below all the values in the csv file
+        return -2
+    elif (inputAmp != inputAmp):
+        raise ValueError("The inputted ampacity is not a number.")
+    resolution = _lookupResolution
+    if (resolution is not None):
+        return table.getLookupTable(resolution).areaCurve.value(inputAmp)
+    return table.segments.minimumCrossing(inputAmp)
+
+# The same as calculateArea, but returns a list of every cross-sectional area
+# (in ascending order) at which the tested curve carries the inputted ampacity.
+# Returns the same negative numbers as calculateArea if there are none.
+def calculateAreas(inputAmp, bends, folds):
     try:
-        # Each geometry has a different set of data, so open the correct file
-        csvFile = "busbar-data-{0}folds-{1}bends.csv".format(folds, bends)
+        # Each geometry has a different set of data, so find the correct table
         try:
-            with open(csvFile, mode='r') as csvFile:
-                csvReader = csv.reader(csvFile, delimiter=',')
-                rowCount = 0
-                xAreaAmpDict = {}
-                # Put all of the cross-sectional area values and ampacity values
-                # into a dictionary of form {xArea:ampacity, xArea:ampacity, ...}
-                for row in csvReader:
-                    if rowCount > 0:
-                        xAreaAmpDict[float(row[0])] = float(row[1])
-                    rowCount += 1
-
-                # Insert the user-inputted value into the dictionary
-                xAreaAmpDict['unknown'] = float(inputAmp)
-
-                # Sort the dictionary by ascending order of the ampacity values.
-                sortedDict = OrderedDict(sorted(xAreaAmpDict.items(), key=lambda x: x[1]))
-
-                # From our data, get the two cross-sectional areas & ampacities above
-                # and below the inputted value.
-                location = list(sortedDict.keys()).index("unknown")
-                cannotInterpolate = False
-                previousVal = None
-                nextVal = None
-                dictList = list(sortedDict.items())
-                if (location != 0):
-                    try:
-                        previousVal = dictList[location-1]
-                        nextVal = dictList[location+1]
-                    except IndexError:
-                        cannotInterpolate = True
-                        previousVal = dictList[location-1]
-                        # Returning a -1 indicates this amapacity is above all the values in the csv file
-                        outputArea = -1
-                        return outputArea
-
-                elif (location == 0):
-                    cannotInterpolate = True
-                    nextVal = dictList[location+1]
-                    # Returning a -2 indicates this amapacity is below all the values in the csv file
-                    outputArea = -2
-                    return outputArea
-
-                # Use the Linear Interpolation Equation to interpolate the value
-                # of the cross-sectional area for a bar with the inputted ampacity.
-                if (cannotInterpolate == False):
-                    part1 = (nextVal[0] - previousVal[0])/(nextVal[1] - previousVal[1])
-                    outputArea = (part1*(inputAmp - previousVal[1])) + previousVal[0]
-                    return outputArea
+            table = getGeometryTable(folds, bends)
         except FileNotFoundError:
             return -3
+
+        inputAmp = float(inputAmp)
+        if (inputAmp > table.maxAmp):
+            # Returning a -1 indicates this amapacity is above all the values in the csv file
+            return -1
+        elif (inputAmp < table.minAmp):
+            # Returning a -2 indicates this amapacity is below all the values in the csv file
+            return -2
+        elif (inputAmp != inputAmp):
+            raise ValueError("The inputted ampacity is not a number.")
+        return table.segments.crossings(inputAmp)
     except Exception as e:
         print(e)
         return -99
 
 # The function for calculating the maximum electrical current of a busbar that
 # will stay under 90°C given the bar is a specific cross-sectional area in size.
-# Looks at the CSV that contains the experimental data for the specific busbar
-# geometry and then uses the Linear Interpolation Formula to interpolate what
-# the current would be based on the two real busbars tested with the closest
-# cross-sectional areas above and below the inputted value.
+# Looks at the experimental data for the specific busbar geometry and then uses
+# the Linear Interpolation Formula to interpolate what the current would be
+# based on the two real busbars tested with the closest cross-sectional areas
+# above and below the inputted value.
 def calculateAmp(inputArea, bends, folds):
+    if (_instrumentation is not None):
+        return _instrumentation.measure("calculateAmp", ampFromTable, inputArea, bends, folds)
     try:
-        csvFile = "busbar-data-{0}folds-{1}bends.csv".format(folds, bends)
         try:
-            with open(csvFile, mode='r') as csvFile:
-                csvReader = csv.reader(csvFile, delimiter=',')
-                #print(list(csvReader))
-                rowCount = 0
-                xAreaAmpDict = {}
-                # Put all of the cross-sectional area values and ampacity values
-                # into a dictionary of form {ampacity:xArea, ampacity:xArea, ...}
-                for row in csvReader:
-                    if rowCount > 0:
-                        xAreaAmpDict[float(row[1])] = float(row[0])
-                    rowCount += 1
-
-                # Insert the user-inputted value into the dictionary
-                xAreaAmpDict["unknown"] = float(inputArea)
-
-                # Sort the dictionary by ascending order of the ampacity values.
-                sortedDict = OrderedDict(sorted(xAreaAmpDict.items(), key=lambda x: x[1]))
-
-                # From our data, get the two cross-sectional areas & ampacities above
-                # and below the inputted value.
-                location = list(sortedDict.keys()).index("unknown")
-                cannotInterpolate = False
-                previousVal = None
-                nextVal = None
-                dictList = list(sortedDict.items())
-                if (location != 0):
-                    try:
-                        previousVal = dictList[location-1]
-                        nextVal = dictList[location+1]
-                    except IndexError:
-                        cannotInterpolate = True
-                        previousVal = dictList[location-1]
-                        # Returning a -1 indicates this cross-sectional area is above all the values in the csv file
-                        outputAmp = -1
-                        return outputAmp
-
-                elif (location == 0):
-                    cannotInterpolate = True
-                    nextVal = dictList[location+1]
-                    # Returning a -2 indicates this cross-sectional area is below all the values in the csv file
-                    outputAmp = -2
-                    return outputAmp
-
-                # Use the equation to interpolate the value of the cross-sectional
-                # area for a bar with the inputted ampacity.
-                # val[0] is the cross-sectional area and val[1] is the ampacity.
-                if (cannotInterpolate == False):
-                    part1 = (nextVal[0] - previousVal[0])/(nextVal[1] - previousVal[1])
-                    outputAmp = (part1*(inputArea - previousVal[1])) + previousVal[0]
-                    return outputAmp
+            table = getGeometryTable(folds, bends)
         except FileNotFoundError:
             return -3
+        return ampFromTable(table, inputArea)
     except Exception as e:
         print(e)
         return -99
 
+# The part of calculateAmp that happens once the geometry's table has been
+# found. Returns -1 if the cross-sectional area is above all the values in the
+# csv file, or -2 if it is below all of them.
+def ampFromTable(table, inputArea):
+    resultCache = _resultCache
+    if (resultCache is not None):
+        return resultCache.calculate(_findAmp, resultCache.areaQuantum, table, float(inputArea))
+    return _findAmp(table, float(inputArea))
+
+def _findAmp(table, inputArea):
+    resolution = _lookupResolution
+    if (resolution is not None):
+        # The same ranges as interpolate(), which also treats NaN as above.
+        if (not inputArea < table.areas[-1]):
+            return -1
+        elif (inputArea < table.areas[0]):
+            return -2
+        return table.getLookupTable(resolution).ampCurve.value(inputArea)
+    return interpolate(table.areas, table.amps, inputArea)
+
+# Status codes used by calculateAreaBatch and calculateAmpBatch in place of the
+# negative numbers returned by calculateArea and calculateAmp.
+# # STATUS_OK means the value was interpolated from the experimental data.
+# # STATUS_ABOVE_RANGE is the same as -1, STATUS_BELOW_RANGE is the same as -2,
+# # STATUS_NO_DATA is the same as -3 and STATUS_ERROR is the same as -99.
+# # # So a negative number 'r' returned by calculateArea or calculateAmp has
+# # # the status code -r.
+STATUS_OK = 0
+STATUS_ABOVE_RANGE = 1
+STATUS_BELOW_RANGE = 2
+STATUS_NO_DATA = 3
+STATUS_ERROR = 99
+
+# The name of each status code, for scripts that write the status out as text.
+STATUS_NAMES = {
+    STATUS_OK: "ok",
+    STATUS_ABOVE_RANGE: "above range",
+    STATUS_BELOW_RANGE: "below range",
+    STATUS_NO_DATA: "no data",
+    STATUS_ERROR: "error",
+}
+
+# The batch version of interpolate(). Interpolates every element of the NumPy
+# array 'inputValues' at once using a single searchsorted over 'keys'. Returns
+# an array of results (NaN where there is no result) and an array of status
+# codes.
+def interpolateBatch(keys, values, inputValues):
+    import numpy as np
+
+    keys = np.frombuffer(keys, dtype=np.float64)
+    values = np.frombuffer(values, dtype=np.float64)
+    location = np.searchsorted(keys, inputValues, side='right')
+    status = np.zeros(inputValues.shape, dtype=np.int8)
+    status[location == len(keys)] = STATUS_ABOVE_RANGE
+    status[location == 0] = STATUS_BELOW_RANGE
+    status[np.isnan(inputValues)] = STATUS_ERROR
+    if (len(keys) < 2):
+        return np.full(inputValues.shape, np.nan), status
+
+    # Interpolate every element between the two closest keys, then blank out
+    # the elements that were outside the range of the data.
+    nextIndex = np.clip(location, 1, len(keys) - 1)
+    previousKey = keys[nextIndex-1]
+    previousValue = values[nextIndex-1]
+    part1 = (values[nextIndex] - previousValue)/(keys[nextIndex] - previousKey)
+    results = (part1*(inputValues - previousKey)) + previousValue
+    results[status != STATUS_OK] = np.nan
+    return results, status
+
+# Runs 'lookup' once for every geometry that appears in 'bends' and 'folds'.
+# 'lookup' is a function that takes a GeometryTable and an array of inputs for
+# that geometry and returns arrays of results and status codes. 'name' is the
+# name the timings are recorded under when instrumentation is turned on. Any
+# 'extraInputs' (such as bar lengths) are broadcast along with the inputs, and
+# the part of each that goes with the geometry is passed on to 'lookup' too.
+# Bends and folds that are not whole numbers were never tested, so (like
+# calculateArea and calculateAmp) those inputs get STATUS_NO_DATA.
+# Other scripts use this to build batch functions of their own.
+def calculateBatch(name, lookup, inputValues, bends, folds, *extraInputs):
+    import numpy as np
+
+    inputValues, bends, folds, *extraInputs = np.broadcast_arrays(
+        np.asarray(inputValues, dtype=np.float64),
+        np.asarray(bends, dtype=np.float64),
+        np.asarray(folds, dtype=np.float64),
+        *[np.asarray(extraInput, dtype=np.float64) for extraInput in extraInputs])
+    shape = inputValues.shape
+    inputValues = inputValues.ravel()
+    bends = bends.ravel()
+    folds = folds.ravel()
+    extraInputs = [extraInput.ravel() for extraInput in extraInputs]
+    results = np.full(inputValues.shape, np.nan)
+    status = np.full(inputValues.shape, STATUS_ERROR, dtype=np.int8)
+    if (inputValues.size == 0):
+        return results.reshape(shape), status.reshape(shape)
+
+    # Check the geometries are whole numbers before they are turned into
+    # integers, which would round them down to a geometry that was tested.
+    whole = np.isfinite(bends) & np.isfinite(folds) & (bends == np.floor(bends)) & (folds == np.floor(folds))
+    if (not np.all(whole)):
+        status[~whole] = STATUS_NO_DATA
+        wholeIndices = np.flatnonzero(whole)
+        if (len(wholeIndices) == 0):
+            return results.reshape(shape), status.reshape(shape)
+        inputValues = inputValues[wholeIndices]
+        bends = bends[wholeIndices]
+        folds = folds[wholeIndices]
+        extraInputs = [extraInput[wholeIndices] for extraInput in extraInputs]
+    else:
+        wholeIndices = np.arange(inputValues.size)
+    bends = bends.astype(np.int64)
+    folds = folds.astype(np.int64)
+    wholeResults = np.full(inputValues.shape, np.nan)
+    wholeStatus = np.full(inputValues.shape, STATUS_ERROR, dtype=np.int8)
+
+    # Group the inputs by geometry so each geometry's table is searched once.
+    if (np.all(bends == bends[0]) and np.all(folds == folds[0])):
+        groups = [((int(folds[0]), int(bends[0])), slice(None))]
+    else:
+        # Give every (folds, bends) pair a single integer code to sort on.
+        bendsMin = bends.min()
+        bendsSpan = int(bends.max() - bendsMin) + 1
+        codes = (folds - folds.min())*bendsSpan + (bends - bendsMin)
+        order = np.argsort(codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        groups = [((int(folds[indices[0]]), int(bends[indices[0]])), indices)
+                  for indices in np.split(order, boundaries)]
+
+    for (groupFolds, groupBends), indices in groups:
+        extras = [extraInput[indices] for extraInput in extraInputs]
+        if (_instrumentation is not None):
+            wholeResults[indices], wholeStatus[indices] = _instrumentation.measureBatch(
+                name, lookup, inputValues[indices], groupBends, groupFolds, *extras)
+            continue
+        try:
+            table = getGeometryTable(groupFolds, groupBends)
+        except FileNotFoundError:
+            wholeStatus[indices] = STATUS_NO_DATA
+            continue
+        except Exception as e:
+            print(e)
+            continue
+        wholeResults[indices], wholeStatus[indices] = lookup(table, inputValues[indices], *extras)
+
+    results[wholeIndices] = wholeResults
+    status[wholeIndices] = wholeStatus
+    return results.reshape(shape), status.reshape(shape)
+
+# The batch version of calculateAreas() for one geometry, keeping only the
+# smallest cross-sectional area for each ampacity like calculateArea does.
+def _minimumAreaBatch(table, inputAmps):
+    import numpy as np
+
+    status = np.zeros(inputAmps.shape, dtype=np.int8)
+    status[inputAmps > table.maxAmp] = STATUS_ABOVE_RANGE
+    status[inputAmps < table.minAmp] = STATUS_BELOW_RANGE
+    status[np.isnan(inputAmps)] = STATUS_ERROR
+    results = np.full(inputAmps.shape, np.nan)
+    inside = (status == STATUS_OK)
+    resolution = _lookupResolution
+    if (resolution is not None):
+        results[inside] = table.getLookupTable(resolution).areaCurve.valueBatch(inputAmps[inside])
+    else:
+        results[inside] = table.segments.minimumCrossingBatch(inputAmps[inside])
+    return results, status
+
+# The batch version of calculateArea. 'inputAmps' is an array (or list) of
+# ampacities, and 'bends' and 'folds' are either single numbers or arrays the
+# same length as 'inputAmps'. Returns a NumPy array of cross-sectional areas in
+# m² and an array of the STATUS_ codes above saying which results are valid.
+def calculateAreaBatch(inputAmps, bends, folds):
+    return calculateBatch("calculateAreaBatch", _minimumAreaBatch, inputAmps, bends, folds)
+
+# The batch version of calculateAmp. 'inputAreas' is an array (or list) of
+# cross-sectional areas in m², and 'bends' and 'folds' are either single
+# numbers or arrays the same length as 'inputAreas'. Returns a NumPy array of
+# ampacities and an array of STATUS_ codes.
+def calculateAmpBatch(inputAreas, bends, folds):
+    return calculateBatch("calculateAmpBatch", _ampBatch, inputAreas, bends, folds)
+
+# The batch version of ampFromTable().
+def _ampBatch(table, inputAreas):
+    import numpy as np
+
+    resolution = _lookupResolution
+    if (resolution is None):
+        return interpolateBatch(table.areas, table.amps, inputAreas)
+    status = np.zeros(inputAreas.shape, dtype=np.int8)
+    status[inputAreas >= table.areas[-1]] = STATUS_ABOVE_RANGE
+    status[inputAreas < table.areas[0]] = STATUS_BELOW_RANGE
+    status[np.isnan(inputAreas)] = STATUS_ERROR
+    results = np.full(inputAreas.shape, np.nan)
+    inside = (status == STATUS_OK)
+    results[inside] = table.getLookupTable(resolution).ampCurve.valueBatch(inputAreas[inside])
+    return results, status
+
+# The size of one of each unit as a whole number of tenths of a millimeter
+# (for lengths) or square tenths of a millimeter (for cross-sectional areas),
+# so every ratio between them is exact. An inch is exactly 25.4 mm.
+UNIT_SIZES = {
+    "mm": 10,
+    "cm": 100,
+    "m": 10000,
+    "in": 254,
+    "mm²": 10**2,
+    "cm²": 100**2,
+    "m²": 10000**2,
+    "in²": 254**2,
+}
+LENGTH_UNIT_NAMES = ["mm", "cm", "m", "in"]
+AREA_UNIT_NAMES = ["mm²", "cm²", "m²", "in²"]
+
+# Works out how to convert from 'inputUnits' to 'outputUnits' with a single
+# floating-point operation. Returns (factor, divide): the value is divided by
+# 'factor' if 'divide' is True, and multiplied by it otherwise. Ratios below
+# one are applied by dividing by their reciprocal, so converting mm to m
+# divides by exactly 1000 and converting back multiplies by exactly 1000.
+def _conversionFactor(inputUnits, outputUnits):
+    inputSize = UNIT_SIZES[inputUnits]
+    outputSize = UNIT_SIZES[outputUnits]
+    if (inputSize < outputSize):
+        return (outputSize / inputSize, True)
+    return (inputSize / outputSize, False)
+
+# The conversion for every pair of units of the same kind, worked out once.
+# Lengths can only be converted to lengths, and areas to areas.
+CONVERSION_FACTORS = {}
+for unitNames in (LENGTH_UNIT_NAMES, AREA_UNIT_NAMES):
+    for inputName in unitNames:
+        for outputName in unitNames:
+            CONVERSION_FACTORS[(inputName, outputName)] = _conversionFactor(inputName, outputName)
+del unitNames, inputName, outputName
+
+# Returns the (factor, divide) pair from CONVERSION_FACTORS for converting
+# 'inputUnits' to 'outputUnits', or raises a ValueError if they cannot be
+# converted. Bulk code can look the pair up once and reuse it.
+def getConversion(inputUnits, outputUnits):
+    try:
+        return CONVERSION_FACTORS[(inputUnits, outputUnits)]
+    except KeyError:
+        raise ValueError("Cannot convert {0} to {1}.".format(inputUnits, outputUnits))
+
+# Converts 'inputValue' with a (factor, divide) pair from getConversion().
+# 'inputValue' can be a single number, or a NumPy array, list or tuple of
+# numbers, which is converted as a whole and returned as a NumPy array.
+def applyConversion(conversion, inputValue):
+    factor, divide = conversion
+    if (isinstance(inputValue, (list, tuple)) or getattr(inputValue, "ndim", 0) > 0):
+        import numpy as np
+
+        inputValue = np.asarray(inputValue, dtype=np.float64)
+        if (divide):
+            return inputValue / factor
+        return inputValue * factor
+    if (divide):
+        return float(inputValue) / factor
+    return float(inputValue) * factor
+
 # Convert different units to all be in either meters or meters².
 # 'inputUnits' is a String of the units the inputted value is in
-# 'inputValue' is the actual number being worked with
+# 'inputValue' is the actual number being worked with, or an array or list of
+# # numbers to convert all at once
 # 'outputUnits' is a String of the desired type of unit to be converted to
 def convertUnits(inputUnits, inputValue, outputUnits):
-
-    # Conversions for millimeters
-    if (inputUnits == "mm"):
-        if (outputUnits == "mm"):
-            outputValue = (inputValue)
-        elif (outputUnits == "cm"):
-            outputValue = (inputValue/10)
-        elif (outputUnits == "m"):
-            outputValue = (inputValue/1000)
-        elif (outputUnits == "in"):
-            outputValue = (inputValue*0.039370)
-
-    # Conversions for centimeters
-    elif (inputUnits == "cm"):
-        if (outputUnits == "mm"):
-            outputValue = (inputValue*10)
-        elif (outputUnits == "cm"):
-            outputValue = (inputValue)
-        elif (outputUnits == "m"):
-            outputValue = (inputValue/100)
-        elif (outputUnits == "in"):
-            outputValue = (inputValue*0.39370)
-
-    # Conversions for meters
-    elif (inputUnits == "m"):
-        if (outputUnits == "mm"):
-            outputValue = (inputValue*1000)
-        elif (outputUnits == "cm"):
-            outputValue = (inputValue*100)
-        elif (outputUnits == "m"):
-            outputValue = (inputValue)
-        elif (outputUnits == "in"):
-            outputValue = (inputValue*39.370)
-
-    # Conversions for inches
-    elif (inputUnits == "in"):
-        if (outputUnits == "mm"):
-            outputValue = (inputValue/0.039370)
-        elif (outputUnits == "cm"):
-            outputValue = (inputValue/0.39370)
-        elif (outputUnits == "m"):
-            outputValue = (inputValue/39.370)
-        elif (outputUnits == "in"):
-            outputValue = (inputValue)
-
-
-    # Conversions for square millimeters
-    if (inputUnits == "mm²"):
-        if (outputUnits == "mm²"):
-            outputValue = (inputValue)
-        elif (outputUnits == "cm²"):
-            outputValue = (inputValue/100)
-        elif (outputUnits == "m²"):
-            outputValue = (inputValue/1000000)
-        elif (outputUnits == "in²"):
-            outputValue = (inputValue/645.16)
-
-    # Conversions for square centimeters
-    if (inputUnits == "cm²"):
-        if (outputUnits == "mm²"):
-            outputValue = (inputValue*100)
-        elif (outputUnits == "cm²"):
-            outputValue = (inputValue)
-        elif (outputUnits == "m²"):
-            outputValue = (inputValue/10000)
-        elif (outputUnits == "in²"):
-            outputValue = (inputValue/6.4516)
-
-    # Conversions for square meters
-    if (inputUnits == "m²"):
-        if (outputUnits == "mm²"):
-            outputValue = (inputValue*1000000)
-        elif (outputUnits == "cm²"):
-            outputValue = (inputValue/10000)
-        elif (outputUnits == "m²"):
-            outputValue = (inputValue)
-        elif (outputUnits == "in²"):
-            outputValue = (inputValue*1550)
-
-    # Conversions for square inches
-    if (inputUnits == "in²"):
-        if (outputUnits == "mm²"):
-            outputValue = (inputValue*645.16)
-        elif (outputUnits == "cm²"):
-            outputValue = (inputValue*6.4516)
-        elif (outputUnits == "m²"):
-            outputValue = (inputValue/1550)
-        elif (outputUnits == "in²"):
-            outputValue = (inputValue)
-
-    return float(outputValue)
+    return applyConversion(getConversion(inputUnits, outputUnits), inputValue)
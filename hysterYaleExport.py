@@ -0,0 +1,273 @@
+# A command-line script for exporting a dense chart of every geometry table,
+# so other tools (CAD, spreadsheets) can look answers up without running the
+# program. For every busbar-data-*folds-*bends.csv file two charts are made:
+# # "ampacity": the ampacity (A) calculateAmp gives at every point of a grid
+# # # of cross-sectional areas.
+# # "area": the cross-sectional area calculateArea gives at every point of a
+# # # grid of ampacities.
+# Both grids are evenly spaced and set by the user, and are the same for every
+# geometry. Points outside a geometry's tested range are flagged with a status
+# instead of being written as -1 or -2.
+#
+# The charts are split into pieces of CHUNK_POINTS points which are worked out
+# in a process pool and written as they come back, with only a few pieces per
+# worker in flight, so the size of the grids does not change the memory used.
+#
+# Two output formats are supported:
+# # CSV: one row per point with the columns in CSV_COLUMNS. Cross-sectional
+# # # areas are in the units chosen by the user and out-of-range results are
+# # # left blank.
+# # Binary: a columnar file that can be memory-mapped (see ChartFile).
+#
+# Layout of the binary file (all numbers little-endian):
+# # Header: 4-byte magic "HYBX", uint16 version, uint16 unused, uint32 number
+# # # of geometries, uint32 number of area grid points, uint32 number of
+# # # ampacity grid points, 4 bytes of padding.
+# # Index: one entry per geometry of int32 folds, int32 bends and int64 offset
+# # # of the geometry's data.
+# # Grids: a float64 column of the area grid (m²) followed by a float64 column
+# # # of the ampacity grid (A).
+# # Data: for each geometry, a float64 column of ampacities (one per area grid
+# # # point), a float64 column of cross-sectional areas in m² (one per
+# # # ampacity grid point), then an int8 column of STATUS_ codes for each
+# # # (see hysterYaleEquations.py), padded to a multiple of 8 bytes.
+# # # Results that are not STATUS_OK are NaN.
+#
+# Example:
+# # python hysterYaleExport.py charts.csv --areas 5 80 1000 --units mm² --amps 50 80 1000 --workers 4
+
+import argparse
+import csv
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hysterYaleEquations import calculateAmpBatch
+from hysterYaleEquations import calculateAreaBatch
+from hysterYaleEquations import convertUnits
+from hysterYaleEquations import getGeometryTable
+from hysterYaleEquations import STATUS_OK
+from hysterYaleEquations import STATUS_NAMES
+from hysterYaleDataset import findGeometryCsvs
+from hysterYaleSizing import X_AREA_UNITS
+
+EXPORT_MAGIC = b"HYBX"
+EXPORT_VERSION = 1
+HEADER_FORMAT = struct.Struct("<4sHHIII4x")
+INDEX_FORMAT = struct.Struct("<iiq")
+CHUNK_POINTS = 1 << 16 #The number of grid points worked out in one piece.
+DEFAULT_POINTS = 1000 #The number of points in a grid the user did not set.
+CSV_COLUMNS = ["folds", "bends", "chart", "input", "inputUnits", "result", "resultUnits", "status"]
+
+# An evenly spaced grid of 'count' points from 'start' to 'stop'.
+class Grid:
+    def __init__(self, start, stop, count):
+        self.start = float(start)
+        self.stop = float(stop)
+        self.count = int(count)
+        if (self.count < 1 or not np.isfinite(self.start) or not np.isfinite(self.stop)):
+            raise ValueError("A grid needs finite ends and at least one point.")
+        if (self.count == 1 and self.start != self.stop):
+            raise ValueError("A grid of one point must start and stop at the same value.")
+
+    # Returns the grid points from index 'first' up to (but not including)
+    # 'last'. Every piece of the grid is worked out the same way, so pieces
+    # made in different processes join up exactly.
+    def points(self, first=0, last=None):
+        last = self.count if last is None else last
+        if (self.count == 1):
+            return np.full(last - first, self.start)
+        step = (self.stop - self.start)/(self.count - 1)
+        return self.start + step*np.arange(first, last, dtype=np.float64)
+
+# One piece of one chart: the points of 'grid' from 'first' to 'last' for the
+# geometry (folds, bends). 'chart' is "ampacity" or "area".
+class ChartPiece:
+    def __init__(self, folds, bends, chart, grid, first, last):
+        self.folds = folds
+        self.bends = bends
+        self.chart = chart
+        self.grid = grid
+        self.first = first
+        self.last = last
+
+# Works out a ChartPiece. Returns the piece with its grid points, results and
+# STATUS_ codes. Runs in the worker processes when a pool is used.
+def computePiece(piece):
+    inputs = piece.grid.points(piece.first, piece.last)
+    if (piece.chart == "ampacity"):
+        results, status = calculateAmpBatch(inputs, piece.bends, piece.folds)
+    else:
+        results, status = calculateAreaBatch(inputs, piece.bends, piece.folds)
+    results[status != STATUS_OK] = np.nan
+    return piece, inputs, results, status
+
+# Lists the pieces of every chart in the order they are written.
+def listPieces(geometries, areaGrid, ampGrid, chunkPoints=CHUNK_POINTS):
+    for folds, bends in geometries:
+        for chart, grid in (("ampacity", areaGrid), ("area", ampGrid)):
+            for first in range(0, grid.count, chunkPoints):
+                yield ChartPiece(folds, bends, chart, grid, first, min(first + chunkPoints, grid.count))
+
+# Works out every piece from 'pieces' and yields the results in the same
+# order, running up to 'workers' pieces at a time in a process pool.
+def computePieces(pieces, workers=1):
+    if (workers <= 1):
+        for piece in pieces:
+            yield computePiece(piece)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for piece in pieces:
+            pending.append(pool.submit(computePiece, piece))
+            if (len(pending) >= workers*2):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# Returns grids covering every tested cross-sectional area and ampacity of the
+# geometries, with 'count' points each.
+def defaultGrids(geometries, count=DEFAULT_POINTS):
+    tables = [getGeometryTable(folds, bends) for folds, bends in geometries]
+    areaGrid = Grid(min(table.areas[0] for table in tables), max(table.areas[-1] for table in tables), count)
+    ampGrid = Grid(min(table.minAmp for table in tables), max(table.maxAmp for table in tables), count)
+    return areaGrid, ampGrid
+
+# Writes every chart to a CSV file at 'outputPath', with cross-sectional areas
+# in 'areaUnits'.
+def writeCsv(outputPath, geometries, areaGrid, ampGrid, areaUnits="m²", workers=1, chunkPoints=CHUNK_POINTS):
+    with open(outputPath, mode='w', newline='', encoding='utf-8') as outputFile:
+        writer = csv.writer(outputFile, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+        for piece, inputs, results, status in computePieces(
+                listPieces(geometries, areaGrid, ampGrid, chunkPoints), workers):
+            if (piece.chart == "ampacity"):
+                inputs = convertUnits("m²", inputs, areaUnits)
+                inputUnits, resultUnits = areaUnits, "A"
+            else:
+                results = convertUnits("m²", results, areaUnits)
+                inputUnits, resultUnits = "A", areaUnits
+            writer.writerows(
+                (piece.folds, piece.bends, piece.chart, repr(inputValue), inputUnits,
+                 "" if code != STATUS_OK else repr(result), resultUnits, STATUS_NAMES.get(code, "error"))
+                for inputValue, result, code in zip(inputs.tolist(), results.tolist(), status.tolist()))
+
+# Returns the number of bytes of data for one geometry in the binary file.
+def geometryDataSize(areaCount, ampCount):
+    return (9*(areaCount + ampCount) + 7)//8*8
+
+# Writes every chart to a binary file at 'outputPath'. The file is laid out and
+# sized first, and each piece is written into its place as it comes back. It
+# is written under a temporary name first and then moved into place.
+def writeBinary(outputPath, geometries, areaGrid, ampGrid, workers=1, chunkPoints=CHUNK_POINTS):
+    areaCount, ampCount = areaGrid.count, ampGrid.count
+    dataStart = HEADER_FORMAT.size + INDEX_FORMAT.size*len(geometries) + 8*(areaCount + ampCount)
+    offsets = {}
+    header = [HEADER_FORMAT.pack(EXPORT_MAGIC, EXPORT_VERSION, 0, len(geometries), areaCount, ampCount)]
+    for i, (folds, bends) in enumerate(geometries):
+        offsets[(folds, bends)] = dataStart + i*geometryDataSize(areaCount, ampCount)
+        header.append(INDEX_FORMAT.pack(folds, bends, offsets[(folds, bends)]))
+
+    temporaryPath = outputPath + ".tmp"
+    with open(temporaryPath, mode='wb') as outputFile:
+        outputFile.write(b"".join(header))
+        for grid in (areaGrid, ampGrid):
+            for first in range(0, grid.count, chunkPoints):
+                outputFile.write(grid.points(first, min(first + chunkPoints, grid.count)).astype('<f8').tobytes())
+        outputFile.truncate(dataStart + len(geometries)*geometryDataSize(areaCount, ampCount))
+
+        for piece, inputs, results, status in computePieces(
+                listPieces(geometries, areaGrid, ampGrid, chunkPoints), workers):
+            offset = offsets[(piece.folds, piece.bends)]
+            if (piece.chart == "ampacity"):
+                resultOffset = offset + 8*piece.first
+                statusOffset = offset + 8*(areaCount + ampCount) + piece.first
+            else:
+                resultOffset = offset + 8*(areaCount + piece.first)
+                statusOffset = offset + 8*(areaCount + ampCount) + areaCount + piece.first
+            outputFile.seek(resultOffset)
+            outputFile.write(results.astype('<f8').tobytes())
+            outputFile.seek(statusOffset)
+            outputFile.write(status.astype(np.int8).tobytes())
+    os.replace(temporaryPath, outputPath)
+
+# The charts in a binary file written by writeBinary, memory-mapped.
+# # 'areaGrid' and 'ampGrid' are the grids (m² and A).
+# # 'charts' is a dictionary of the form {(folds, bends): (amps, ampStatus,
+# # # areas, areaStatus), ...} where 'amps' and 'ampStatus' go with
+# # # 'areaGrid' and 'areas' and 'areaStatus' go with 'ampGrid'.
+class ChartFile:
+    def __init__(self, path):
+        self.path = path
+        self.buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, _, geometryCount, areaCount, ampCount = HEADER_FORMAT.unpack_from(self.buffer, 0)
+        if (magic != EXPORT_MAGIC or version != EXPORT_VERSION):
+            raise ValueError("{0} is not a busbar chart file.".format(path))
+        gridStart = HEADER_FORMAT.size + INDEX_FORMAT.size*geometryCount
+        grids = self.buffer[gridStart:gridStart + 8*(areaCount + ampCount)].view('<f8')
+        self.areaGrid = grids[:areaCount]
+        self.ampGrid = grids[areaCount:]
+
+        self.charts = {}
+        for i in range(geometryCount):
+            folds, bends, offset = INDEX_FORMAT.unpack_from(self.buffer, HEADER_FORMAT.size + i*INDEX_FORMAT.size)
+            results = self.buffer[offset:offset + 8*(areaCount + ampCount)].view('<f8')
+            statusStart = offset + 8*(areaCount + ampCount)
+            status = self.buffer[statusStart:statusStart + areaCount + ampCount].view(np.int8)
+            self.charts[(folds, bends)] = (results[:areaCount], status[:areaCount],
+                                           results[areaCount:], status[areaCount:])
+
+# Works out whether to write CSV or binary from the output file's name.
+def guessFormat(path):
+    if (path.lower().endswith(".csv")):
+        return "csv"
+    return "binary"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a dense area and ampacity chart for every geometry table.")
+    parser.add_argument("output", help="file to write (.csv for CSV, anything else for binary)")
+    parser.add_argument("--format", choices=["csv", "binary"], help="defaults to the output file extension")
+    parser.add_argument("--areas", nargs=3, metavar=("START", "STOP", "COUNT"),
+                        help="grid of cross-sectional areas (default: the tested range, {0} points)".format(DEFAULT_POINTS))
+    parser.add_argument("--amps", nargs=3, metavar=("START", "STOP", "COUNT"),
+                        help="grid of ampacities in A (default: the tested range, {0} points)".format(DEFAULT_POINTS))
+    parser.add_argument("--units", default="m²", help="cross-sectional area units for --areas and the CSV (default m²)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (default 1)")
+    args = parser.parse_args(argv)
+
+    try:
+        if (args.units not in X_AREA_UNITS):
+            raise ValueError("Unknown cross-sectional area units: {0}".format(args.units))
+        geometries = sorted(findGeometryCsvs())
+        if (not geometries):
+            raise ValueError("There are no geometry tables in this directory.")
+        areaGrid, ampGrid = defaultGrids(geometries)
+        if (args.areas):
+            start, stop, count = args.areas
+            areaGrid = Grid(convertUnits(args.units, float(start), "m²"),
+                            convertUnits(args.units, float(stop), "m²"), int(count))
+        if (args.amps):
+            ampGrid = Grid(float(args.amps[0]), float(args.amps[1]), int(args.amps[2]))
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    startTime = time.perf_counter()
+    if ((args.format or guessFormat(args.output)) == "csv"):
+        writeCsv(args.output, geometries, areaGrid, ampGrid, args.units, args.workers)
+    else:
+        writeBinary(args.output, geometries, areaGrid, ampGrid, args.workers)
+    elapsed = time.perf_counter() - startTime
+
+    points = len(geometries)*(areaGrid.count + ampGrid.count)
+    print("Exported {0} geometries ({1} points) in {2:.3f} s".format(len(geometries), points, elapsed), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+# A script for estimating the ampacity and cross-sectional area of busbars with
+# combinations of folds and bends that were never tested. Every geometry table
+# is resampled once onto a shared grid of cross-sectional areas and stored in a
+# dense NumPy array of shape (folds, bends, areas). Lookups then use
+# multilinear interpolation across the folds, bends and area axes for whole
+# arrays of inputs at once.
+#
+# The shared area grid is every cross-sectional area tested in any of the
+# tables (optionally with extra evenly-spaced points between them), so for a
+# geometry that was tested the grid gives the same answers as calculateArea
+# and calculateAmp in hysterYaleEquations.py (to within rounding), including
+# at the ends of the range: like calculateAmp, the largest area a curve is
+# known at is reported as above the range. Where a table does not cover part
+# of the grid the array holds NaN, and those results are reported as out of
+# range.
+#
+# Geometries without a table are filled in before any lookups are done by
+# assuming the effect of a fold and the effect of a bend add together: the
+# curve for (f folds, b bends) is estimated as
+# curve(f, b') + curve(f', b) - curve(f', b'), averaged over every tested
+# (f', b') for which all three curves exist.
+#
+# Every lookup also returns an 'interpolated' array that is True where the
+# answer used a filled-in geometry or a fractional number of folds or bends,
+# and False where it is a pure interpolation of measured data.
+
+import os
+
+import numpy as np
+
+from hysterYaleEquations import GeometryTable
+from hysterYaleEquations import getDataDirectory
+from hysterYaleEquations import getGeometryTable
+from hysterYaleEquations import readGeometryCsv
+from hysterYaleEquations import STATUS_OK
+from hysterYaleEquations import STATUS_ABOVE_RANGE
+from hysterYaleEquations import STATUS_BELOW_RANGE
+from hysterYaleEquations import STATUS_NO_DATA
+from hysterYaleEquations import STATUS_ERROR
+from hysterYaleDataset import findGeometryCsvs
+
+# The most grid values that are held in memory at once when looking up
+# cross-sectional areas. Inputs are handled in chunks of this size divided by
+# the number of points in the area grid.
+CHUNK_VALUES = 1 << 20
+
+# The most different geometries in one areaAt call for which each geometry's
+# curve is built once and shared by all of its inputs.
+GROUP_LIMIT = 256
+
+# The ampacity of every geometry on a shared grid of cross-sectional areas.
+# # 'foldsAxis' and 'bendsAxis' are the tested numbers of folds and bends.
+# # 'areaGrid' is the shared, ascending grid of cross-sectional areas (m²).
+# # 'amps' has shape (len(foldsAxis), len(bendsAxis), len(areaGrid)).
+# # 'measured' has shape (len(foldsAxis), len(bendsAxis)) and is True for the
+# # # geometries that have their own table.
+# # 'highestCovered' has the same shape and holds the largest area at which
+# # # each geometry's curve is known (NaN if it could not be filled in).
+class GeometryGrid:
+    # 'tables' is a dictionary of the form {(folds, bends): GeometryTable, ...}.
+    # 'pointsPerSegment' adds evenly spaced points between each pair of tested
+    # cross-sectional areas (1 means only the tested areas are used).
+    def __init__(self, tables, pointsPerSegment=1):
+        if (not tables):
+            raise ValueError("There are no geometry tables to build a grid from.")
+        self.foldsAxis = np.array(sorted({folds for folds, bends in tables}), dtype=np.float64)
+        self.bendsAxis = np.array(sorted({bends for folds, bends in tables}), dtype=np.float64)
+
+        testedAreas = np.unique(np.concatenate([np.frombuffer(table.areas, dtype=np.float64)
+                                                for table in tables.values()]))
+        if (pointsPerSegment > 1 and len(testedAreas) > 1):
+            steps = np.linspace(0, 1, pointsPerSegment, endpoint=False)
+            starts = testedAreas[:-1, None]
+            widths = np.diff(testedAreas)[:, None]
+            testedAreas = np.append((starts + widths*steps).ravel(), testedAreas[-1])
+        self.areaGrid = testedAreas
+
+        self.amps = np.full((len(self.foldsAxis), len(self.bendsAxis), len(self.areaGrid)), np.nan)
+        self.measured = np.zeros((len(self.foldsAxis), len(self.bendsAxis)), dtype=bool)
+        for (folds, bends), table in tables.items():
+            i = int(np.searchsorted(self.foldsAxis, folds))
+            j = int(np.searchsorted(self.bendsAxis, bends))
+            areas = np.frombuffer(table.areas, dtype=np.float64)
+            amps = np.frombuffer(table.amps, dtype=np.float64)
+            self.amps[i, j] = np.interp(self.areaGrid, areas, amps, left=np.nan, right=np.nan)
+            self.measured[i, j] = True
+        self._fillMissingGeometries()
+
+        # The largest grid area at which each geometry's curve is known.
+        self.highestCovered = np.full(self.measured.shape, np.nan)
+        for i, j in np.ndindex(*self.measured.shape):
+            known = np.flatnonzero(~np.isnan(self.amps[i, j]))
+            if (len(known) > 0):
+                self.highestCovered[i, j] = self.areaGrid[known[-1]]
+
+    # Estimates the curves for untested geometries from the tested ones, assuming
+    # the effects of folds and bends add together. Repeats until no more
+    # geometries can be filled in.
+    def _fillMissingGeometries(self):
+        known = self.measured.copy()
+        while not known.all():
+            filledAny = False
+            for i, j in zip(*np.nonzero(~known)):
+                estimates = [self.amps[i, k] + self.amps[l, j] - self.amps[l, k]
+                             for l in range(len(self.foldsAxis)) for k in range(len(self.bendsAxis))
+                             if known[i, k] and known[l, j] and known[l, k]]
+                if (estimates):
+                    self.amps[i, j] = np.mean(estimates, axis=0)
+                    known[i, j] = True
+                    filledAny = True
+            if (not filledAny):
+                break
+
+    # Works out the two grid points either side of each value along one axis
+    # and the weight of the upper one. Values outside the axis are marked.
+    @staticmethod
+    def _axisWeights(axis, values):
+        if (len(axis) == 1):
+            lower = np.zeros(values.shape, dtype=np.int64)
+            return lower, lower, np.zeros(values.shape), values != axis[0]
+        upper = np.clip(np.searchsorted(axis, values, side='right'), 1, len(axis) - 1)
+        lower = upper - 1
+        weight = (values - axis[lower])/(axis[upper] - axis[lower])
+        outside = (values < axis[0]) | (values > axis[-1]) | np.isnan(values)
+        return lower, upper, weight, outside
+
+    # Returns the corners of the folds/bends grid around each input and their
+    # bilinear weights, plus which inputs are outside the grid and which ones
+    # depend on filled-in or fractional geometries.
+    def _geometryCorners(self, bends, folds):
+        foldsLower, foldsUpper, foldsWeight, foldsOutside = self._axisWeights(self.foldsAxis, folds)
+        bendsLower, bendsUpper, bendsWeight, bendsOutside = self._axisWeights(self.bendsAxis, bends)
+        corners = [(foldsLower, bendsLower, (1 - foldsWeight)*(1 - bendsWeight)),
+                   (foldsLower, bendsUpper, (1 - foldsWeight)*bendsWeight),
+                   (foldsUpper, bendsLower, foldsWeight*(1 - bendsWeight)),
+                   (foldsUpper, bendsUpper, foldsWeight*bendsWeight)]
+        interpolated = np.zeros(folds.shape, dtype=bool)
+        for foldsIndex, bendsIndex, weight in corners:
+            interpolated |= (weight > 0) & ~self.measured[foldsIndex, bendsIndex]
+        interpolated |= (foldsWeight % 1 != 0) | (bendsWeight % 1 != 0)
+        return corners, foldsOutside | bendsOutside, interpolated
+
+    # Interpolates the ampacity for every (area, bends, folds). All three are
+    # NumPy float arrays of the same shape. Returns the ampacities, status codes
+    # and interpolated flags.
+    def ampAt(self, areas, bends, folds):
+        corners, geometryOutside, interpolated = self._geometryCorners(bends, folds)
+        grid = self.areaGrid
+        upper = np.clip(np.searchsorted(grid, areas, side='right'), 1, max(len(grid) - 1, 1))
+        lower = upper - 1
+        if (len(grid) > 1):
+            areaWeight = (areas - grid[lower])/(grid[upper] - grid[lower])
+        else:
+            upper = lower
+            areaWeight = np.zeros(areas.shape)
+
+        amps = np.zeros(areas.shape)
+        for foldsIndex, bendsIndex, weight in corners:
+            lowerAmp = self.amps[foldsIndex, bendsIndex, lower]
+            upperAmp = self.amps[foldsIndex, bendsIndex, upper]
+            # Skip corners with no weight so their NaNs do not spread.
+            amps += np.where(weight > 0, weight*(lowerAmp + areaWeight*(upperAmp - lowerAmp)), 0)
+
+        # A NaN means one of the tables this geometry is built from was not
+        # tested at this area. Call it above or below the range depending on
+        # which side of the part of the grid covered by every table it is on.
+        # interpolate() treats the largest tested area as above the range, so
+        # the largest covered area is too.
+        highestCovered = np.full(areas.shape, np.inf)
+        for foldsIndex, bendsIndex, weight in corners:
+            cornerHighest = self.highestCovered[foldsIndex, bendsIndex]
+            highestCovered = np.where(weight > 0, np.fmin(highestCovered, cornerHighest), highestCovered)
+        status = np.zeros(areas.shape, dtype=np.int8)
+        status[np.isnan(amps)] = STATUS_BELOW_RANGE
+        status[areas >= highestCovered] = STATUS_ABOVE_RANGE
+        status[areas < grid[0]] = STATUS_BELOW_RANGE
+        status[areas > grid[-1]] = STATUS_ABOVE_RANGE
+        status[geometryOutside] = STATUS_NO_DATA
+        status[np.isnan(areas)] = STATUS_ERROR
+        amps[status != STATUS_OK] = np.nan
+        return amps, status, interpolated
+
+    # Builds the interpolated curve (ampacity at every grid area) for each
+    # input geometry. Returns an array of shape (len(folds), len(areaGrid)).
+    def _curves(self, corners, indices):
+        curves = np.zeros((len(indices), len(self.areaGrid)))
+        for foldsIndex, bendsIndex, weight in corners:
+            cornerWeight = weight[indices, None]
+            cornerCurves = self.amps[foldsIndex[indices], bendsIndex[indices]]
+            curves += np.where(cornerWeight > 0, cornerWeight*cornerCurves, 0)
+            curves[np.broadcast_to(cornerWeight > 0, curves.shape) & np.isnan(cornerCurves)] = np.nan
+        return curves
+
+    # Finds the smallest cross-sectional area at which each geometry's
+    # interpolated curve carries the inputted ampacity. All three arguments are
+    # NumPy float arrays of the same shape. Returns the areas, status codes and
+    # interpolated flags.
+    #
+    # When there are only a few different geometries in the inputs, the curve
+    # for each one is built once and searched with a SegmentIndex, the same
+    # way calculateAreaBatch does for tested geometries. Otherwise every
+    # input's curve is built and searched directly, a chunk at a time.
+    def areaAt(self, amps, bends, folds):
+        corners, geometryOutside, interpolated = self._geometryCorners(bends, folds)
+        areas = np.full(amps.shape, np.nan)
+        status = np.full(amps.shape, STATUS_ERROR, dtype=np.int8)
+        valid = np.flatnonzero(~geometryOutside & ~np.isnan(amps))
+        if (len(valid) > 0):
+            # Pack each (folds, bends) pair into one complex number to sort on.
+            geometries, groupIds = np.unique(folds[valid] + 1j*bends[valid], return_inverse=True)
+            if (len(geometries) <= GROUP_LIMIT):
+                groupIds = groupIds.ravel()
+                order = np.argsort(groupIds, kind='stable')
+                boundaries = np.flatnonzero(np.diff(groupIds[order])) + 1
+                for groupIndices in np.split(valid[order], boundaries):
+                    self._areaAtGeometry(corners, groupIndices, amps, areas, status)
+            else:
+                chunkSize = max(1, CHUNK_VALUES // len(self.areaGrid))
+                for start in range(0, len(valid), chunkSize):
+                    self._areaAtEach(corners, valid[start:start + chunkSize], amps, areas, status)
+
+        status[geometryOutside] = STATUS_NO_DATA
+        status[np.isnan(amps)] = STATUS_ERROR
+        return areas, status, interpolated
+
+    # Looks up the areas for 'indices', which all have the same geometry.
+    def _areaAtGeometry(self, corners, indices, amps, areas, status):
+        curve = self._curves(corners, indices[:1])[0]
+        known = ~np.isnan(curve)
+        if (not known.any()):
+            status[indices] = STATUS_NO_DATA
+            return
+        table = GeometryTable(self.areaGrid[known], curve[known])
+        targets = amps[indices]
+        inside = (targets >= table.minAmp) & (targets <= table.maxAmp)
+        status[indices] = np.where(targets > table.maxAmp, STATUS_ABOVE_RANGE, STATUS_BELOW_RANGE)
+        status[indices[inside]] = STATUS_OK
+        areas[indices[inside]] = table.segments.minimumCrossingBatch(targets[inside])
+
+    # Looks up the areas for 'indices' by building and searching the curve for
+    # every input separately.
+    def _areaAtEach(self, corners, indices, amps, areas, status):
+        grid = self.areaGrid
+        curves = self._curves(corners, indices)
+        targets = amps[indices]
+        if (len(grid) == 1):
+            found = curves[:, 0] == targets
+            areas[indices[found]] = grid[0]
+        else:
+            difference = curves - targets[:, None]
+            crosses = (((difference[:, :-1] <= 0) & (difference[:, 1:] >= 0)) |
+                       ((difference[:, :-1] >= 0) & (difference[:, 1:] <= 0)))
+            found = crosses.any(axis=1)
+            segment = crosses.argmax(axis=1)[found]
+            rows = np.flatnonzero(found)
+            previousAmp = curves[rows, segment]
+            nextAmp = curves[rows, segment + 1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # Use the Linear Interpolation Equation along the segment.
+                part1 = (grid[segment + 1] - grid[segment])/(nextAmp - previousAmp)
+                crossing = (part1*(targets[found] - previousAmp)) + grid[segment]
+            areas[indices[found]] = np.where(nextAmp == previousAmp, grid[segment], crossing)
+
+        status[indices[found]] = STATUS_OK
+        highest = np.where(np.isnan(curves), -np.inf, curves).max(axis=1)
+        missed = indices[~found]
+        status[missed] = np.where(targets[~found] > highest[~found], STATUS_ABOVE_RANGE, STATUS_BELOW_RANGE)
+        status[missed[np.isinf(highest[~found])]] = STATUS_NO_DATA
+
+# The grids that have been built so far, keyed by the folder their tables came
+# from, as (GeometryGrid, the signatures of the tables it was built from).
+_geometryGrids = {}
+
+# Returns the GeometryGrid for every geometry table in 'directory' (the data
+# folder if None), building it again if any of the tables have changed since
+# it was last built. The data folder's tables are the ones getGeometryTable
+# uses; any other folder's tables are read from its CSV files.
+def getGeometryGrid(directory=None):
+    csvSignatures = findGeometryCsvs(directory)
+    if (directory is None):
+        key = os.path.abspath(getDataDirectory())
+        tables = {geometry: getGeometryTable(*geometry) for geometry in csvSignatures}
+        signatures = {geometry: table.signature for geometry, table in tables.items()}
+    else:
+        key = os.path.abspath(directory)
+        tables = None
+        signatures = {geometry: signature for geometry, (csvPath, signature) in csvSignatures.items()}
+
+    built = _geometryGrids.get(key)
+    if (built is not None and built[1] == signatures):
+        return built[0]
+    if (tables is None):
+        tables = {geometry: GeometryTable.fromRows(readGeometryCsv(csvPath), signature)
+                  for geometry, (csvPath, signature) in csvSignatures.items()}
+    grid = GeometryGrid(tables)
+    _geometryGrids[key] = (grid, signatures)
+    return grid
+
+# Broadcasts the inputs of the lookup functions below to flat float arrays.
+def _flatInputs(inputValues, bends, folds):
+    inputValues, bends, folds = np.broadcast_arrays(np.asarray(inputValues, dtype=np.float64),
+                                                    np.asarray(bends, dtype=np.float64),
+                                                    np.asarray(folds, dtype=np.float64))
+    return inputValues.shape, inputValues.ravel(), bends.ravel(), folds.ravel()
+
+# Like calculateAmpBatch in hysterYaleEquations.py, but also answers for
+# combinations of folds and bends that were not tested. Returns arrays of
+# ampacities, status codes and interpolated flags.
+def calculateAmpInterpolated(inputAreas, bends, folds):
+    shape, inputAreas, bends, folds = _flatInputs(inputAreas, bends, folds)
+    amps, status, interpolated = getGeometryGrid().ampAt(inputAreas, bends, folds)
+    return amps.reshape(shape), status.reshape(shape), interpolated.reshape(shape)
+
+# Like calculateAreaBatch in hysterYaleEquations.py, but also answers for
+# combinations of folds and bends that were not tested. Returns arrays of
+# cross-sectional areas, status codes and interpolated flags.
+def calculateAreaInterpolated(inputAmps, bends, folds):
+    shape, inputAmps, bends, folds = _flatInputs(inputAmps, bends, folds)
+    areas, status, interpolated = getGeometryGrid().areaAt(inputAmps, bends, folds)
+    return areas.reshape(shape), status.reshape(shape), interpolated.reshape(shape)
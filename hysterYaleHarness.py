@@ -0,0 +1,279 @@
+# A script for sizing every busbar in a vehicle harness (or a whole product
+# family of harnesses) at once. The harness is given as a netlist: one entry
+# per bar with the columns below.
+# # id: a name for the bar, copied to the results.
+# # current: the current the bar has to carry in amps.
+# # length: the length of the bar (optional). When it is given the ampacity is
+# # # corrected for the length with hysterYaleThermal.py (--end-temperature
+# # # sets the temperature of the ends) and the mass of copper in the bar is
+# # # worked out.
+# # bends, folds: the geometry of the bar.
+#
+# The bars are sized in chunks of CHUNK_BARS with calculateAreaBatch (or
+# calculateAreaForLengthBatch for bars with a length). With more than one
+# worker the chunks are sized in a process pool, and the compiled dataset
+# (see hysterYaleDataset.py) is copied into shared memory once so that every
+# worker builds its tables from the same memory instead of reading the CSV
+# files again.
+#
+# As well as the result for each bar, a summary is made of the total copper
+# cross-section, volume and mass of the bars that could be sized.
+#
+# Example:
+# # python hysterYaleHarness.py netlist.csv results.csv --workers 4
+
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from hysterYaleEquations import calculateAreaBatch
+from hysterYaleEquations import convertUnits
+from hysterYaleEquations import useGeometryTables
+from hysterYaleEquations import STATUS_OK
+from hysterYaleEquations import STATUS_ERROR
+from hysterYaleEquations import STATUS_NAMES
+from hysterYaleDataset import CompiledDataset
+from hysterYaleDataset import getDataset
+from hysterYaleSizing import AREA_ERRORS
+from hysterYaleSizing import AREA_UNKNOWN_ERROR
+from hysterYaleSizing import AREA_INVALID_INPUT
+from hysterYaleSizing import SizingError
+from hysterYaleSizing import X_AREA_UNITS
+from hysterYaleSizing import checkGeometry
+from hysterYaleSizing import checkLength
+from hysterYaleBatch import NOT_AN_OBJECT
+from hysterYaleThermal import calculateAreaForLengthBatch
+from hysterYaleThermal import STATUS_RESULTS
+from hysterYaleThermal import ThermalModel
+
+CHUNK_BARS = 4096 #The number of bars sized at a time.
+COPPER_DENSITY = 8960 #The density of copper in kg/m³.
+RESULT_COLUMNS = ["id", "current", "length", "bends", "folds", "area", "areaUnits", "mass", "status", "error"]
+
+# The result of sizing one bar. 'area' is in the harness's area units and
+# 'mass' is in kg, and both are None if the bar could not be sized (or, for
+# 'mass', if it has no length). 'status' is "ok", "invalid input", or one of
+# the names in STATUS_NAMES, and 'error' is the message for the user.
+class BarResult:
+    def __init__(self, barId, current, length, bends, folds):
+        self.id = barId
+        self.current = current
+        self.length = length
+        self.bends = bends
+        self.folds = folds
+        self.area = None
+        self.mass = None
+        self.status = "ok"
+        self.error = ""
+
+    def toDict(self, areaUnits):
+        return {"id": self.id, "current": self.current, "length": self.length, "bends": self.bends,
+                "folds": self.folds, "area": self.area, "areaUnits": areaUnits, "mass": self.mass,
+                "status": self.status, "error": self.error}
+
+# The totals for a harness.
+# # 'totalArea' is the sum of the cross-sectional areas of the bars that were
+# # # sized, in the harness's area units.
+# # 'totalVolume' (m³) and 'totalMass' (kg) are for the sized bars that have a
+# # # length, of which there are 'barsWithMass'.
+# # 'statusCounts' is a dictionary of the form {status: number of bars, ...}.
+class HarnessSummary:
+    def __init__(self, areaUnits):
+        self.areaUnits = areaUnits
+        self.barCount = 0
+        self.sizedCount = 0
+        self.barsWithMass = 0
+        self.totalArea = 0.0
+        self.totalVolume = 0.0
+        self.totalMass = 0.0
+        self.statusCounts = {}
+
+    def add(self, result):
+        self.barCount += 1
+        self.statusCounts[result.status] = self.statusCounts.get(result.status, 0) + 1
+        if (result.area is None):
+            return
+        self.sizedCount += 1
+        self.totalArea += result.area
+        if (result.mass is not None):
+            self.barsWithMass += 1
+            self.totalVolume += result.mass/COPPER_DENSITY
+            self.totalMass += result.mass
+
+    def toDict(self):
+        return {"bars": self.barCount, "sized": self.sizedCount, "barsWithMass": self.barsWithMass,
+                "totalArea": self.totalArea, "areaUnits": self.areaUnits, "totalVolume_m3": self.totalVolume,
+                "totalMass_kg": self.totalMass, "statusCounts": dict(self.statusCounts)}
+
+# The results of sizing a harness: a BarResult for every bar in the netlist, in
+# the same order, and the HarnessSummary.
+class HarnessResult:
+    def __init__(self, bars, summary):
+        self.bars = bars
+        self.summary = summary
+
+# Sizes a chunk of bars given as NumPy arrays. 'lengths' is in meters and is
+# NaN for bars without a length. Returns arrays of cross-sectional areas (m²)
+# and STATUS_ codes. Lengths are corrected for with 'lengthModel' (see
+# hysterYaleThermal.py). Runs in the worker processes when a pool is used.
+def sizeBarArrays(currents, lengths, bends, folds, lengthModel=None):
+    areas = np.full(currents.shape, np.nan)
+    status = np.full(currents.shape, STATUS_ERROR, dtype=np.int8)
+    withoutLength = np.flatnonzero(np.isnan(lengths))
+    withLength = np.flatnonzero(~np.isnan(lengths))
+    if (len(withoutLength) > 0):
+        areas[withoutLength], status[withoutLength] = calculateAreaBatch(
+            currents[withoutLength], bends[withoutLength], folds[withoutLength])
+    if (len(withLength) > 0):
+        areas[withLength], status[withLength] = calculateAreaForLengthBatch(
+            currents[withLength], lengths[withLength], bends[withLength], folds[withLength], lengthModel)
+    return areas, status
+
+# The shared memory the worker's tables were built from. It is kept here so it
+# stays open for as long as the worker does.
+_sharedTables = None
+
+# Copies the compiled dataset into a new block of shared memory. The caller
+# must close and unlink it when the workers are done.
+def publishTables():
+    dataset = getDataset()
+    size = len(dataset.buffer)
+    sharedTables = shared_memory.SharedMemory(create=True, size=size)
+    sharedTables.buf[:size] = dataset.buffer[:size]
+    return sharedTables
+
+# Run once in each worker process: builds every geometry table from the
+# dataset in the shared memory called 'name' and makes the lookups use them.
+def attachTables(name):
+    global _sharedTables
+    _sharedTables = shared_memory.SharedMemory(name=name)
+    useGeometryTables(CompiledDataset(name, _sharedTables.buf).geometryTables())
+
+# Checks one netlist entry and returns its BarResult and its length in meters
+# (None if it has no length). Bars with invalid inputs are marked as such, the
+# same way hysterYaleBatch.py marks them, as are JSON Lines rows that are not
+# objects.
+def readBar(bar, lengthUnits):
+    if (not isinstance(bar, dict)):
+        result = BarResult("", None, None, None, None)
+        result.status = "invalid input"
+        result.error = NOT_AN_OBJECT
+        return result, None
+    length = bar.get("length")
+    if (length is None or str(length).strip() == ""):
+        length = None
+    result = BarResult(bar.get("id", ""), bar.get("current"), length, bar.get("bends"), bar.get("folds"))
+    try:
+        meters = checkLength(length, lengthUnits, AREA_INVALID_INPUT)
+        result.current = float(result.current)
+        result.bends, result.folds = checkGeometry(result.bends, result.folds, AREA_INVALID_INPUT)
+    except (TypeError, ValueError):
+        result.status = "invalid input"
+        result.error = AREA_INVALID_INPUT
+        return result, None
+    except SizingError as e:
+        result.status = e.status
+        result.error = e.message
+        return result, None
+    return result, meters
+
+# Sizes every bar in 'bars' (an iterable of dictionaries with the netlist
+# columns). Lengths are in 'lengthUnits' and the areas are given in
+# 'areaUnits', and 'lengthModel' is the ThermalModel used for the bars with a
+# length (hysterYaleThermal.DEFAULT_MODEL if None). With more than one worker
+# the chunks are sized in a process pool that shares the geometry tables.
+# Returns a HarnessResult.
+def sizeHarness(bars, lengthUnits="mm", areaUnits="mm²", workers=1, chunkBars=CHUNK_BARS, lengthModel=None):
+    if (areaUnits not in X_AREA_UNITS):
+        raise SizingError("Unknown cross-sectional area units: {0}".format(areaUnits))
+    results = []
+    lengths = []
+    for bar in bars:
+        result, meters = readBar(bar, lengthUnits)
+        results.append(result)
+        lengths.append(np.nan if meters is None else meters)
+
+    valid = [i for i, result in enumerate(results) if result.status == "ok"]
+    currents = np.array([results[i].current for i in valid], dtype=np.float64)
+    lengths = np.array(lengths, dtype=np.float64)[valid]
+    bends = np.array([results[i].bends for i in valid], dtype=np.int64)
+    folds = np.array([results[i].folds for i in valid], dtype=np.int64)
+    chunks = [slice(start, start + chunkBars) for start in range(0, len(valid), chunkBars)]
+    chunkArguments = [(currents[chunk], lengths[chunk], bends[chunk], folds[chunk], lengthModel) for chunk in chunks]
+
+    if (workers <= 1 or len(chunks) <= 1):
+        sized = [sizeBarArrays(*arguments) for arguments in chunkArguments]
+    else:
+        sharedTables = publishTables()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=attachTables,
+                                     initargs=(sharedTables.name,)) as pool:
+                sized = list(pool.map(sizeBarArrays, *zip(*chunkArguments)))
+        finally:
+            sharedTables.close()
+            sharedTables.unlink()
+
+    areas = np.concatenate([chunkAreas for chunkAreas, chunkStatus in sized]) if sized else np.empty(0)
+    status = np.concatenate([chunkStatus for chunkAreas, chunkStatus in sized]) if sized else np.empty(0)
+    summary = HarnessSummary(areaUnits)
+    for i, area, code, length in zip(valid, areas.tolist(), status.tolist(), lengths.tolist()):
+        result = results[i]
+        if (code != STATUS_OK):
+            result.status = STATUS_NAMES.get(code, STATUS_NAMES[STATUS_ERROR])
+            result.error = AREA_ERRORS.get(STATUS_RESULTS.get(code), AREA_UNKNOWN_ERROR)
+            continue
+        result.area = convertUnits("m²", area, areaUnits)
+        if (not np.isnan(length)):
+            result.mass = area*length*COPPER_DENSITY
+    for result in results:
+        summary.add(result)
+    return HarnessResult(results, summary)
+
+# Reads a netlist from a CSV or JSON Lines file.
+def readNetlist(path):
+    with open(path, mode='r', newline='', encoding='utf-8-sig') as netlistFile:
+        if (path.lower().endswith((".jsonl", ".ndjson"))):
+            return [json.loads(line) for line in netlistFile if line.strip() != ""]
+        return list(csv.DictReader(netlistFile))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Size every busbar in a harness netlist.")
+    parser.add_argument("netlist", help="CSV or JSON Lines netlist with id, current, length, bends and folds")
+    parser.add_argument("output", help="CSV file to write the result for each bar to")
+    parser.add_argument("--length-units", choices=["mm", "cm", "m", "in"], default="mm", help="units of the lengths (default mm)")
+    parser.add_argument("--units", default="mm²", help="cross-sectional area units of the results (default mm²)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (default 1)")
+    parser.add_argument("--end-temperature", type=float, help="temperature of the ends of the bars in °C (default: the temperature limit)")
+    args = parser.parse_args(argv)
+
+    lengthModel = None
+    if (args.end_temperature is not None):
+        lengthModel = ThermalModel(endTemperature=args.end_temperature)
+    try:
+        harness = sizeHarness(readNetlist(args.netlist), args.length_units, args.units, args.workers,
+                              lengthModel=lengthModel)
+    except (OSError, ValueError, SizingError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    with open(args.output, mode='w', newline='', encoding='utf-8') as outputFile:
+        writer = csv.DictWriter(outputFile, fieldnames=RESULT_COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(result.toDict(args.units) for result in harness.bars)
+
+    summary = harness.summary
+    print("Sized {0} of {1} bars".format(summary.sizedCount, summary.barCount))
+    for status, count in sorted(summary.statusCounts.items()):
+        print("  {0}: {1}".format(status, count))
+    print("Total copper cross-section: {0:.6g} {1}".format(summary.totalArea, summary.areaUnits))
+    print("Total copper mass: {0:.6g} kg ({1:.6g} m³, {2} bars with a length)".format(
+        summary.totalMass, summary.totalVolume, summary.barsWithMass))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
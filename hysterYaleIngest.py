@@ -0,0 +1,254 @@
+# A command-line script for adding the results of new thermal tests to the
+# busbar-data-*folds-*bends.csv files straight from the lab's raw logs, instead
+# of reducing each test to an (area, 90-degree ampacity) pair by hand.
+#
+# A raw log is a CSV file with a header row and one row per sample. It must
+# have the columns below (in any order, other columns are ignored):
+# # test: a name for the test bar. The samples of one test must be next to
+# # # each other and in the order they were taken.
+# # folds, bends: the geometry of the test bar.
+# # area: the cross-sectional area of the test bar in m².
+# # current: the current running through the bar in amps.
+# # temperature: the surface temperature of the bar in °C.
+#
+# The log is read in chunks of rows by a generator, and only the sample before
+# the current one is remembered for each test, so logs of any size are read in
+# a fixed amount of memory. For each test, the current at which the surface
+# temperature first rises to TEMPERATURE_LIMIT is found with the Linear
+# Interpolation Formula between the samples on either side. That current is
+# then written into the geometry's CSV file: it replaces the ampacity of a row
+# with the same cross-sectional area, or is added as a new row. Tests that
+# never reach the limit, or start above it, are reported and skipped.
+#
+# The logs that have been ingested are recorded (with their size and
+# modification time) in LEDGER_FILE, so running the script again on the same
+# logs only reads the new ones. Use --force to read them all again.
+#
+# Example:
+# # python hysterYaleIngest.py logs/test-0412.csv logs/test-0413.csv
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+
+from hysterYaleEquations import geometryCsvPath
+from hysterYaleEquations import getDataDirectory
+
+TEMPERATURE_LIMIT = 90 #The surface temperature (°C) the tables are sized for.
+LOG_COLUMNS = ["test", "folds", "bends", "area", "current", "temperature"] #The columns every raw log needs.
+LEDGER_FILE = "busbar-ingest-ledger.json" #The record of the logs that have been ingested.
+CHUNK_ROWS = 65536 #The number of log rows read at a time.
+FLUSH_RESULTS = 1000 #The number of test results held before they are written to the tables.
+AREA_TOLERANCE = 1e-6 #Areas this close (relative to their size) are treated as the same bar.
+CSV_HEADER = ["Cross-sectional area", "90-degree ampacity"]
+
+# The result of one test bar. 'current' is the current (A) at which the bar
+# reached TEMPERATURE_LIMIT, or None if it never did.
+class TestResult:
+    def __init__(self, test, folds, bends, area, current, reason=""):
+        self.test = test
+        self.folds = folds
+        self.bends = bends
+        self.area = area
+        self.current = current
+        self.reason = reason
+
+# Yields the samples of a raw log in lists of at most 'chunkRows' samples.
+# Each sample is a tuple of (test, folds, bends, area, current, temperature).
+# Raises ValueError if the log is missing one of the LOG_COLUMNS.
+def readLogChunks(logPath, chunkRows=CHUNK_ROWS):
+    with open(logPath, mode='r', newline='') as logFile:
+        reader = csv.reader(logFile)
+        header = [name.strip().lower() for name in next(reader, [])]
+        missing = [name for name in LOG_COLUMNS if name not in header]
+        if (missing):
+            raise ValueError("{0} is missing the column(s): {1}".format(logPath, ", ".join(missing)))
+        test, folds, bends, area, current, temperature = [header.index(name) for name in LOG_COLUMNS]
+
+        lineNumber = 1
+        while True:
+            rows = list(itertools.islice(reader, chunkRows))
+            if (not rows):
+                return
+            chunk = []
+            for row in rows:
+                lineNumber += 1
+                if (not row):
+                    continue
+                try:
+                    chunk.append((row[test], int(row[folds]), int(row[bends]), float(row[area]),
+                                  float(row[current]), float(row[temperature])))
+                except (IndexError, ValueError):
+                    raise ValueError("{0} line {1} is not a valid sample.".format(logPath, lineNumber))
+            yield chunk
+
+# Goes through the chunks from readLogChunks() and yields a TestResult for
+# every test as soon as its last sample has been read.
+def findCrossings(chunks, limit=TEMPERATURE_LIMIT):
+    testKey = None
+    previous = None
+    result = None
+    for chunk in chunks:
+        for sample in chunk:
+            test, folds, bends, area, current, temperature = sample
+            if ((test, folds, bends, area) != testKey):
+                if (testKey is not None):
+                    yield finishTest(testKey, result)
+                testKey = (test, folds, bends, area)
+                result = None
+                if (temperature >= limit):
+                    result = TestResult(test, folds, bends, area, None, "started above the limit")
+            elif (result is None and temperature >= limit):
+                previousCurrent, previousTemperature = previous[4], previous[5]
+                # Use the Linear Interpolation Formula between the two samples.
+                part1 = (current - previousCurrent)/(temperature - previousTemperature)
+                crossing = (part1*(limit - previousTemperature)) + previousCurrent
+                result = TestResult(test, folds, bends, area, crossing)
+            previous = sample
+    if (testKey is not None):
+        yield finishTest(testKey, result)
+
+# Returns the TestResult for a test once all of its samples have been read.
+def finishTest(testKey, result):
+    if (result is None):
+        test, folds, bends, area = testKey
+        return TestResult(test, folds, bends, area, None, "never reached the limit")
+    return result
+
+# Reads the rows of a geometry CSV as (area, ampacity, text of the row) so
+# rows that are not changed are written back exactly as they were.
+def readTableRows(csvPath):
+    rows = []
+    try:
+        with open(csvPath, mode='r', newline='') as csvFile:
+            reader = csv.reader(csvFile)
+            next(reader, None)
+            for row in reader:
+                if (row):
+                    rows.append((float(row[0]), float(row[1]), row[:2]))
+    except FileNotFoundError:
+        pass
+    return rows
+
+# Adds the {area: current} pairs in 'updates' to the table for a geometry in
+# 'directory', replacing the ampacity of any bar with the same area. The file
+# is written under a temporary name and then moved into place.
+def updateTable(directory, folds, bends, updates):
+    csvPath = os.path.join(directory, geometryCsvPath(folds, bends))
+    rows = readTableRows(csvPath)
+    updates = dict(updates)
+    for i, (area, amp, text) in enumerate(rows):
+        for newArea in list(updates):
+            if (abs(newArea - area) <= AREA_TOLERANCE*max(abs(area), abs(newArea))):
+                current = updates.pop(newArea)
+                rows[i] = (area, current, [text[0], repr(current)])
+                break
+    for area, current in updates.items():
+        rows.append((area, current, [repr(area), repr(current)]))
+    rows.sort(key=lambda row: row[0])
+
+    temporaryPath = csvPath + ".tmp"
+    with open(temporaryPath, mode='w', newline='') as csvFile:
+        writer = csv.writer(csvFile, lineterminator="\n")
+        writer.writerow(CSV_HEADER)
+        writer.writerows(row[2] for row in rows)
+    os.replace(temporaryPath, csvPath)
+
+# Writes every test result held in 'pending' ({(folds, bends): {area: current}})
+# to the tables and empties it.
+def flushResults(directory, pending):
+    for (folds, bends), updates in pending.items():
+        updateTable(directory, folds, bends, updates)
+    pending.clear()
+
+# Ingests one raw log into the tables in 'directory' (the program's data
+# folder by default). Returns the list of TestResults (one per test, so its
+# size does not depend on the length of the log).
+def ingestLog(logPath, directory=None, chunkRows=CHUNK_ROWS):
+    if (directory is None):
+        directory = getDataDirectory()
+    results = []
+    pending = {}
+    pendingCount = 0
+    for result in findCrossings(readLogChunks(logPath, chunkRows)):
+        results.append(result)
+        if (result.current is None):
+            continue
+        pending.setdefault((result.folds, result.bends), {})[result.area] = result.current
+        pendingCount += 1
+        if (pendingCount >= FLUSH_RESULTS):
+            flushResults(directory, pending)
+            pendingCount = 0
+    flushResults(directory, pending)
+    return results
+
+# Returns the (size, modification time) used to tell whether a log has
+# changed since it was ingested.
+def logSignature(logPath):
+    fileStats = os.stat(logPath)
+    return [fileStats.st_size, fileStats.st_mtime_ns]
+
+def readLedger(directory):
+    try:
+        with open(os.path.join(directory, LEDGER_FILE), mode='r') as ledgerFile:
+            return json.load(ledgerFile)
+    except FileNotFoundError:
+        return {}
+
+def writeLedger(directory, ledger):
+    ledgerPath = os.path.join(directory, LEDGER_FILE)
+    with open(ledgerPath + ".tmp", mode='w') as ledgerFile:
+        json.dump(ledger, ledgerFile, indent=2, sort_keys=True)
+    os.replace(ledgerPath + ".tmp", ledgerPath)
+
+# Ingests every log in 'logPaths' that has not been ingested before (or every
+# one of them if 'force' is True). Returns a dictionary of the form
+# {log path: list of TestResults or None if it was skipped}.
+def ingestLogs(logPaths, directory=None, chunkRows=CHUNK_ROWS, force=False):
+    if (directory is None):
+        directory = getDataDirectory()
+    ledger = readLedger(directory)
+    report = {}
+    for logPath in logPaths:
+        key = os.path.abspath(logPath)
+        signature = logSignature(logPath)
+        if (not force and ledger.get(key) == signature):
+            report[logPath] = None
+            continue
+        report[logPath] = ingestLog(logPath, directory, chunkRows)
+        ledger[key] = signature
+        writeLedger(directory, ledger)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add the results of raw thermal test logs to the geometry tables.")
+    parser.add_argument("logs", nargs="+", help="raw log CSV files")
+    parser.add_argument("--directory", help="directory holding the geometry tables (default: the program's data folder)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="log rows read at a time")
+    parser.add_argument("--force", action="store_true", help="read logs again even if they were ingested before")
+    args = parser.parse_args(argv)
+
+    try:
+        report = ingestLogs(args.logs, args.directory, args.chunk_rows, args.force)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    for logPath, results in report.items():
+        if (results is None):
+            print("{0}: already ingested".format(logPath))
+            continue
+        print("{0}: {1} test(s)".format(logPath, len(results)))
+        for result in results:
+            if (result.current is None):
+                print("  {0} ({1} folds, {2} bends, {3!r} m²): {4}".format(
+                    result.test, result.folds, result.bends, result.area, result.reason))
+            else:
+                print("  {0} ({1} folds, {2} bends, {3!r} m²): {4:.3f} A".format(
+                    result.test, result.folds, result.bends, result.area, result.current))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
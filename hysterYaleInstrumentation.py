@@ -0,0 +1,266 @@
+# A script for finding out where the time goes when busbars are sized, and
+# what the lookups returned. Nothing is recorded until enable() is called;
+# until then calculateArea, calculateAmp and the batch functions only check
+# one variable in hysterYaleEquations.py per call.
+#
+# Three phases are timed for each geometry:
+# # load: reading the geometry's table from the compiled dataset or CSV file
+# # # and sorting and indexing it. This only happens the first time a table
+# # # is used and again after its CSV file changes.
+# # lookup: finding the geometry's table, which checks whether its CSV file
+# # # has changed. When the table has to be loaded this includes the load.
+# # interpolate: searching the table and using the Linear Interpolation Formula.
+# The results are counted by kind ("ok", "above range" for -1, "below range"
+# for -2, "no data" for -3 and "error" for -99), and the most recent errors
+# are kept with their messages.
+#
+# Everything can be exported as JSON or in the Prometheus text format.
+#
+# Example:
+# # import hysterYaleInstrumentation
+# # instrumentation = hysterYaleInstrumentation.enable()
+# # ... size some busbars ...
+# # print(instrumentation.toPrometheus())
+# # hysterYaleInstrumentation.disable()
+
+import bisect
+import json
+import threading
+import time
+from collections import deque
+
+import hysterYaleEquations
+from hysterYaleEquations import STATUS_NO_DATA
+from hysterYaleEquations import STATUS_ERROR
+from hysterYaleEquations import STATUS_NAMES
+
+# The upper bounds of the latency histogram buckets in nanoseconds, from 1 µs
+# to 10 s. Anything slower goes in a final bucket with no upper bound.
+BUCKET_BOUNDS_NS = [bound*scale for scale in (1000, 10**4, 10**5, 10**6, 10**7, 10**8, 10**9)
+                    for bound in (1, 2, 5)] + [10**10]
+MAX_ERRORS = 20 #The number of recent errors kept.
+MAX_GEOMETRIES = 64 #The most geometries kept apart; any more are recorded together under OTHER_GEOMETRY.
+INVALID_GEOMETRY = "invalid" #The folds or bends recorded for values that are not whole numbers.
+OTHER_GEOMETRY = ("other", "other") #The (folds, bends) everything past MAX_GEOMETRIES is recorded under.
+
+# Returns the text folds or bends are recorded under: the whole number itself,
+# so 1, 1.0 and "1" are the same, or INVALID_GEOMETRY for anything else.
+def geometryLabel(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return INVALID_GEOMETRY
+    if (not value.is_integer()):
+        return INVALID_GEOMETRY
+    return str(int(value))
+
+# A histogram of how long something took. 'counts[i]' is the number of times
+# it took at most BUCKET_BOUNDS_NS[i] (and longer than the bound before it),
+# and the last count is for everything slower than the largest bound.
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0]*(len(BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.totalNs = 0
+
+    def observe(self, elapsedNs):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_NS, elapsedNs)] += 1
+        self.count += 1
+        self.totalNs += elapsedNs
+
+    def toDict(self):
+        return {"count": self.count, "sum_s": self.totalNs / 1e9,
+                "mean_us": self.totalNs / self.count / 1000 if self.count else None,
+                "buckets_s": [[bound / 1e9, count] for bound, count in zip(BUCKET_BOUNDS_NS, self.counts)]
+                             + [[None, self.counts[-1]]]}
+
+# Everything recorded for one geometry. 'phases' is a dictionary of the form
+# {(function, phase): LatencyHistogram, ...} and 'results' is a dictionary of
+# the form {(function, kind of result): count, ...}. Loads are recorded under
+# the function "load" because they happen for whichever function asks first.
+class GeometryStats:
+    def __init__(self):
+        self.phases = {}
+        self.results = {}
+
+    def observe(self, function, phase, elapsedNs):
+        histogram = self.phases.get((function, phase))
+        if (histogram is None):
+            histogram = self.phases[(function, phase)] = LatencyHistogram()
+        histogram.observe(elapsedNs)
+
+    def count(self, function, result, amount=1):
+        self.results[(function, result)] = self.results.get((function, result), 0) + amount
+
+# Records the timings and results sent to it by hysterYaleEquations.py while
+# it is enabled. It can be shared between threads.
+class Instrumentation:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    # Forgets everything that has been recorded.
+    def reset(self):
+        with self.lock:
+            self.geometries = {}
+            self.errors = deque(maxlen=MAX_ERRORS)
+            self.started = time.time()
+
+    # Returns the GeometryStats for a geometry. 'folds' and 'bends' are kept
+    # as text (see geometryLabel()), and once MAX_GEOMETRIES geometries have
+    # been seen any new ones share OTHER_GEOMETRY, so however many different
+    # values clients send the memory used stays bounded. Must hold the lock.
+    def _getStats(self, folds, bends):
+        key = (geometryLabel(folds), geometryLabel(bends))
+        stats = self.geometries.get(key)
+        if (stats is None):
+            if (len(self.geometries) >= MAX_GEOMETRIES):
+                key = OTHER_GEOMETRY
+                stats = self.geometries.get(key)
+            if (stats is None):
+                stats = self.geometries[key] = GeometryStats()
+        return stats
+
+    def _recordError(self, function, folds, bends, error):
+        self.errors.append({"time": time.time(), "function": function, "folds": geometryLabel(folds),
+                            "bends": geometryLabel(bends), "error": type(error).__name__, "message": str(error)})
+
+    # Called by getGeometryTable in place of loadGeometryTable(folds, bends,
+    # signature) to time the load.
+    def measureLoad(self, load, folds, bends, signature):
+        start = time.perf_counter_ns()
+        table = load(folds, bends, signature)
+        elapsed = time.perf_counter_ns() - start
+        with self.lock:
+            self._getStats(folds, bends).observe("load", "load", elapsed)
+        return table
+
+    # Called by calculateArea and calculateAmp in place of their usual body.
+    # Finds the table, runs 'fromTable' (areaFromTable or ampFromTable) on it
+    # and records how long each part took and what was returned. Returns the
+    # same result the function would have.
+    def measure(self, function, fromTable, inputValue, bends, folds):
+        clock = time.perf_counter_ns
+        start = clock()
+        found = None
+        error = None
+        try:
+            try:
+                table = hysterYaleEquations.getGeometryTable(folds, bends)
+            except FileNotFoundError:
+                result = -3
+            else:
+                found = clock()
+                result = fromTable(table, inputValue)
+        except Exception as e:
+            error = e
+            result = -99
+        end = clock()
+        lookupTime = (end if found is None else found) - start
+        interpolateTime = None if found is None else end - found
+
+        with self.lock:
+            stats = self._getStats(folds, bends)
+            stats.observe(function, "lookup", lookupTime)
+            if (interpolateTime is not None):
+                stats.observe(function, "interpolate", interpolateTime)
+            # Negative numbers other than -1, -2, -3 and -99 are unknown errors, the
+            # same as in sizeArea and sizeAmp.
+            stats.count(function, STATUS_NAMES.get(-result, STATUS_NAMES[STATUS_ERROR]) if result < 0 else "ok")
+            if (error is not None):
+                self._recordError(function, folds, bends, error)
+        return result
+
+    # Called by the batch functions for each geometry in a batch in place of
+    # finding the table and running 'lookup' on it. Records one lookup and one
+    # interpolation for the whole group, and counts every value's status.
+    # Returns the arrays of results and status codes.
+    def measureBatch(self, function, lookup, inputValues, bends, folds, *extras):
+        import numpy as np
+
+        clock = time.perf_counter_ns
+        start = clock()
+        found = None
+        error = None
+        results = np.full(inputValues.shape, np.nan)
+        status = np.full(inputValues.shape, STATUS_ERROR, dtype=np.int8)
+        try:
+            table = hysterYaleEquations.getGeometryTable(folds, bends)
+        except FileNotFoundError:
+            status[:] = STATUS_NO_DATA
+        except Exception as e:
+            error = e
+        else:
+            found = clock()
+            results, status = lookup(table, inputValues, *extras)
+        end = clock()
+        lookupTime = (end if found is None else found) - start
+        interpolateTime = None if found is None else end - found
+
+        codes, counts = np.unique(status, return_counts=True)
+        with self.lock:
+            stats = self._getStats(folds, bends)
+            stats.observe(function, "lookup", lookupTime)
+            if (interpolateTime is not None):
+                stats.observe(function, "interpolate", interpolateTime)
+            for code, count in zip(codes.tolist(), counts.tolist()):
+                stats.count(function, STATUS_NAMES.get(code, STATUS_NAMES[STATUS_ERROR]), count)
+            if (error is not None):
+                self._recordError(function, folds, bends, error)
+        return results, status
+
+    # Returns everything recorded as a dictionary that can be saved as JSON.
+    def toDict(self):
+        with self.lock:
+            geometries = []
+            for (folds, bends), stats in sorted(self.geometries.items()):
+                functions = {}
+                for (function, phase), histogram in sorted(stats.phases.items()):
+                    functions.setdefault(function, {}).setdefault("phases", {})[phase] = histogram.toDict()
+                for (function, result), count in sorted(stats.results.items()):
+                    functions.setdefault(function, {}).setdefault("results", {})[result] = count
+                geometries.append({"folds": folds, "bends": bends, "functions": functions})
+            return {"started": self.started, "geometries": geometries, "errors": list(self.errors)}
+
+    def toJson(self, indent=2):
+        return json.dumps(self.toDict(), indent=indent, ensure_ascii=False)
+
+    # Returns everything recorded in the Prometheus text exposition format.
+    def toPrometheus(self):
+        lines = ["# HELP busbar_phase_seconds Time spent in each phase of a busbar sizing lookup.",
+                 "# TYPE busbar_phase_seconds histogram"]
+        resultLines = ["# HELP busbar_results_total Busbar sizing results by kind.",
+                       "# TYPE busbar_results_total counter"]
+        with self.lock:
+            for (folds, bends), stats in sorted(self.geometries.items()):
+                for (function, phase), histogram in sorted(stats.phases.items()):
+                    labels = 'function="{0}",folds="{1}",bends="{2}",phase="{3}"'.format(
+                        prometheusLabel(function), prometheusLabel(folds), prometheusLabel(bends), phase)
+                    cumulative = 0
+                    for bound, count in zip(BUCKET_BOUNDS_NS, histogram.counts):
+                        cumulative += count
+                        lines.append('busbar_phase_seconds_bucket{{{0},le="{1!r}"}} {2}'.format(
+                            labels, bound / 1e9, cumulative))
+                    lines.append('busbar_phase_seconds_bucket{{{0},le="+Inf"}} {1}'.format(labels, histogram.count))
+                    lines.append("busbar_phase_seconds_sum{{{0}}} {1!r}".format(labels, histogram.totalNs / 1e9))
+                    lines.append("busbar_phase_seconds_count{{{0}}} {1}".format(labels, histogram.count))
+                for (function, result), count in sorted(stats.results.items()):
+                    resultLines.append('busbar_results_total{{function="{0}",folds="{1}",bends="{2}",result="{3}"}} {4}'.format(
+                        prometheusLabel(function), prometheusLabel(folds), prometheusLabel(bends), result, count))
+        return "\n".join(lines + resultLines) + "\n"
+
+# Escapes a value for use inside a Prometheus label.
+def prometheusLabel(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+# Starts recording. Returns the Instrumentation object the timings and results
+# are recorded in (a new one unless 'instrumentation' is given).
+def enable(instrumentation=None):
+    if (instrumentation is None):
+        instrumentation = Instrumentation()
+    hysterYaleEquations.setInstrumentation(instrumentation)
+    return instrumentation
+
+# Stops recording. Whatever was recorded stays in the Instrumentation object.
+def disable():
+    hysterYaleEquations.setInstrumentation(None)
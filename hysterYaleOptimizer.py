@@ -0,0 +1,102 @@
+# A script for finding the busbar geometry that can carry a given current with
+# the smallest cross-sectional area. Instead of trying every combination of
+# bends and folds by hand, every tested geometry table is checked and the
+# geometries are ranked by the cross-sectional area they need.
+#
+# Each geometry has a precomputed envelope (the lowest and highest ampacity it
+# was tested at). A geometry whose envelope does not contain the target
+# current cannot carry it, so it is skipped without interpolating.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from hysterYaleEquations import calculateArea
+from hysterYaleEquations import getGeometryTable
+from hysterYaleDataset import findGeometryCsvs
+
+# The range of ampacities one geometry was tested at.
+class GeometryEnvelope:
+    def __init__(self, folds, bends, table):
+        self.folds = folds
+        self.bends = bends
+        self.minAmp = table.minAmp
+        self.maxAmp = table.maxAmp
+        self.table = table
+
+    # Returns True if the geometry was tested at currents both above and below
+    # 'targetAmp', so calculateArea has an answer for it.
+    def canCarry(self, targetAmp):
+        return self.minAmp <= targetAmp <= self.maxAmp
+
+# Returns a GeometryEnvelope for every geometry table in 'directory' (the data
+# folder by default), sorted by (folds, bends). The tables are cached by
+# hysterYaleEquations.py, so this only reads files that have changed.
+def getEnvelopes(directory=None):
+    return [GeometryEnvelope(folds, bends, getGeometryTable(folds, bends))
+            for folds, bends in sorted(findGeometryCsvs(directory))]
+
+# Ranks every tested geometry by the cross-sectional area (m²) it needs to
+# carry 'targetAmp' amps. Returns a list of (area, folds, bends) tuples with
+# the smallest area first. Geometries that cannot carry the current are left
+# out, so an empty list means no tested geometry can.
+#
+# If 'length' (m) is given, the areas are corrected for the length of the bar
+# with 'model' (see hysterYaleThermal.py), the same as sizing one geometry.
+def rankGeometries(targetAmp, length=None, model=None):
+    targetAmp = float(targetAmp)
+    if (length is not None):
+        # Imported here so the thermal model is only loaded when it is used.
+        from hysterYaleThermal import calculateAreaForLength
+    ranked = []
+    for envelope in getEnvelopes():
+        if (length is not None):
+            # The envelope is for the tested bars, and the correction can move
+            # it, so every geometry is checked.
+            xArea = calculateAreaForLength(targetAmp, length, envelope.bends, envelope.folds, model)
+        elif (envelope.canCarry(targetAmp)):
+            xArea = calculateArea(targetAmp, envelope.bends, envelope.folds)
+        else:
+            continue
+        if (xArea >= 0):
+            ranked.append((xArea, envelope.folds, envelope.bends))
+    ranked.sort()
+    return ranked
+
+# The batch version of rankGeometries for many target currents at once.
+# 'targetAmps' is an array (or list) of currents. Each geometry is evaluated
+# in its own thread (NumPy releases the GIL while it searches), and only the
+# targets inside the geometry's envelope are interpolated.
+#
+# Returns (geometries, areas, ranking):
+# # 'geometries' is a list of the (folds, bends) that were checked.
+# # 'areas' has shape (len(targetAmps), len(geometries)) and holds the area
+# # # each geometry needs for each target, or NaN if it cannot carry it.
+# # 'ranking' has the same shape and holds, for each target, the indexes into
+# # # 'geometries' from smallest to largest area, with the geometries that
+# # # cannot carry the target at the end.
+def rankGeometriesBatch(targetAmps, workers=None):
+    import numpy as np
+
+    targetAmps = np.asarray(targetAmps, dtype=np.float64).ravel()
+    envelopes = getEnvelopes()
+    geometries = [(envelope.folds, envelope.bends) for envelope in envelopes]
+    areas = np.full((len(targetAmps), len(envelopes)), np.nan)
+
+    def evaluate(column):
+        envelope = envelopes[column]
+        reachable = np.flatnonzero((targetAmps >= envelope.minAmp) & (targetAmps <= envelope.maxAmp))
+        if (len(reachable) > 0):
+            areas[reachable, column] = envelope.table.segments.minimumCrossingBatch(targetAmps[reachable])
+
+    if (workers is None):
+        workers = min(len(envelopes), os.cpu_count() or 1)
+    if (workers > 1 and len(envelopes) > 1):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(evaluate, range(len(envelopes))))
+    else:
+        for column in range(len(envelopes)):
+            evaluate(column)
+
+    # argsort puts NaN last, which keeps the unreachable geometries at the end.
+    ranking = np.argsort(areas, axis=1, kind='stable')
+    return geometries, areas, ranking
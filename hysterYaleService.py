@@ -0,0 +1,341 @@
+# A small HTTP/JSON server so other programs can size busbars without driving
+# the GUI. It only uses the Python standard library (plus NumPy for the batch
+# endpoints) and by default only listens on localhost. All of the geometry
+# tables are loaded once when the server starts and stay in memory.
+#
+# Every endpoint takes a POST with a JSON object and answers with a JSON
+# object. Errors are returned as {"error": {"status": ..., "message": ...}}
+# with an HTTP error code, instead of the negative numbers returned by
+# hysterYaleEquations.py.
+# # POST /calculateArea {"ampacity": 150, "bends": 0, "folds": 1}
+# # # -> {"area": 5.87e-06, "units": "m²"}
+# # POST /calculateAmp {"area": 7, "units": "mm²", "bends": 0, "folds": 1}
+# # # -> {"ampacity": 184.7, "units": "A"}
+# # # Both of these also take an optional "length" (in "lengthUnits", mm by
+# # # default) and "endTemperature" (°C), which are used the same way as the
+# # # GUI uses them (see hysterYaleSizing.py).
+# # POST /convertUnits {"value": 7, "inputUnits": "mm²", "outputUnits": "m²"}
+# # # -> {"value": 7e-06, "units": "m²"} ("value" can also be a list)
+# # POST /batch/calculateArea {"ampacities": [...], "bends": 0 or [...], "folds": 1 or [...]}
+# # # -> {"areas": [...], "status": [...], "units": "m²"}
+# # POST /batch/calculateAmp {"areas": [...], "bends": ..., "folds": ...}
+# # # -> {"ampacities": [...], "status": [...], "units": "A"}
+# # GET /health -> {"status": "ok", "geometries": [[folds, bends], ...]}
+# # GET /metrics -> the timings and result counts in the Prometheus text format
+# # GET /metrics.json -> the same as JSON
+# The /metrics endpoints are only there when the server is started with
+# --metrics (see hysterYaleInstrumentation.py).
+# In the batch answers, results that could not be calculated are null and the
+# matching status says why ("above range", "below range", "no data" or "error").
+#
+# Connections are kept open between requests (HTTP/1.1 keep-alive) unless the
+# client sends "Connection: close".
+#
+# Example:
+# # python hysterYaleService.py --port 8765 --metrics
+
+import argparse
+import asyncio
+import json
+
+from hysterYaleEquations import STATUS_OK
+from hysterYaleEquations import STATUS_ERROR
+from hysterYaleEquations import STATUS_NAMES
+from hysterYaleEquations import applyConversion
+from hysterYaleEquations import getConversion
+from hysterYaleEquations import getGeometryTable
+from hysterYaleEquations import getInstrumentation
+from hysterYaleDataset import findGeometryCsvs
+from hysterYaleSizing import SizingError
+from hysterYaleSizing import sizeArea
+from hysterYaleSizing import sizeAmp
+
+MAX_BODY_BYTES = 64*1024*1024 #The largest request body accepted.
+INLINE_BODY_BYTES = 64*1024 #Bodies larger than this are always parsed on a worker thread.
+ENCODE_CHUNK = 65536 #The most list items encoded by one json.dumps call.
+IDLE_TIMEOUT = 30 #Seconds a kept-alive connection may sit idle before it is closed.
+BATCH_INVALID_INPUT = ("The batch inputs must be a list of numbers, and bends and folds must be "
+                       "single numbers or lists of numbers the same length as the inputs.")
+
+# The HTTP code sent back for each kind of error.
+ERROR_CODES = {
+    "invalid input": 400,
+    "not found": 404,
+    "method not allowed": 405,
+    "too large": 413,
+    "above range": 422,
+    "below range": 422,
+    "no data": 422,
+    "error": 500,
+}
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+# An error that is sent back to the client as a JSON error object.
+class RequestError(Exception):
+    def __init__(self, message, status="invalid input"):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+# Returns the value of 'key' in the request, or raises a RequestError.
+def requireField(request, key):
+    if (key not in request):
+        raise RequestError("Missing field: {0}".format(key))
+    return request[key]
+
+# The types of the JSON numbers. true and false are not numbers here, although
+# Python treats them as 1 and 0.
+NUMBER_TYPES = {int, float}
+
+# Returns True if 'value' is a JSON number.
+def isNumber(value):
+    return type(value) in NUMBER_TYPES
+
+# Returns True if 'value' is a list of JSON numbers with nothing nested in it.
+# The types are gathered in one go so long lists are checked quickly.
+def isNumberList(value):
+    return isinstance(value, list) and set(map(type, value)) <= NUMBER_TYPES
+
+def handleCalculateArea(request):
+    result = sizeArea(requireField(request, "ampacity"), request.get("length"), requireField(request, "bends"),
+                      requireField(request, "folds"), lengthUnits=request.get("lengthUnits", "mm"),
+                      outputUnits=request.get("units", "m²"), endTemperature=request.get("endTemperature"))
+    return {"area": result.value, "units": result.units}
+
+def handleCalculateAmp(request):
+    result = sizeAmp(requireField(request, "area"), request.get("units", "m²"), request.get("length"),
+                     requireField(request, "bends"), requireField(request, "folds"),
+                     lengthUnits=request.get("lengthUnits", "mm"), endTemperature=request.get("endTemperature"))
+    return {"ampacity": result.value, "units": result.units}
+
+def handleConvertUnits(request):
+    inputUnits = requireField(request, "inputUnits")
+    outputUnits = requireField(request, "outputUnits")
+    if (not (isinstance(inputUnits, str) and isinstance(outputUnits, str))):
+        # Only names can be units, so anything else is unknown.
+        raise RequestError("Cannot convert {0} to {1}.".format(inputUnits, outputUnits))
+    try:
+        conversion = getConversion(inputUnits, outputUnits)
+    except ValueError as e:
+        raise RequestError(str(e))
+    value = requireField(request, "value")
+    if (isNumberList(value)):
+        # A whole list of values is converted in one go.
+        return {"value": applyConversion(conversion, value).tolist(), "units": outputUnits}
+    if (isNumber(value)):
+        return {"value": applyConversion(conversion, value), "units": outputUnits}
+    raise RequestError("Must input a valid number or list of numbers for value.")
+
+# Runs one of the batch functions in hysterYaleEquations.py and turns its
+# arrays into JSON lists. 'inputValues' must be a list of numbers, and 'bends'
+# and 'folds' must each be a number or a list of numbers.
+def runBatch(calculate, inputValues, bends, folds):
+    import numpy as np
+
+    if (not (isNumberList(inputValues)
+             and (isNumber(bends) or isNumberList(bends)) and (isNumber(folds) or isNumberList(folds)))):
+        raise RequestError(BATCH_INVALID_INPUT)
+    try:
+        results, status = calculate(inputValues, bends, folds)
+    except (TypeError, ValueError):
+        raise RequestError(BATCH_INVALID_INPUT)
+    results = np.where(status == STATUS_OK, results, np.nan).ravel()
+    return ([None if value != value else value for value in results.tolist()],
+            [STATUS_NAMES.get(code, STATUS_NAMES[STATUS_ERROR]) for code in status.ravel().tolist()])
+
+def handleBatchCalculateArea(request):
+    from hysterYaleEquations import calculateAreaBatch
+
+    areas, status = runBatch(calculateAreaBatch, requireField(request, "ampacities"),
+                             requireField(request, "bends"), requireField(request, "folds"))
+    return {"areas": areas, "status": status, "units": "m²"}
+
+def handleBatchCalculateAmp(request):
+    from hysterYaleEquations import calculateAmpBatch
+
+    ampacities, status = runBatch(calculateAmpBatch, requireField(request, "areas"),
+                                  requireField(request, "bends"), requireField(request, "folds"))
+    return {"ampacities": ampacities, "status": status, "units": "A"}
+
+# The POST endpoints. The batch endpoints are run on a worker thread so a big
+# batch (and parsing and encoding its JSON) does not hold up the other
+# connections.
+ENDPOINTS = {
+    "/calculateArea": (handleCalculateArea, False),
+    "/calculateAmp": (handleCalculateAmp, False),
+    "/convertUnits": (handleConvertUnits, False),
+    "/batch/calculateArea": (handleBatchCalculateArea, True),
+    "/batch/calculateAmp": (handleBatchCalculateAmp, True),
+}
+
+# Loads every geometry table so the first requests do not have to. Returns the
+# list of (folds, bends) that were loaded.
+def warmTables():
+    geometries = sorted(findGeometryCsvs())
+    for folds, bends in geometries:
+        getGeometryTable(folds, bends)
+    return geometries
+
+# Turns an answer into (body, content type): JSON, or plain text if 'answer' is
+# a string.
+def encodeAnswer(answer):
+    if (isinstance(answer, str)):
+        return answer.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    return encodeJson(answer), "application/json; charset=utf-8"
+
+# Encodes a JSON object as UTF-8. A json.dumps call keeps hold of the GIL until
+# it is done, which stops the event loop even when it runs on a worker thread,
+# so long lists (the batch results) are encoded ENCODE_CHUNK items at a time.
+def encodeJson(answer):
+    members = []
+    for key, value in answer.items():
+        if (isinstance(value, list) and len(value) > ENCODE_CHUNK):
+            pieces = [json.dumps(value[start:start + ENCODE_CHUNK], ensure_ascii=False)[1:-1]
+                      for start in range(0, len(value), ENCODE_CHUNK)]
+            text = "[" + ", ".join(pieces) + "]"
+        else:
+            text = json.dumps(value, ensure_ascii=False)
+        members.append(json.dumps(key, ensure_ascii=False) + ": " + text)
+    return ("{" + ", ".join(members) + "}").encode("utf-8")
+
+# Parses the JSON body of a POST, runs 'handler' on it and encodes the answer.
+# Returns (body, content type) or raises a RequestError or SizingError.
+def answerPost(handler, body):
+    try:
+        request = json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        raise RequestError("The request body must be a JSON object.")
+    if (not isinstance(request, dict)):
+        raise RequestError("The request body must be a JSON object.")
+    return encodeAnswer(handler(request))
+
+# Works out the answer to one request. Returns (HTTP code, (body, content
+# type)). Batch requests and big bodies are answered on a worker thread, so
+# the event loop is free to serve other connections in the meantime.
+async def answerRequest(method, path, body, geometries):
+    if (method == "GET" and path == "/health"):
+        return 200, encodeAnswer({"status": "ok", "geometries": [list(geometry) for geometry in geometries]})
+    instrumentation = getInstrumentation()
+    if (method == "GET" and instrumentation is not None):
+        if (path == "/metrics"):
+            return 200, encodeAnswer(instrumentation.toPrometheus())
+        if (path == "/metrics.json"):
+            return 200, encodeAnswer(instrumentation.toDict())
+    if (path not in ENDPOINTS):
+        raise RequestError("Unknown endpoint: {0}".format(path), "not found")
+    if (method != "POST"):
+        raise RequestError("Use POST for {0}".format(path), "method not allowed")
+
+    handler, runOnThread = ENDPOINTS[path]
+    if (runOnThread or len(body) > INLINE_BODY_BYTES):
+        return 200, await asyncio.get_running_loop().run_in_executor(None, answerPost, handler, body)
+    return 200, answerPost(handler, body)
+
+# Sends one HTTP response. 'encoded' is the (body, content type) from
+# encodeAnswer().
+async def writeResponse(writer, code, encoded, keepAlive):
+    body, contentType = encoded
+    header = ("HTTP/1.1 {0} {1}\r\n"
+              "Content-Type: {2}\r\n"
+              "Content-Length: {3}\r\n"
+              "Connection: {4}\r\n\r\n").format(code, REASONS.get(code, ""), contentType, len(body),
+                                                "keep-alive" if keepAlive else "close")
+    writer.write(header.encode("ascii") + body)
+    await writer.drain()
+
+# Reads the request line and headers. Returns (method, path, headers, version)
+# or None if the client closed the connection.
+async def readHead(reader):
+    requestLine = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+    if (not requestLine):
+        return None
+    try:
+        method, path, version = requestLine.decode("latin-1").split()
+    except ValueError:
+        raise RequestError("Malformed request line.")
+    headers = {}
+    while True:
+        line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+        if (line in (b"\r\n", b"\n", b"")):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, path.split("?", 1)[0], headers, version
+
+# Serves requests on one connection until the client closes it, asks to close
+# it, or leaves it idle for IDLE_TIMEOUT seconds.
+async def handleConnection(reader, writer, geometries):
+    try:
+        while True:
+            try:
+                head = await readHead(reader)
+            except RequestError as e:
+                await writeResponse(writer, 400, encodeAnswer({"error": {"status": e.status, "message": e.message}}), False)
+                break
+            if (head is None):
+                break
+            method, path, headers, version = head
+            connection = headers.get("connection", "").lower()
+            keepAlive = (connection != "close") and (version != "HTTP/1.0" or connection == "keep-alive")
+
+            try:
+                length = int(headers.get("content-length", "0"))
+            except ValueError:
+                length = -1
+            if (length < 0 or length > MAX_BODY_BYTES):
+                status = "too large" if length > MAX_BODY_BYTES else "invalid input"
+                await writeResponse(writer, ERROR_CODES[status], encodeAnswer({"error": {
+                    "status": status, "message": "Invalid Content-Length."}}), False)
+                break
+            body = await reader.readexactly(length)
+
+            try:
+                code, encoded = await answerRequest(method, path, body, geometries)
+            except (RequestError, SizingError) as e:
+                code = ERROR_CODES.get(e.status, 500)
+                encoded = encodeAnswer({"error": {"status": e.status, "message": e.message}})
+            except Exception as e:
+                code = 500
+                encoded = encodeAnswer({"error": {"status": "error", "message": str(e)}})
+            await writeResponse(writer, code, encoded, keepAlive)
+            if (not keepAlive):
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    except asyncio.CancelledError:
+        # The server is shutting down.
+        pass
+    finally:
+        writer.close()
+
+# Loads the tables and starts the server. Returns the asyncio server.
+async def startServer(host="127.0.0.1", port=8765):
+    geometries = warmTables()
+    return await asyncio.start_server(
+        lambda reader, writer: handleConnection(reader, writer, geometries), host, port)
+
+async def serve(host, port):
+    server = await startServer(host, port)
+    for sock in server.sockets:
+        print("Serving busbar sizing on http://{0}:{1}".format(*sock.getsockname()[:2]))
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve busbar sizing over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default 8765)")
+    parser.add_argument("--metrics", action="store_true", help="record timings and serve them on /metrics")
+    args = parser.parse_args(argv)
+    if (args.metrics):
+        import hysterYaleInstrumentation
+        hysterYaleInstrumentation.enable()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
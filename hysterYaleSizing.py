@@ -0,0 +1,277 @@
+# A script holding the parts of the busbar sizing program that do not need a
+# display: checking the user's inputs, converting units, and turning the
+# negative numbers returned by hysterYaleEquations.py into messages for the
+# user. Both the GUI (hysterYaleBusbarSizing.py) and the batch script
+# (hysterYaleBatch.py) call into this script, and it never imports tkinter, so
+# any other script can import it without a display.
+#
+# Both sizeArea and sizeAmp raise a SizingError holding the message to show to
+# the user if the inputs are not valid or the calculation fails. When a length
+# is given they correct for it with hysterYaleThermal.py, using 'lengthModel'
+# (a ThermalModel), or one with the ends of the bar held at 'endTemperature'
+# (°C) if that is given, or by default hysterYaleThermal.DEFAULT_MODEL.
+#
+# Running this script directly measures how long it takes to import in a fresh
+# Python process and checks it against IMPORT_BUDGET_MS. Giving it the path of
+# the packaged executable as well also measures how long the executable takes
+# from being started to having its window up and its first table loaded, and
+# checks that against STARTUP_BUDGET_MS.
+
+import sys
+
+from hysterYaleEquations import calculateArea
+from hysterYaleEquations import calculateAmp
+from hysterYaleEquations import convertUnits
+from hysterYaleEquations import STATUS_NAMES
+
+# The defined options for the different inputs
+X_AREA_UNITS = ["mm²","cm²","m²", "in²"] #The options that can be selected for cross-sectional area units.
+LENGTH_UNITS = ["mm","cm","m", "in"] #The options that can be selected.
+BEND_OPTIONS = [0, 1] #The options for the number of 90° bends in the bar.
+FOLD_OPTIONS = [0, 1, 2, 3, 4] #The options for the number of 180° folds in the bar.
+
+# The longest importing this script (and hysterYaleEquations.py) should take in
+# a fresh Python process, in milliseconds, and the number of times the import
+# is timed (the fastest counts).
+IMPORT_BUDGET_MS = 10
+IMPORT_RUNS = 5
+
+# The longest the packaged executable should take to start, in milliseconds,
+# and the environment variable that makes the GUI close as soon as it is
+# ready so the start can be timed.
+STARTUP_BUDGET_MS = 3000
+STARTUP_CHECK_VARIABLE = "BUSBAR_STARTUP_CHECK"
+
+# The messages for each of the negative numbers that calculateArea and
+# calculateAmp can return. Any other negative number is an unknown error.
+AREA_ERRORS = {
+    -1: "The inputted ampacity is above the currents tested experimentally.",
+    -2: "The inputted ampacity is below the currents tested experimentally.",
+    -3: "No busbars with the combination of bends and folds inputted were tested experimentally.",
+}
+AMP_ERRORS = {
+    -1: "The inputted cross-sectional area is above the busbar sizes tested experimentally.",
+    -2: "The inputted cross-sectional area is below the busbar sizes tested experimentally.",
+    -3: "No busbars with the combination of bends and folds inputted were tested experimentally.",
+}
+AREA_UNKNOWN_ERROR = "There was an unknown error when trying to calculate the cross-sectional area."
+AMP_UNKNOWN_ERROR = "There was an unknown error when trying to calculate the ampacity."
+AREA_INVALID_INPUT = "Must input a valid number for ampacity and length."
+AMP_INVALID_INPUT = "Must input a valid number for cross-sectional area and length."
+RANK_INVALID_INPUT = "Must input a valid number for ampacity."
+RANK_NO_GEOMETRY = "None of the busbar geometries tested experimentally can carry the inputted ampacity."
+END_TEMPERATURE_INVALID_INPUT = "Must input a valid number for the end temperature."
+
+# The error raised when a busbar could not be sized. 'message' is the text to
+# show the user and 'status' is one of "invalid input", "above range",
+# "below range", "no data" or "error".
+class SizingError(Exception):
+    def __init__(self, message, status="invalid input"):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+# The result of sizing a busbar. 'value' is the calculated cross-sectional
+# area or ampacity, in 'units'.
+class SizingResult:
+    def __init__(self, value, units):
+        self.value = value
+        self.units = units
+
+    def __repr__(self):
+        return "SizingResult({0!r}, {1!r})".format(self.value, self.units)
+
+# Raises the SizingError that goes with a negative number returned by
+# calculateArea or calculateAmp.
+def raiseCalculationError(calculated, errors, unknownError):
+    if (calculated in errors):
+        raise SizingError(errors[calculated], STATUS_NAMES[-calculated])
+    raise SizingError(unknownError, "error")
+
+# Checks that the length is a positive number in one of the LENGTH_UNITS and
+# returns it in meters. A length of None means no length was given, and None
+# is returned.
+def checkLength(length, lengthUnits, invalidInput):
+    if (length is None):
+        return None
+    if (lengthUnits not in LENGTH_UNITS):
+        raise SizingError("Unknown length units: {0}".format(lengthUnits))
+    try:
+        length = float(length)
+    except (TypeError, ValueError):
+        raise SizingError(invalidInput)
+    if (not length > 0):
+        raise SizingError(invalidInput)
+    return convertUnits(lengthUnits, length, "m")
+
+# Returns the ThermalModel for bars with their ends held at 'endTemperature'
+# (°C), or 'lengthModel' if no end temperature is given (None or blank).
+def checkEndTemperature(endTemperature, lengthModel=None):
+    if (endTemperature is None or str(endTemperature).strip() == ""):
+        return lengthModel
+    try:
+        endTemperature = float(endTemperature)
+    except (TypeError, ValueError):
+        raise SizingError(END_TEMPERATURE_INVALID_INPUT)
+    if (not abs(endTemperature) < float("inf")):
+        # NaN and infinity are not temperatures.
+        raise SizingError(END_TEMPERATURE_INVALID_INPUT)
+    # Imported here so that importing this script stays fast.
+    from hysterYaleThermal import ThermalModel
+    return ThermalModel(endTemperature=endTemperature)
+
+# Checks that 'bends' and 'folds' are whole numbers and returns them as ints.
+# Numbers that are not whole (or are not finite) were never tested, so they
+# raise the same "no data" SizingError as an untested geometry, which is what
+# calculateArea, calculateAmp and the batch functions give for them. Anything
+# that is not a number raises 'invalidInput'.
+def checkGeometry(bends, folds, invalidInput):
+    try:
+        bends = float(bends)
+        folds = float(folds)
+    except (TypeError, ValueError):
+        raise SizingError(invalidInput)
+    if (not (bends.is_integer() and folds.is_integer())):
+        raiseCalculationError(-3, AREA_ERRORS, AREA_UNKNOWN_ERROR)
+    return int(bends), int(folds)
+
+# Checks the inputs of sizeArea and returns them as (amp, length in meters or
+# None, bends, folds), or raises a SizingError.
+def checkAreaInputs(amp, length, bends, folds, lengthUnits="mm", outputUnits="m²"):
+    if (outputUnits not in X_AREA_UNITS):
+        raise SizingError("Unknown cross-sectional area units: {0}".format(outputUnits))
+    length = checkLength(length, lengthUnits, AREA_INVALID_INPUT)
+    try:
+        amp = float(amp)
+    except (TypeError, ValueError):
+        raise SizingError(AREA_INVALID_INPUT)
+    bends, folds = checkGeometry(bends, folds, AREA_INVALID_INPUT)
+    return amp, length, bends, folds
+
+# Checks the inputs of sizeAmp and returns them as (area in m², length in
+# meters or None, bends, folds), or raises a SizingError.
+def checkAmpInputs(xArea, xAreaUnits, length, bends, folds, lengthUnits="mm"):
+    if (xAreaUnits not in X_AREA_UNITS):
+        raise SizingError("Unknown cross-sectional area units: {0}".format(xAreaUnits))
+    length = checkLength(length, lengthUnits, AMP_INVALID_INPUT)
+    try:
+        xArea = convertUnits(xAreaUnits, float(xArea), "m²")
+    except (TypeError, ValueError):
+        raise SizingError(AMP_INVALID_INPUT)
+    bends, folds = checkGeometry(bends, folds, AMP_INVALID_INPUT)
+    return xArea, length, bends, folds
+
+# Turns the number returned by calculateArea (or calculateAreaForLength) into a
+# SizingResult in 'outputUnits', or raises the SizingError that goes with it.
+def areaResult(calculatedArea, outputUnits):
+    if (calculatedArea < 0):
+        raiseCalculationError(calculatedArea, AREA_ERRORS, AREA_UNKNOWN_ERROR)
+    return SizingResult(convertUnits("m²", calculatedArea, outputUnits), outputUnits)
+
+# Turns the number returned by calculateAmp (or calculateAmpForLength) into a
+# SizingResult in amps, or raises the SizingError that goes with it.
+def ampResult(calculatedAmp):
+    if (calculatedAmp < 0):
+        raiseCalculationError(calculatedAmp, AMP_ERRORS, AMP_UNKNOWN_ERROR)
+    return SizingResult(calculatedAmp, "A")
+
+# Calculates the cross-sectional area for a busbar carrying 'amp' amps. The
+# inputs can be strings straight from the user. Returns a SizingResult in
+# 'outputUnits' or raises a SizingError.
+def sizeArea(amp, length, bends, folds, lengthUnits="mm", outputUnits="m²", lengthModel=None,
+             endTemperature=None):
+    amp, length, bends, folds = checkAreaInputs(amp, length, bends, folds, lengthUnits, outputUnits)
+    lengthModel = checkEndTemperature(endTemperature, lengthModel)
+    if (length is None):
+        return areaResult(calculateArea(amp, bends, folds), outputUnits)
+    # Imported here so that importing this script stays fast.
+    from hysterYaleThermal import calculateAreaForLength
+    return areaResult(calculateAreaForLength(amp, length, bends, folds, lengthModel), outputUnits)
+
+# Calculates the ampacity of a busbar with a cross-sectional area of 'xArea'
+# in 'xAreaUnits'. The inputs can be strings straight from the user. Returns a
+# SizingResult in amps or raises a SizingError.
+def sizeAmp(xArea, xAreaUnits, length, bends, folds, lengthUnits="mm", lengthModel=None,
+            endTemperature=None):
+    xArea, length, bends, folds = checkAmpInputs(xArea, xAreaUnits, length, bends, folds, lengthUnits)
+    lengthModel = checkEndTemperature(endTemperature, lengthModel)
+    if (length is None):
+        return ampResult(calculateAmp(xArea, bends, folds))
+    # Imported here so that importing this script stays fast.
+    from hysterYaleThermal import calculateAmpForLength
+    return ampResult(calculateAmpForLength(xArea, length, bends, folds, lengthModel))
+
+# Ranks every tested geometry by the cross-sectional area it needs to carry
+# 'amp' amps (see hysterYaleOptimizer.py), for a bar 'length' long if a length
+# is given (corrected for the same way as in sizeArea). Returns a list of (SizingResult, folds, bends) with the smallest
+# area first, in 'outputUnits', or raises a SizingError if no tested geometry
+# can carry the current.
+def rankGeometries(amp, outputUnits="m²", length=None, lengthUnits="mm", lengthModel=None,
+                   endTemperature=None):
+    # Imported here so that importing this script stays fast.
+    import hysterYaleOptimizer
+
+    if (outputUnits not in X_AREA_UNITS):
+        raise SizingError("Unknown cross-sectional area units: {0}".format(outputUnits))
+    try:
+        amp = float(amp)
+    except (TypeError, ValueError):
+        raise SizingError(RANK_INVALID_INPUT)
+    if (amp != amp):
+        raise SizingError(RANK_INVALID_INPUT)
+    length = checkLength(length, lengthUnits, AREA_INVALID_INPUT)
+    lengthModel = checkEndTemperature(endTemperature, lengthModel)
+
+    ranked = hysterYaleOptimizer.rankGeometries(amp, length, lengthModel)
+    if (not ranked):
+        raise SizingError(RANK_NO_GEOMETRY, "above range")
+    return [(SizingResult(convertUnits("m²", xArea, outputUnits), outputUnits), folds, bends)
+            for xArea, folds, bends in ranked]
+
+# Measures how long 'module' takes to import in a fresh Python process, using
+# Python's -X importtime option. The first run can be slowed down by the disk
+# cache or by writing .pyc files, so the import is timed 'runs' times and the
+# fastest is returned, in milliseconds.
+def measureColdImport(module="hysterYaleSizing", runs=IMPORT_RUNS):
+    import os
+    import subprocess
+
+    scriptDirectory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                                   cwd=scriptDirectory, capture_output=True, text=True, check=True)
+        # Each line is "import time: self [us] | cumulative | module name"
+        for line in completed.stderr.splitlines():
+            fields = line.split("|")
+            if (len(fields) == 3 and fields[2].strip() == module):
+                times.append(int(fields[1]) / 1000)
+                break
+        else:
+            raise RuntimeError("Could not find {0} in the import times.".format(module))
+    return min(times)
+
+# Measures how long the GUI started by 'command' (a list of the program and
+# its arguments) takes to start, look up its first value and close again.
+# Returns the time in milliseconds.
+def measureColdStart(command, timeout=120):
+    import os
+    import subprocess
+    import time
+
+    environment = dict(os.environ)
+    environment[STARTUP_CHECK_VARIABLE] = "1"
+    start = time.perf_counter()
+    subprocess.run(command, env=environment, timeout=timeout, check=True)
+    return (time.perf_counter() - start) * 1000
+
+if __name__ == "__main__":
+    importTime = measureColdImport()
+    print("Importing hysterYaleSizing took {0:.1f} ms at best of {1} runs (budget {2} ms)".format(
+        importTime, IMPORT_RUNS, IMPORT_BUDGET_MS))
+    withinBudget = importTime <= IMPORT_BUDGET_MS
+    if (len(sys.argv) > 1):
+        startTime = measureColdStart(sys.argv[1:])
+        print("Starting {0} took {1:.0f} ms (budget {2} ms)".format(sys.argv[1], startTime, STARTUP_BUDGET_MS))
+        withinBudget = withinBudget and startTime <= STARTUP_BUDGET_MS
+    sys.exit(0 if withinBudget else 1)
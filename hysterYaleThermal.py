@@ -0,0 +1,370 @@
+# A script for correcting the ampacity of a busbar for its length. The CSV
+# files were measured on bars long enough that the middle of the bar reaches
+# the temperature of an endless bar. In a short bar the temperature of the
+# ends also matters: ends bolted to something cooler than the bar carry heat
+# away, and ends bolted to something hotter (such as a hot terminal) add heat.
+#
+# The bar is modelled as a 1D fin in steady state: heat is made along it by the
+# current (I²ρ/A per meter), conducted along it (k·A), and lost from its
+# surface (h·P per meter), with both ends held at the end temperature. Writing
+# θ for the temperature above ambient and m² = h·P/(k·A), the temperature along
+# a bar of length L is
+# # θ(x) = θ∞ + (θend - θ∞)·cosh(m·(x - L/2))/cosh(m·L/2)
+# where θ∞ = I²ρ/(A·h·P) is the temperature of an endless bar. The hottest
+# point is the middle (when the ends are below the limit), so with
+# r = θend/θlimit the current that brings the middle to the limit is
+# # I(L) = I∞·sqrt(1 + (1 - r)/(2·sinh²(m·L/4)))
+# which tends to I∞ as the bar gets longer. Ends at the limit (r = 1) make no
+# difference at any length, and hotter ends lower the ampacity (to 0 once the
+# ends alone are too hot).
+#
+# h·P (and so m) is not known for the tested bars, but it does not have to be:
+# each tested bar reaches the limit at its tested ampacity, so
+# # h·P = I∞²ρ/(A·θlimit)    and    m² = I∞²ρ/(k·A²·θlimit)
+# which calibrates the model to the 90°C data bar by bar. If the tested bars
+# had a known length (TEST_LENGTH), their endless ampacity I∞ is worked out
+# from the measured one first.
+#
+# No tests back any particular end temperature, so the default END_TEMPERATURE
+# is the limit itself: the correction is then never above 1 and a length on
+# its own never raises an ampacity. The GUI, the service and the scripts all
+# take the temperature the ends are held at, and a cooler one should only be
+# used where it has been measured.
+#
+# The corrected ampacity is worked out for every tested bar at the bar's length,
+# and then the same lookups as hysterYaleEquations.py are used between them.
+# calculateAreaForLength and calculateAmpForLength do this in plain Python for
+# one bar, keeping each geometry's corrected table for the last few lengths
+# (see correctedTable()), and are calculateArea and calculateAmp themselves
+# when the ends are at the limit. The batch functions use NumPy (imported when
+# they are first called) for whole arrays of bars at once.
+
+import math
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+
+from hysterYaleEquations import GeometryTable
+from hysterYaleEquations import calculateArea
+from hysterYaleEquations import calculateAmp
+from hysterYaleEquations import areaFromTable
+from hysterYaleEquations import ampFromTable
+from hysterYaleEquations import calculateBatch
+from hysterYaleEquations import getGeometryTable
+from hysterYaleEquations import getInstrumentation
+from hysterYaleEquations import STATUS_OK
+from hysterYaleEquations import STATUS_ABOVE_RANGE
+from hysterYaleEquations import STATUS_BELOW_RANGE
+from hysterYaleEquations import STATUS_NO_DATA
+from hysterYaleEquations import STATUS_ERROR
+
+TEMPERATURE_LIMIT = 90 #The surface temperature (°C) the tables are sized for.
+AMBIENT_TEMPERATURE = 25 #The air temperature (°C) the bars were tested in.
+END_TEMPERATURE = TEMPERATURE_LIMIT #The temperature (°C) the ends of a bar are held at by what they are bolted to.
+TEST_LENGTH = None #The length (m) of the tested bars, or None if they were long enough for their ends not to matter.
+COPPER_CONDUCTIVITY = 385.0 #Thermal conductivity of copper, W/(m·K).
+COPPER_RESISTIVITY = 1.68e-8 #Electrical resistivity of copper at 20°C, Ω·m.
+COPPER_TEMPERATURE_COEFFICIENT = 0.00393 #Change in copper's resistivity per °C.
+CHUNK_CELLS = 1 << 22 #The most (bar, tested bar) pairs held in memory at once.
+BISECTION_STEPS = 60 #The number of halvings used to find the endless ampacity of a tested bar of TEST_LENGTH.
+BRACKET_STEPS = 64 #The most doublings used to bracket that ampacity.
+CORRECTED_TABLES = 64 #The most lengths each geometry's corrected tables are kept for.
+
+# The negative numbers returned by calculateArea and calculateAmp for each of
+# the STATUS_ codes.
+STATUS_RESULTS = {STATUS_ABOVE_RANGE: -1, STATUS_BELOW_RANGE: -2, STATUS_NO_DATA: -3, STATUS_ERROR: -99}
+
+# The constants of the thermal model. The defaults are the module constants
+# above. Two models with the same constants are equal, so either finds the
+# other's corrected tables. The methods work on single numbers; the NumPy
+# versions used by the batch functions are further down.
+class ThermalModel:
+    def __init__(self, ambientTemperature=AMBIENT_TEMPERATURE, endTemperature=END_TEMPERATURE,
+                 testLength=TEST_LENGTH, temperatureLimit=TEMPERATURE_LIMIT,
+                 conductivity=COPPER_CONDUCTIVITY, resistivity=COPPER_RESISTIVITY,
+                 temperatureCoefficient=COPPER_TEMPERATURE_COEFFICIENT):
+        self.limitRise = temperatureLimit - ambientTemperature
+        if (self.limitRise <= 0):
+            raise ValueError("The ambient temperature must be below the temperature limit.")
+        self.endTemperature = endTemperature
+        self.endRatio = (endTemperature - ambientTemperature) / self.limitRise
+        self.testLength = testLength
+        self.conductivity = conductivity
+        # The resistivity at the limit, where the hottest part of the bar is.
+        self.resistivity = resistivity*(1 + temperatureCoefficient*(temperatureLimit - 20))
+        self.key = (ambientTemperature, endTemperature, testLength, temperatureLimit,
+                    conductivity, resistivity, temperatureCoefficient)
+
+    def __eq__(self, other):
+        return isinstance(other, ThermalModel) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    # Returns m (1/m) for a bar with a cross-sectional area of 'area' (m²)
+    # whose endless ampacity is 'longAmp'.
+    def finParameter(self, area, longAmp):
+        return math.sqrt(longAmp*longAmp*self.resistivity/(self.conductivity*area*area*self.limitRise))
+
+    # Returns I(L)/I∞ for a bar of length 'length' (m) with fin parameter 'm'.
+    def lengthFactor(self, m, length):
+        if (self.endRatio == 1):
+            return 1.0
+        try:
+            half = math.sinh(m*length/4)
+        except OverflowError:
+            return 1.0
+        if (half == 0):
+            return math.inf if self.endRatio < 1 else 0.0
+        return math.sqrt(max(0.0, 1 + (1 - self.endRatio)/(2*half*half)))
+
+    # Returns the ampacity of a bar with a cross-sectional area of 'area' whose
+    # endless ampacity is 'longAmp', at a length of 'length' (m).
+    def correctedAmp(self, area, longAmp, length):
+        return longAmp*self.lengthFactor(self.finParameter(area, longAmp), length)
+
+    # Returns the ampacity an endless bar would have for a tested bar with a
+    # cross-sectional area of 'area' and a measured ampacity of 'testAmp'.
+    # The corrected ampacity rises with I∞, so I∞ is found by bisection.
+    def longBarAmp(self, area, testAmp):
+        if (self.testLength is None or self.endRatio == 1):
+            return testAmp
+        high = testAmp
+        for _ in range(BRACKET_STEPS):
+            if (self.correctedAmp(area, high, self.testLength) >= testAmp):
+                break
+            high *= 2
+        low = 0.0
+        for _ in range(BISECTION_STEPS):
+            middle = (low + high)/2
+            if (self.correctedAmp(area, middle, self.testLength) > testAmp):
+                high = middle
+            else:
+                low = middle
+        if (low == 0):
+            raise ValueError(_testLengthError(self))
+        return low
+
+# The model used when none is given.
+DEFAULT_MODEL = ThermalModel()
+
+# The message for tested bars that the model cannot explain.
+def _testLengthError(model):
+    # The ends alone would carry away more heat than the bar made.
+    return "The tested bars cannot have been {0} m long with their ends at {1}°C.".format(
+        model.testLength, model.endTemperature)
+
+# The NumPy version of ThermalModel.lengthFactor for arrays of 'm' and
+# 'lengths', which are broadcast against each other.
+def _lengthFactors(model, m, lengths):
+    import numpy as np
+
+    if (model.endRatio == 1):
+        return np.ones(np.broadcast(m, lengths).shape)
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        half = np.sinh(m*lengths/4)
+        squared = 1 + (1 - model.endRatio)/(2*half*half)
+    return np.sqrt(np.maximum(squared, 0))
+
+# The NumPy version of ThermalModel.correctedAmp.
+def _correctedAmps(model, areas, longAmps, lengths):
+    import numpy as np
+
+    m = np.sqrt(longAmps*longAmps*model.resistivity/(model.conductivity*areas*areas*model.limitRise))
+    return longAmps*_lengthFactors(model, m, lengths)
+
+# The NumPy version of ThermalModel.longBarAmp for every tested bar at once.
+def _longBarAmps(model, areas, testAmps):
+    import numpy as np
+
+    if (model.testLength is None or model.endRatio == 1):
+        return testAmps
+    high = testAmps.copy()
+    for _ in range(BRACKET_STEPS):
+        short = _correctedAmps(model, areas, high, model.testLength) < testAmps
+        if (not np.any(short)):
+            break
+        high[short] *= 2
+    low = np.zeros(testAmps.shape)
+    for _ in range(BISECTION_STEPS):
+        middle = (low + high)/2
+        tooHigh = _correctedAmps(model, areas, middle, model.testLength) > testAmps
+        high = np.where(tooHigh, middle, high)
+        low = np.where(tooHigh, low, middle)
+    if (np.any(low == 0)):
+        raise ValueError(_testLengthError(model))
+    return low
+
+# Returns the tested areas and their endless ampacities for a GeometryTable as
+# NumPy arrays.
+def _calibrate(table, model):
+    import numpy as np
+
+    areas = np.frombuffer(table.areas, dtype=np.float64)
+    return areas, _longBarAmps(model, areas, np.frombuffer(table.amps, dtype=np.float64))
+
+# The length-corrected version of calculateAmpBatch's lookup for one geometry.
+def _ampForLength(table, inputAreas, lengths, model):
+    import numpy as np
+
+    areas, longAmps = _calibrate(table, model)
+    status = np.zeros(inputAreas.shape, dtype=np.int8)
+    status[inputAreas >= areas[-1]] = STATUS_ABOVE_RANGE
+    status[inputAreas < areas[0]] = STATUS_BELOW_RANGE
+    status[np.isnan(inputAreas) | ~(lengths > 0)] = STATUS_ERROR
+    results = np.full(inputAreas.shape, np.nan)
+    inside = np.flatnonzero(status == STATUS_OK)
+    if (len(inside) == 0 or len(areas) < 2):
+        return results, status
+
+    inputAreas = inputAreas[inside]
+    lengths = lengths[inside]
+    nextIndex = np.clip(np.searchsorted(areas, inputAreas, side='right'), 1, len(areas) - 1)
+    previousIndex = nextIndex - 1
+    previousAmp = _correctedAmps(model, areas[previousIndex], longAmps[previousIndex], lengths)
+    nextAmp = _correctedAmps(model, areas[nextIndex], longAmps[nextIndex], lengths)
+    # Use the Linear Interpolation Formula between the two corrected bars.
+    part1 = (nextAmp - previousAmp)/(areas[nextIndex] - areas[previousIndex])
+    results[inside] = (part1*(inputAreas - areas[previousIndex])) + previousAmp
+    return results, status
+
+# The length-corrected version of calculateAreaBatch's lookup for one
+# geometry. Every tested bar's ampacity is corrected for each input's length,
+# and the smallest crossing is found the same way as
+# SegmentIndex.minimumCrossing, from the running highest and lowest ampacity.
+def _areaForLength(table, inputAmps, lengths, model):
+    import numpy as np
+
+    areas, longAmps = _calibrate(table, model)
+    status = np.full(inputAmps.shape, STATUS_ERROR, dtype=np.int8)
+    results = np.full(inputAmps.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(inputAmps) & (lengths > 0))
+    chunkSize = max(1, CHUNK_CELLS // len(areas))
+    for start in range(0, len(valid), chunkSize):
+        indices = valid[start:start + chunkSize]
+        amps = inputAmps[indices, None]
+        corrected = _correctedAmps(model, areas, longAmps, lengths[indices, None])
+        prefixMax = np.maximum.accumulate(corrected, axis=1)
+        prefixMin = np.minimum.accumulate(corrected, axis=1)
+        above = amps[:, 0] > prefixMax[:, -1]
+        below = amps[:, 0] < prefixMin[:, -1]
+
+        location = np.maximum(np.argmax(prefixMax >= amps, axis=1), np.argmax(prefixMin <= amps, axis=1))
+        previous = np.maximum(location - 1, 0)
+        rows = np.arange(len(indices))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            part1 = (areas[location] - areas[previous])/(corrected[rows, location] - corrected[rows, previous])
+            chunkResults = (part1*(amps[:, 0] - corrected[rows, previous])) + areas[previous]
+        chunkResults[location == 0] = areas[0]
+
+        chunkStatus = np.zeros(len(indices), dtype=np.int8)
+        chunkStatus[above] = STATUS_ABOVE_RANGE
+        chunkStatus[below] = STATUS_BELOW_RANGE
+        chunkResults[chunkStatus != STATUS_OK] = np.nan
+        results[indices] = chunkResults
+        status[indices] = chunkStatus
+    return results, status
+
+# Like calculateAmpBatch in hysterYaleEquations.py, but for bars of length
+# 'lengths' (m). 'lengths', 'bends' and 'folds' are single numbers or arrays
+# the same length as 'inputAreas'. Returns arrays of ampacities and STATUS_
+# codes.
+def calculateAmpForLengthBatch(inputAreas, lengths, bends, folds, model=None):
+    model = DEFAULT_MODEL if model is None else model
+    return calculateBatch("calculateAmpForLengthBatch",
+                          lambda table, inputValues, lengths: _ampForLength(table, inputValues, lengths, model),
+                          inputAreas, bends, folds, lengths)
+
+# Like calculateAreaBatch in hysterYaleEquations.py, but for bars of length
+# 'lengths' (m). Returns arrays of cross-sectional areas (m²) and STATUS_
+# codes.
+def calculateAreaForLengthBatch(inputAmps, lengths, bends, folds, model=None):
+    model = DEFAULT_MODEL if model is None else model
+    return calculateBatch("calculateAreaForLengthBatch",
+                          lambda table, inputValues, lengths: _areaForLength(table, inputValues, lengths, model),
+                          inputAmps, bends, folds, lengths)
+
+# Checks that a length is a positive number and returns it as a float.
+def _checkLength(length):
+    length = float(length)
+    if (not length > 0):
+        raise ValueError("The length of the bar must be a positive number.")
+    return length
+
+# The GeometryTables corrected for a length, kept for each of the tables they
+# were corrected from as an OrderedDict of the form {(length, model):
+# GeometryTable, ...} with the most recently used last. When a table is read
+# again, the old one and its corrected tables are thrown away with it.
+_correctedTables = weakref.WeakKeyDictionary()
+_correctedTablesLock = threading.Lock()
+
+# Returns a GeometryTable with the same areas as 'table' and the ampacity of
+# each tested bar corrected for a length of 'length' (m) with 'model'. The
+# corrected table is only built the first time it is asked for, so lookups
+# after that are as fast as in the tested table, and it is a GeometryTable so
+# the result cache and lookup tables work for it the same way.
+def correctedTable(table, length, model):
+    key = (length, model)
+    with _correctedTablesLock:
+        tables = _correctedTables.get(table)
+        corrected = None if tables is None else tables.get(key)
+        if (corrected is not None):
+            tables.move_to_end(key)
+            return corrected
+
+    # The areas are copied so the corrected table does not keep the compiled
+    # dataset open (see hysterYaleDataset.py).
+    corrected = GeometryTable(array('d', table.areas),
+                              array('d', [model.correctedAmp(area, model.longBarAmp(area, amp), length)
+                                          for area, amp in zip(table.areas, table.amps)]),
+                              table.signature)
+    with _correctedTablesLock:
+        tables = _correctedTables.get(table)
+        if (tables is None):
+            tables = _correctedTables[table] = OrderedDict()
+        tables[key] = corrected
+        if (len(tables) > CORRECTED_TABLES):
+            tables.popitem(last=False)
+    return corrected
+
+# Does the work of calculateAreaForLength or calculateAmpForLength (named
+# 'function'). 'calculate' is calculateArea or calculateAmp, and 'fromTable'
+# is areaFromTable or ampFromTable.
+def _calculateForLength(function, calculate, fromTable, inputValue, length, bends, folds, model):
+    model = DEFAULT_MODEL if model is None else model
+    try:
+        length = _checkLength(length)
+    except (TypeError, ValueError) as e:
+        print(e)
+        return -99
+    if (model.endRatio == 1):
+        # Every length has the tested ampacity.
+        return calculate(inputValue, bends, folds)
+
+    def fromCorrectedTable(table, inputValue):
+        return fromTable(correctedTable(table, length, model), inputValue)
+
+    instrumentation = getInstrumentation()
+    if (instrumentation is not None):
+        return instrumentation.measure(function, fromCorrectedTable, inputValue, bends, folds)
+    try:
+        try:
+            table = getGeometryTable(folds, bends)
+        except FileNotFoundError:
+            return -3
+        return fromCorrectedTable(table, inputValue)
+    except Exception as e:
+        print(e)
+        return -99
+
+# Like calculateAmp in hysterYaleEquations.py, for a bar 'length' meters long.
+def calculateAmpForLength(inputArea, length, bends, folds, model=None):
+    return _calculateForLength("calculateAmpForLength", calculateAmp, ampFromTable,
+                               inputArea, length, bends, folds, model)
+
+# Like calculateArea in hysterYaleEquations.py, for a bar 'length' meters long.
+# The smallest area at which the corrected curve carries 'inputAmp' is returned.
+def calculateAreaForLength(inputAmp, length, bends, folds, model=None):
+    return _calculateForLength("calculateAreaForLength", calculateArea, areaFromTable,
+                               inputAmp, length, bends, folds, model)
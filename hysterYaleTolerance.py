@@ -0,0 +1,190 @@
+# A script for finding how much the ampacity of a busbar can vary when the
+# cross-sectional area of the real bars varies around its nominal value.
+# calculateAmp in hysterYaleEquations.py only answers for one area, so here
+# many areas are drawn at random from the manufacturing tolerance and all of
+# them are pushed through the same Linear Interpolation with
+# calculateAmpBatch (or calculateAmpForLengthBatch from hysterYaleThermal.py
+# if a length is given).
+#
+# Two distributions of area are supported:
+# # "normal": centred on the nominal area, with the tolerance equal to
+# # # TOLERANCE_SIGMAS standard deviations.
+# # "uniform": anywhere between the nominal area minus and plus the tolerance.
+#
+# The samples are drawn and looked up in chunks of CHUNK_SAMPLES, so the areas
+# and the lookups' working arrays are only ever held for one chunk at a time.
+# The ampacities that were in range are all kept for the percentiles, which
+# is 8 bytes a sample (about 80 MB at MAX_SAMPLES), and twice that for a
+# moment while the chunks are joined together.
+# Each chunk has its own random stream spawned from the seed, so the results
+# for a seed are exactly the same whether the chunks are run one after another
+# or across a process pool.
+#
+# Example:
+# # python hysterYaleTolerance.py 30 0.5 --units mm² --bends 0 --folds 0 --samples 1000000 --seed 1
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hysterYaleEquations import calculateAmpBatch
+from hysterYaleEquations import convertUnits
+from hysterYaleEquations import STATUS_OK
+from hysterYaleEquations import STATUS_ABOVE_RANGE
+from hysterYaleEquations import STATUS_BELOW_RANGE
+from hysterYaleEquations import STATUS_NO_DATA
+from hysterYaleEquations import STATUS_ERROR
+from hysterYaleSizing import LENGTH_UNITS
+from hysterYaleSizing import X_AREA_UNITS
+
+DISTRIBUTIONS = ["normal", "uniform"] #The distributions of area that can be sampled.
+TOLERANCE_SIGMAS = 3 #The number of standard deviations the tolerance stands for in a normal distribution.
+MAX_SAMPLES = 10**7 #The most samples that can be drawn.
+CHUNK_SAMPLES = 1 << 18 #The number of samples drawn and looked up at a time.
+PERCENTILES = [0.1, 1, 5, 25, 50, 75, 95, 99, 99.9] #The percentiles of ampacity reported.
+
+# The outcome of a tolerance analysis.
+# # 'percentiles' is a dictionary of the form {percentile: ampacity, ...} for
+# # # the samples that were in the tested range, or None if none were.
+# # 'aboveRange', 'belowRange', 'noData' and 'errors' are the fractions of
+# # # samples that calculateAmp would have returned -1, -2, -3 and -99 for.
+# # 'seed' is the seed that reproduces the analysis (it is made up if none
+# # # was given).
+class ToleranceResult:
+    def __init__(self, samples, seed, ampacities, counts):
+        self.samples = samples
+        self.seed = seed
+        self.inRange = counts[STATUS_OK] / samples
+        self.aboveRange = counts[STATUS_ABOVE_RANGE] / samples
+        self.belowRange = counts[STATUS_BELOW_RANGE] / samples
+        self.noData = counts[STATUS_NO_DATA] / samples
+        self.errors = counts[STATUS_ERROR] / samples
+        if (len(ampacities) == 0):
+            self.percentiles = None
+            self.mean = None
+            self.standardDeviation = None
+        else:
+            self.percentiles = dict(zip(PERCENTILES, np.percentile(ampacities, PERCENTILES).tolist()))
+            self.mean = float(np.mean(ampacities))
+            self.standardDeviation = float(np.std(ampacities))
+
+    # The probability of a sample falling outside the tested range.
+    @property
+    def outOfRange(self):
+        return self.aboveRange + self.belowRange
+
+    def toDict(self):
+        return {"samples": self.samples, "seed": self.seed, "in_range": self.inRange,
+                "above_range": self.aboveRange, "below_range": self.belowRange,
+                "no_data": self.noData, "errors": self.errors, "mean": self.mean,
+                "standard_deviation": self.standardDeviation,
+                "percentiles": None if self.percentiles is None else
+                               {repr(percentile): amp for percentile, amp in self.percentiles.items()}}
+
+# Draws 'count' cross-sectional areas (m²) from a distribution with the random
+# stream 'seedSequence'.
+def sampleAreas(nominalArea, tolerance, distribution, count, seedSequence):
+    generator = np.random.default_rng(seedSequence)
+    if (distribution == "normal"):
+        return generator.normal(nominalArea, tolerance / TOLERANCE_SIGMAS, count)
+    return generator.uniform(nominalArea - tolerance, nominalArea + tolerance, count)
+
+# Draws and looks up one chunk of samples. Returns the ampacities that were in
+# range and the number of samples with each STATUS_ code. Runs in the worker
+# processes when a pool is used.
+def sampleChunk(nominalArea, tolerance, distribution, bends, folds, length, lengthModel, count, seedSequence):
+    areas = sampleAreas(nominalArea, tolerance, distribution, count, seedSequence)
+    if (length is None):
+        amps, status = calculateAmpBatch(areas, bends, folds)
+    else:
+        # Imported here so the thermal model is only loaded when it is used.
+        from hysterYaleThermal import calculateAmpForLengthBatch
+        amps, status = calculateAmpForLengthBatch(areas, length, bends, folds, lengthModel)
+    counts = np.bincount(status.astype(np.intp), minlength=STATUS_ERROR + 1)
+    return amps[status == STATUS_OK], counts
+
+# Works out the spread of ampacity for bars with a nominal cross-sectional
+# area of 'nominalArea' (m²) and a manufacturing tolerance of 'tolerance' (m²).
+# 'length' is the bar length in meters, or None to use the tables as they are,
+# and 'lengthModel' is the ThermalModel used to correct for it
+# (hysterYaleThermal.DEFAULT_MODEL if None). With more than one worker the
+# chunks are run in a process pool. Returns a ToleranceResult, or raises a
+# ValueError if the inputs are not valid.
+def toleranceAnalysis(nominalArea, tolerance, bends, folds, distribution="normal",
+                      samples=100000, seed=None, length=None, workers=1, lengthModel=None):
+    if (distribution not in DISTRIBUTIONS):
+        raise ValueError("Unknown distribution: {0}".format(distribution))
+    samples = int(samples)
+    if (samples < 1 or samples > MAX_SAMPLES):
+        raise ValueError("The number of samples must be between 1 and {0}.".format(MAX_SAMPLES))
+    nominalArea = float(nominalArea)
+    tolerance = float(tolerance)
+    if (not tolerance >= 0 or not np.isfinite(nominalArea)):
+        raise ValueError("The nominal area must be a number and the tolerance must not be negative.")
+
+    seedSequence = np.random.SeedSequence(seed)
+    chunkCounts = [CHUNK_SAMPLES]*(samples // CHUNK_SAMPLES)
+    if (samples % CHUNK_SAMPLES):
+        chunkCounts.append(samples % CHUNK_SAMPLES)
+    chunkArguments = [(nominalArea, tolerance, distribution, bends, folds, length, lengthModel, count, chunkSeed)
+                      for count, chunkSeed in zip(chunkCounts, seedSequence.spawn(len(chunkCounts)))]
+
+    if (workers <= 1 or len(chunkArguments) == 1):
+        chunks = [sampleChunk(*arguments) for arguments in chunkArguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(sampleChunk, *zip(*chunkArguments)))
+
+    ampacities = np.concatenate([amps for amps, counts in chunks])
+    counts = np.sum([counts for amps, counts in chunks], axis=0)
+    return ToleranceResult(samples, seedSequence.entropy, ampacities, counts)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the spread of ampacity caused by the tolerance on a busbar's area.")
+    parser.add_argument("area", type=float, help="nominal cross-sectional area")
+    parser.add_argument("tolerance", type=float, help="tolerance on the cross-sectional area, in the same units")
+    parser.add_argument("--units", choices=X_AREA_UNITS, default="mm²", help="cross-sectional area units (default mm²)")
+    parser.add_argument("--bends", type=int, default=0, help="number of 90° bends (default 0)")
+    parser.add_argument("--folds", type=int, default=0, help="number of 180° folds (default 0)")
+    parser.add_argument("--length", type=float, help="bar length (default: ignore the length)")
+    parser.add_argument("--length-units", choices=LENGTH_UNITS, default="mm", help="units of the length (default mm)")
+    parser.add_argument("--end-temperature", type=float, help="temperature of the ends of the bar in °C (default: the temperature limit)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="normal", help="distribution of the area (default normal)")
+    parser.add_argument("--samples", type=int, default=100000, help="number of samples (default 100000)")
+    parser.add_argument("--seed", type=int, help="random seed (default: a new one, which is printed)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (default 1)")
+    args = parser.parse_args(argv)
+
+    try:
+        lengthModel = None
+        if (args.end_temperature is not None):
+            # Imported here so the thermal model is only loaded when it is used.
+            from hysterYaleThermal import ThermalModel
+            lengthModel = ThermalModel(endTemperature=args.end_temperature)
+        length = None if args.length is None else convertUnits(args.length_units, args.length, "m")
+        result = toleranceAnalysis(convertUnits(args.units, args.area, "m²"),
+                                   convertUnits(args.units, args.tolerance, "m²"), args.bends, args.folds,
+                                   args.distribution, args.samples, args.seed, length, args.workers,
+                                   lengthModel)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    print("Seed: {0}".format(result.seed))
+    print("Samples: {0}".format(result.samples))
+    print("Above the tested range: {0:.4%}".format(result.aboveRange))
+    print("Below the tested range: {0:.4%}".format(result.belowRange))
+    if (result.noData):
+        print("No data for this geometry: {0:.4%}".format(result.noData))
+    if (result.percentiles is None):
+        print("None of the samples were in the tested range.")
+        return 0
+    print("Mean ampacity: {0:.3f} A (standard deviation {1:.3f} A)".format(result.mean, result.standardDeviation))
+    for percentile, amp in result.percentiles.items():
+        print("Percentile {0:>4}: {1:.3f} A".format(percentile, amp))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())